@@ -14,6 +14,8 @@ import time
 import math
 from datetime import datetime, timedelta
 
+from utils.downsample import downsample
+
 # ──────────────────────────────────────────────
 # 0.  PAGE CONFIG  (must be first Streamlit call)
 # ──────────────────────────────────────────────
@@ -298,15 +300,32 @@ def simple_forecast(series: np.ndarray, horizon: int = 12) -> np.ndarray:
     alpha, beta = 0.35, 0.08
     level   = series[-1]
     trend   = (series[-1] - series[-2]) * beta if len(series) > 1 else 0.0
+    # only steps after the first mean-revert, so horizon=1 never needs it
+    mean    = np.mean(series[-max(len(series), 20):]) if horizon > 1 else 0.0
     out     = []
     for _ in range(horizon):
         level += trend
         out.append(level)
         # mean-revert
-        level = alpha * level + (1 - alpha) * np.mean(series[-max(len(series), 20):])
+        level = alpha * level + (1 - alpha) * mean
     return np.array(out).clip(min=0)
 
 
+def simple_forecasts(series: np.ndarray, warmup: int = 3) -> np.ndarray:
+    """
+    simple_forecast(series[:i+1], horizon=1)[0] for every tick i in one
+    vectorized pass (the first *warmup* ticks use the last value instead).
+    Same floats as the per-tick calls, in O(n) instead of O(n^2).
+    """
+    beta   = 0.08
+    series = np.asarray(series)
+    out    = series.astype(np.float64)
+    if len(series) > warmup:
+        cur = series[warmup:]
+        out[warmup:] = np.maximum(cur + (cur - series[warmup - 1:-1]) * beta, 0)
+    return out
+
+
 # ──────────────────────────────────────────────
 # 4.  AUTOSCALER  — threshold + cooldown logic
 # ──────────────────────────────────────────────
@@ -375,52 +394,47 @@ class Autoscaler:
 # 5.  PRE-COMPUTE full simulation for each granularity
 # ──────────────────────────────────────────────
 
+def _simulate_granularity(agg: pd.DataFrame, g: int) -> dict:
+    """Forecast + autoscaler + CPU for one granularity, O(n) overall."""
+    requests = agg["requests"].to_numpy()
+    n        = len(agg)
+
+    scaler       = Autoscaler(
+        high_thresh = 4500 * g,   # scale thresholds with granularity
+        low_thresh  = 1800 * g,
+        sustain     = max(2, 5 // g),
+        cooldown    = max(3, 10 // g),
+        per_server_capacity = 1200 * g,
+    )
+    # one-step forecasts for every tick at once; only the autoscaler's
+    # sustain/cooldown state has to run tick by tick
+    forecasts    = simple_forecasts(requests)
+    step         = scaler.step
+    server_hist  = np.fromiter((step(i, f) for i, f in enumerate(forecasts.tolist())),
+                               dtype=int, count=n)
+
+    cap = server_hist * (1200 * g)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cpu_hist = np.where(cap > 0, np.minimum((requests / cap) * 100, 100), 100).astype(float)
+
+    return {
+        "df":         agg,
+        "forecasts":  forecasts,
+        "servers":    server_hist,
+        "cpu":        cpu_hist,
+        "events":     scaler.events,
+    }
+
+
 @st.cache_data(show_spinner=False)
-def precompute_simulation():
+def precompute_simulation(total_hours: int = 72):
     """Run full sim once; cache result."""
-    raw_df  = generate_nasa_traffic(total_hours=72)
+    raw_df  = generate_nasa_traffic(total_hours=total_hours)
 
     results = {}
     for g in [1, 5, 15]:
         agg = aggregate(raw_df, g).reset_index(drop=True)
-        n   = len(agg)
-
-        # run forecast + autoscaler across every tick
-        scaler       = Autoscaler(
-            high_thresh = 4500 * g,   # scale thresholds with granularity
-            low_thresh  = 1800 * g,
-            sustain     = max(2, 5 // g),
-            cooldown    = max(3, 10 // g),
-            per_server_capacity = 1200 * g,
-        )
-        forecasts    = np.zeros(n)
-        server_hist  = np.zeros(n, dtype=int)
-        cpu_hist     = np.zeros(n)
-        events       = []
-
-        for i in range(n):
-            # naive forecast horizon = 12 ticks ahead (already computed at i)
-            window = agg["requests"].values[:i+1]
-            if i >= 3:
-                fcast = simple_forecast(window, horizon=1)[0]
-            else:
-                fcast = window[-1]
-            forecasts[i] = fcast
-
-            srv = scaler.step(i, fcast)
-            server_hist[i] = srv
-            cap = srv * 1200 * g
-            cpu_hist[i]    = min((agg["requests"].values[i] / cap) * 100, 100) if cap > 0 else 100
-
-        events = scaler.events
-
-        results[g] = {
-            "df":         agg,
-            "forecasts":  forecasts,
-            "servers":    server_hist,
-            "cpu":        cpu_hist,
-            "events":     events,
-        }
+        results[g] = _simulate_granularity(agg, g)
     return results, raw_df
 
 
@@ -456,14 +470,27 @@ def _dark_layout(title=""):
     )
 
 
-def chart_main(agg_df, forecasts, servers, pointer, gran_label):
+def _xy(x, y, method="lttb"):
+    """x/y trace kwargs, downsampled when over the point budget."""
+    x, y = downsample(x, y, method=method)
+    return dict(x=x, y=y)
+
+
+def _chart_range(n, pointer, full=False):
+    """Tick range shown around *pointer*: -30/+15 ticks, or the whole run."""
+    if full:
+        return 0, n
+    return max(0, pointer - 30), min(n, pointer + 15)
+
+
+def chart_main(agg_df, forecasts, servers, pointer, gran_label, full=False):
     """
     Main chart: actual requests, forecast overlay, server count (secondary y).
-    Shows a sliding window of ±30 ticks around *pointer*.
+    Shows a sliding window of -30/+15 ticks around *pointer*, or the full run
+    with *full*. Traces over the point budget are LTTB-downsampled.
     """
     n      = len(agg_df)
-    lo     = max(0, pointer - 30)
-    hi     = min(n, pointer + 15)
+    lo, hi = _chart_range(n, pointer, full)
     ts     = agg_df["timestamp"].values[lo:hi]
     actual = agg_df["requests"].values[lo:hi]
     fcast  = forecasts[lo:hi]
@@ -478,35 +505,36 @@ def chart_main(agg_df, forecasts, servers, pointer, gran_label):
 
     # ── Actual (past) ──
     fig.add_trace(go.Scatter(
-        x=ts[:split], y=actual[:split],
+        **_xy(ts[:split], actual[:split]),
         mode="lines", name="Actual (past)",
         line=dict(color="#00e5ff", width=2.2),
     ), secondary_y=False)
 
     # ── Actual (future / unseen) — dimmed ──
     fig.add_trace(go.Scatter(
-        x=ts[split:], y=actual[split:],
+        **_xy(ts[split:], actual[split:]),
         mode="lines", name="Actual (future)",
         line=dict(color="#00e5ff", width=1.2, dash="dot"),
         opacity=0.35,
     ), secondary_y=False)
 
     # ── Forecast ──
+    # Downsampled once: the cone bands must share x points for the tonexty fill
+    fx, fy = downsample(ts, fcast)
+    fy = np.asarray(fy, dtype=float)
     fig.add_trace(go.Scatter(
-        x=ts, y=fcast,
+        x=fx, y=fy,
         mode="lines", name="Forecast",
         line=dict(color="#ffb300", width=1.8, dash="dash"),
     ), secondary_y=False)
 
     # ── Forecast cone (±15 %) ──
-    upper = fcast * 1.15
-    lower = fcast * 0.85
     fig.add_trace(go.Scatter(
-        x=ts, y=upper, mode="lines",
+        x=fx, y=fy * 1.15, mode="lines",
         line=dict(width=0), showlegend=False,
     ), secondary_y=False)
     fig.add_trace(go.Scatter(
-        x=ts, y=lower, mode="lines", name="Forecast ± 15 %",
+        x=fx, y=fy * 0.85, mode="lines", name="Forecast ± 15 %",
         line=dict(width=0),
         fill="tonexty",
         fillcolor="rgba(255,179,0,0.06)",
@@ -514,7 +542,7 @@ def chart_main(agg_df, forecasts, servers, pointer, gran_label):
 
     # ── Server count ──
     fig.add_trace(go.Scatter(
-        x=ts, y=srv,
+        **_xy(ts, srv, method="minmax"),
         mode="lines+markers", name="Servers",
         line=dict(color="#39ff14", width=2),
         marker=dict(size=4, color="#39ff14"),
@@ -548,11 +576,10 @@ def chart_main(agg_df, forecasts, servers, pointer, gran_label):
     return fig
 
 
-def chart_cpu_errors(agg_df, cpu_hist, pointer):
+def chart_cpu_errors(agg_df, cpu_hist, pointer, full=False):
     """Dual-axis: CPU % + error rate."""
     n  = len(agg_df)
-    lo = max(0, pointer - 30)
-    hi = min(n, pointer + 15)
+    lo, hi = _chart_range(n, pointer, full)
     ts = agg_df["timestamp"].values[lo:hi]
     cpu= cpu_hist[lo:hi]
     err= agg_df["error_rate"].values[lo:hi] * 100
@@ -560,12 +587,12 @@ def chart_cpu_errors(agg_df, cpu_hist, pointer):
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
     fig.add_trace(go.Scatter(
-        x=ts, y=cpu, mode="lines", name="CPU %",
+        **_xy(ts, cpu), mode="lines", name="CPU %",
         line=dict(color="#ff8c00", width=1.8),
     ), secondary_y=False)
 
     fig.add_trace(go.Scatter(
-        x=ts, y=err, mode="lines", name="Error Rate %",
+        **_xy(ts, err), mode="lines", name="Error Rate %",
         line=dict(color="#ff3b5c", width=1.5, dash="dash"),
     ), secondary_y=True)
 
@@ -711,6 +738,8 @@ def main():
         st.session_state["gran"]        = 1
     if "speed" not in st.session_state:
         st.session_state["speed"]       = 5
+    if "full_timeline" not in st.session_state:
+        st.session_state["full_timeline"] = False
 
     gran   = st.session_state["gran"]
     speed  = st.session_state["speed"]
@@ -776,6 +805,9 @@ def main():
             value=min(st.session_state["pointer"], n_ticks - 1),
             label_visibility="collapsed",
         )
+        st.session_state["full_timeline"] = st.checkbox(
+            "Full timeline", value=st.session_state["full_timeline"],
+        )
 
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -807,7 +839,9 @@ def main():
 
     # ── ROW 2: main chart (full width) ──────────
     gran_label = f"{gran}-minute"
-    fig_main = chart_main(agg_df, data["forecasts"], data["servers"], pointer, gran_label)
+    full_timeline = st.session_state["full_timeline"]
+    fig_main = chart_main(agg_df, data["forecasts"], data["servers"], pointer, gran_label,
+                          full=full_timeline)
     st.plotly_chart(fig_main, use_container_width=True, config={"displayModeBar": False})
 
     # ── ROW 3: server fleet  |  cpu/err chart  |  event log ──
@@ -836,7 +870,7 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
 
     with cpu_col:
-        fig_cpu = chart_cpu_errors(agg_df, data["cpu"], pointer)
+        fig_cpu = chart_cpu_errors(agg_df, data["cpu"], pointer, full=full_timeline)
         st.plotly_chart(fig_cpu, use_container_width=True, config={"displayModeBar": False})
 
     with evt_col:
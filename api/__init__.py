@@ -0,0 +1 @@
+"""HTTP API around the forecasting engine (see api.main)."""
@@ -0,0 +1,302 @@
+"""
+Forecast service: one process serves the predictors for every dashboard session.
+
+Models are loaded once through the shared engine.loader.MODEL_REGISTRY.
+Concurrent /forecast requests for the same LSTM model are micro-batched:
+requests that arrive within --window-ms of the first one are stacked into a
+single LSTMPredictor.predict_windows call, i.e. one vectorized forward pass
+per horizon step for the whole batch. ARIMA requests are fitted on a
+process pool (engine.batch_forecast.forecast_series), so a slow fit never
+blocks the event loop.
+
+Endpoints:
+    GET  /health
+    GET  /models            servable model ids and per-model batching stats
+    POST /forecast          {"model": "lstm", "resolution": "5min", "steps": 6,
+                             "data": {"request_count": [...], "weighted_load": [...], ...},
+                             "timestamps": [...]}   # optional, used by ARIMA
+
+Usage:
+    python -m api.main [--host 127.0.0.1] [--port 8000] [--window-ms 5] [--arima-workers 2]
+"""
+import argparse
+import asyncio
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+import config
+from engine.loader import ModelLoader
+from engine.numpy_lstm import WEIGHTS_FILE
+from engine.predictor_factory import FEATURE_ALIASES, LSTMPredictor, NaivePredictor, make_lstm_predictor
+
+BATCH_WINDOW_MS = 5.0
+MAX_BATCH = 256
+MAX_STEPS = 60
+ARIMA_WORKERS = 2
+ARIMA_TIMEOUT = 30.0
+ARIMA_ORDER = (2, 1, 2)
+
+# Short model names -> architecture directory under result_lstm/<res>_<target>/
+LSTM_ALIASES = {"lstm": "LSTM", "bilstm": "BiLSTM"}
+
+
+class ForecastRequest(BaseModel):
+    model: str = Field("naive", description="'naive', 'arima', 'lstm', 'bilstm' or a full id from /models")
+    resolution: str = Field("5min", description="Used to pick the model for 'lstm'/'bilstm'")
+    target: str = Field("request_count", description="Used to pick the model for 'lstm'/'bilstm'")
+    steps: int = Field(1, ge=1, le=MAX_STEPS)
+    data: Dict[str, List[float]] = Field(..., description="Column -> recent values, oldest first")
+    timestamps: Optional[List[str]] = None
+
+
+class ForecastResponse(BaseModel):
+    model: str
+    forecast: List[float]
+    batch_size: int = 1        # requests answered by the same forward pass
+    fallback: bool = False     # True -> naive last-value forecast
+    elapsed_ms: float
+
+
+class MicroBatcher:
+    """
+    Answers concurrent requests for one LSTMPredictor with one predict_windows call.
+
+    A batch closes `window` seconds after its first request or at `max_batch`
+    requests. Mixed horizons share the batch: recursive forecasts of a
+    shorter horizon are a prefix of the longest one. While a batch runs on
+    the executor new requests keep queueing, so batches grow with load.
+    """
+    def __init__(self, predictor: LSTMPredictor, window: float = BATCH_WINDOW_MS / 1000.0,
+                 max_batch: int = MAX_BATCH):
+        self.predictor = predictor
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = 0
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, window: np.ndarray, steps: int) -> Tuple[List[float], int]:
+        """Forecast for one (look_back, n_features) window and the size of the batch it ran in."""
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((window, steps, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [item for item in await self._collect() if not item[2].done()]
+            if not batch:
+                continue
+            windows = np.stack([w for w, _, _ in batch])
+            steps = max(s for _, s, _ in batch)
+            try:
+                # The predictor reuses its buffer, so only this task ever calls it
+                predictions = await loop.run_in_executor(None, self.predictor.predict_windows, windows, steps)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.requests += len(batch)
+            self.batches += 1
+            for (_, s, future), row in zip(batch, predictions):
+                if not future.done():
+                    future.set_result((row[:s].tolist(), len(batch)))
+
+    def stats(self) -> Dict[str, float]:
+        return {"requests": self.requests, "batches": self.batches,
+                "mean_batch": self.requests / self.batches if self.batches else 0.0}
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class ForecastService:
+    def __init__(self, model_dir: str = config.MODEL_DIR, window_ms: float = BATCH_WINDOW_MS,
+                 max_batch: int = MAX_BATCH, arima_workers: int = ARIMA_WORKERS):
+        self.loader = ModelLoader(model_dir)
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.arima_workers = arima_workers
+        self.batchers: Dict[str, MicroBatcher] = {}
+        self._arima_pool: Optional[ProcessPoolExecutor] = None
+        self.arima_requests = 0
+
+    def lstm_models(self) -> List[str]:
+        """Ids ('<res>_<target>/<arch>') of every exported NumPy LSTM under model_dir."""
+        pattern = os.path.join(self.loader.model_dir, "result_lstm", "*", "*", WEIGHTS_FILE)
+        return [os.path.relpath(os.path.dirname(p), os.path.join(self.loader.model_dir, "result_lstm"))
+                for p in sorted(glob.glob(pattern))]
+
+    def model_id(self, req: ForecastRequest) -> str:
+        name = req.model.lower()
+        if name in ("naive", "arima"):
+            return name
+        if name in LSTM_ALIASES:
+            res = req.resolution if req.resolution.endswith("min") else req.resolution.replace("m", "min")
+            return f"{res}_{req.target}/{LSTM_ALIASES[name]}"
+        return req.model
+
+    def batcher(self, model_id: str) -> MicroBatcher:
+        batcher = self.batchers.get(model_id)
+        if batcher is None:
+            if model_id not in self.lstm_models():
+                raise HTTPException(404, f"Unknown model '{model_id}'")
+            base = os.path.join("result_lstm", model_id)
+            model = self.loader.load_numpy_model(os.path.join(base, WEIGHTS_FILE))
+            scaler = self.loader.load_scaler(os.path.join(base, "scaler.pkl"))
+            if model is None:
+                raise HTTPException(503, f"Model '{model_id}' failed to load")
+            batcher = MicroBatcher(make_lstm_predictor(model, scaler), self.window, self.max_batch)
+            self.batchers[model_id] = batcher
+        return batcher
+
+    def arima_pool(self) -> ProcessPoolExecutor:
+        if self._arima_pool is None:
+            from engine.batch_forecast import _limit_blas_threads
+            self._arima_pool = ProcessPoolExecutor(max_workers=self.arima_workers, initializer=_limit_blas_threads)
+        return self._arima_pool
+
+    @staticmethod
+    def _frame(req: ForecastRequest) -> pd.DataFrame:
+        lengths = {len(v) for v in req.data.values()}
+        if not req.data or len(lengths) != 1 or 0 in lengths:
+            raise HTTPException(422, "data must hold one or more non-empty columns of equal length")
+        frame = pd.DataFrame(req.data)
+        if req.timestamps is not None:
+            if len(req.timestamps) != len(frame):
+                raise HTTPException(422, "timestamps must have one entry per data row")
+            frame.insert(0, "timestamp", pd.to_datetime(req.timestamps))
+        return frame
+
+    @staticmethod
+    def _target(frame: pd.DataFrame) -> pd.DataFrame:
+        """The frame NaivePredictor/ARIMA expect: optional timestamp plus 'requests' first."""
+        values = [c for c in frame.columns if c != "timestamp"]
+        target = "requests" if "requests" in values else ("request_count" if "request_count" in values else values[0])
+        return frame.rename(columns={target: "requests"})[[c for c in ("timestamp",) if c in frame] + ["requests"]]
+
+    async def forecast(self, req: ForecastRequest) -> ForecastResponse:
+        t0 = time.perf_counter()
+        model_id = self.model_id(req)
+        frame = self._frame(req)
+        batch_size, fallback = 1, False
+
+        if model_id == "naive":
+            forecast = NaivePredictor().predict(self._target(frame), req.steps)
+        elif model_id == "arima":
+            from engine.batch_forecast import forecast_series
+            self.arima_requests += 1
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.arima_pool(), forecast_series, model_id, self._target(frame), req.steps,
+                ARIMA_ORDER, 1000, ARIMA_TIMEOUT)
+            forecast, fallback = result.forecast, not result.ok
+        else:
+            batcher = self.batcher(model_id)
+            predictor = batcher.predictor
+            columns = [f if f in frame.columns else FEATURE_ALIASES.get(f, f) for f in predictor.features]
+            missing = [c for c in columns if c not in frame.columns]
+            if missing:
+                raise HTTPException(422, f"Model '{model_id}' needs columns {predictor.features}; missing {missing}")
+            if len(frame) < predictor.look_back:
+                forecast, fallback = NaivePredictor().predict(self._target(frame), req.steps), True
+            else:
+                window = frame[columns].to_numpy(dtype=float)[-predictor.look_back:]
+                forecast, batch_size = await batcher.submit(window, req.steps)
+
+        return ForecastResponse(model=model_id, forecast=forecast, batch_size=batch_size, fallback=fallback,
+                                elapsed_ms=(time.perf_counter() - t0) * 1000.0)
+
+    def stats(self) -> Dict[str, object]:
+        return {"lstm": {model_id: b.stats() for model_id, b in self.batchers.items()},
+                "arima_requests": self.arima_requests,
+                "registry": self.loader.registry.stats()}
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.close()
+        if self._arima_pool is not None:
+            self._arima_pool.shutdown(cancel_futures=True)
+            self._arima_pool = None
+
+
+def create_app(service: Optional[ForecastService] = None) -> FastAPI:
+    service = service or ForecastService()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await service.close()
+
+    app = FastAPI(title="PLANORA forecast service", lifespan=lifespan)
+    app.state.service = service
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/models")
+    async def models():
+        return {"models": ["naive", "arima"] + service.lstm_models(), "stats": service.stats()}
+
+    @app.post("/forecast", response_model=ForecastResponse)
+    async def forecast(req: ForecastRequest):
+        return await service.forecast(req)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS,
+                        help="How long a batch waits for more requests (0 = only what is already queued)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--arima-workers", type=int, default=ARIMA_WORKERS)
+    args = parser.parse_args()
+
+    import uvicorn
+    service = ForecastService(window_ms=args.window_ms, max_batch=args.max_batch, arima_workers=args.arima_workers)
+    uvicorn.run(create_app(service), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
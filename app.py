@@ -1,11 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import time
 import os
 import sys
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from typing import List, Dict
 
 # Internal Imports
@@ -15,9 +13,11 @@ try:
     import config
     from core.autoscaler import Autoscaler
     from core.anomaly import AnomalyDetector
-    from engine.loader import ModelLoader
     from engine.predictor_factory import PredictorFactory
     from utils.simulation import TimeTraveler
+    from utils.history import HistoryBuffer
+    from utils.downsample import downsample
+    from utils.csv_cache import read_csv as read_csv_cached
 except ImportError as e:
     st.error(f"Import Error: {e}. Please run from 'src' directory.")
     st.stop()
@@ -146,7 +146,7 @@ def load_hybrid_data(resolution: str) -> pd.DataFrame:
         full_path = os.path.join(root, path)
         if os.path.exists(full_path):
             try:
-                df = pd.read_csv(full_path)
+                df = read_csv_cached(full_path)
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
                 df.rename(columns={'actual': 'requests', 'predicted': 'forecast'}, inplace=True)
                 return df
@@ -168,7 +168,7 @@ def load_prophet_data(resolution: str) -> pd.DataFrame:
         full_path = os.path.join(root, path)
         if os.path.exists(full_path):
             try:
-                df = pd.read_csv(full_path)
+                df = read_csv_cached(full_path)
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
                 df.rename(columns={'actual': 'requests', 'predicted': 'forecast'}, inplace=True)
                 return df
@@ -186,7 +186,7 @@ def load_raw_data(resolution: str) -> pd.DataFrame:
         full_path = os.path.join(root, path)
         if os.path.exists(full_path):
             try:
-                df = pd.read_csv(full_path)
+                df = read_csv_cached(full_path)
                 if 'timestamp' not in df.columns:
                     df.rename(columns={df.columns[0]: 'timestamp'}, inplace=True)
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -208,7 +208,7 @@ def load_train_data(resolution: str, last_n: int = 30) -> pd.DataFrame:
         full_path = os.path.join(root, path)
         if os.path.exists(full_path):
             try:
-                df = pd.read_csv(full_path)
+                df = read_csv_cached(full_path)
                 if 'timestamp' not in df.columns:
                     df.rename(columns={df.columns[0]: 'timestamp'}, inplace=True)
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -244,7 +244,7 @@ def load_model_predictions(model_name: str, resolution: str) -> pd.DataFrame:
         full_path = os.path.join(root, path)
         if os.path.exists(full_path):
             try:
-                df = pd.read_csv(full_path)
+                df = read_csv_cached(full_path)
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
                 
                 # Rename columns to standard format
@@ -347,7 +347,7 @@ with st.sidebar:
 
 # Initialize State
 if 'history' not in st.session_state:
-    st.session_state.history = {'timestamp': [], 'requests': [], 'replicas': [], 'forecast': []}
+    st.session_state.history = HistoryBuffer(config.HISTORY_WINDOW)
 
 # Data Loading (Always Pre-calculated)
 if ('resolution' not in st.session_state or 
@@ -383,12 +383,8 @@ if ('resolution' not in st.session_state or
             })
         
         st.session_state.simulator = TimeTraveler(df)
-        st.session_state.history = {
-            'timestamp': [], 
-            'requests': [], 
-            'replicas': [], 
-            'forecast': []
-        }
+        st.session_state.pop('last_tick', None)
+        st.session_state.history = HistoryBuffer(config.HISTORY_WINDOW)
 
 if 'autoscaler' not in st.session_state:
     st.session_state.autoscaler = Autoscaler(min_servers=min_replicas, max_servers=max_replicas)
@@ -401,76 +397,119 @@ if 'anomaly_detector' not in st.session_state:
 # Layout
 st.markdown("## ⚡ PLANORA MISSION CONTROL")
 
-# Metrics Row
-col1, col2, col3, col4 = st.columns(4)
-placeholder_metrics = st.empty()
-placeholder_charts = st.empty()
+CHART_LAYOUT = dict(
+    template="plotly_dark",
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(11, 15, 26, 0.5)',
+    margin=dict(l=20, r=20, t=40, b=20),
+    uirevision="live",  # keep zoom/legend state across tick updates
+)
+
+INTERVALS = {'1m': pd.Timedelta(minutes=1), '5m': pd.Timedelta(minutes=5), '15m': pd.Timedelta(minutes=15)}
+
 
-def update():
+def get_figures():
+    """
+    The two live figures, built once per session. Each tick only swaps the
+    trace data in place, so layout/template are not rebuilt every cycle.
+    """
+    if 'figures' not in st.session_state:
+        fig = go.Figure()
+        # Actual uses current timestamps
+        fig.add_trace(go.Scatter(
+            name='Actual',
+            line=dict(color='#00e5ff', width=2),
+            fill='tozeroy',
+            fillcolor='rgba(0, 229, 255, 0.1)'
+        ))
+        # Forecast: plotted at timestamp + 1 interval (shows future prediction)
+        fig.add_trace(go.Scatter(
+            name='Forecast',
+            line=dict(color='#ffb300', dash='dash', width=2)
+        ))
+        fig.update_layout(title="TRAFFIC LOAD VS PREDICTION", height=350, **CHART_LAYOUT)
+
+        fig2 = go.Figure(go.Bar(marker_color='#ff3b5c'))
+        fig2.update_layout(title="FORECAST ERROR RESIDUALS", height=250, **CHART_LAYOUT)
+        st.session_state.figures = (fig, fig2)
+    return st.session_state.figures
+
+
+def step():
+    """Advances the simulation one tick. Returns the tick's values, or None at the end."""
     sim = st.session_state.simulator
     hist = st.session_state.history
-    
+
     data = sim.next_tick()
     if not data:
-        st.info("Simulation Complete")
-        st.stop()
-        
+        return None
+
     curr_req = data.get('requests', 0)
     curr_time = data.get('timestamp', pd.Timestamp.now())
-    
+
     # Forecast Logic (All Pre-calculated)
     fcast = data.get('forecast', curr_req)
 
     # Scaling
     # Get last replicas or initial config
-    current_replicas = hist['replicas'][-1] if hist['replicas'] else config.INITIAL_REPLICAS
+    current_replicas = int(hist.last('replicas', config.INITIAL_REPLICAS))
     replicas, reason, cost, details = st.session_state.autoscaler.calculate_replicas(curr_req, fcast, current_replicas)
-    
+
     # Anomaly Detection (Statistical Z-Score)
     anomaly = st.session_state.anomaly_detector.detect(curr_req, fcast)
-    
-    # Update History
-    hist['timestamp'].append(curr_time)
-    hist['requests'].append(curr_req)
-    hist['replicas'].append(replicas)
-    hist['forecast'].append(fcast)
-    
-    if len(hist['timestamp']) > 60:
-        for k in hist: hist[k] = hist[k][-60:]
-        
-    # UI Render
+
+    # Update History (fixed window, O(1) per tick)
+    hist.append(curr_time, requests=curr_req, replicas=replicas, forecast=fcast)
+
+    return {
+        'curr_req': curr_req,
+        'fcast': fcast,
+        'current_replicas': current_replicas,
+        'replicas': replicas,
+        'details': details,
+        'anomaly': anomaly,
+    }
+
+
+def render(tick: Dict):
+    """Draws the metrics, decision panel, charts and server grid for one tick."""
+    hist = st.session_state.history
+    curr_req, fcast, replicas = tick['curr_req'], tick['fcast'], tick['replicas']
+    details = tick['details']
+
     # Calculate Workload Status
     # Get workload classification and anomaly status
     wl_status, wl_color, wl_icon = get_workload_status(curr_req, replicas, fcast)
-    
+
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        delta_req = curr_req - hist['requests'][-2] if len(hist['requests']) > 1 else 0
+        delta_req = curr_req - hist.last('requests', curr_req, back=2)
         st.metric("🌊 TRAFFIC", f"{int(curr_req):,}", f"{delta_req:+.0f}")
-    
+
     with col2:
         delta_fcast = fcast - curr_req
         st.metric("🔮 FORECAST", f"{int(fcast):,}", f"{delta_fcast:+.0f}", delta_color="off")
-    
+
     with col3:
-        delta_replicas = replicas - current_replicas
+        delta_replicas = replicas - tick['current_replicas']
         st.metric("🖥️ NODES", f"{replicas}", f"{delta_replicas:+d}" if delta_replicas != 0 else None)
-    
+
     with col4:
         # Show workload status with color
-        anomaly_icon = "🚨" if anomaly != "NORMAL" else "✅"
-        st.metric(f"{wl_icon} WORKLOAD", wl_status, f"{anomaly_icon} {anomaly}")
-        
+        anomaly_icon = "🚨" if tick['anomaly'] != "NORMAL" else "✅"
+        st.metric(f"{wl_icon} WORKLOAD", wl_status, f"{anomaly_icon} {tick['anomaly']}")
+
     # ──────────────────────────────────────────────
     # DECISION INTELLIGENCE PANEL
     # ──────────────────────────────────────────────
     st.markdown("### 🧠 DECISION INTELLIGENCE (3-LAYER DEFENSE)")
-    
+
     # Visual Comparison of Layers
     c_d1, c_d2, c_d3 = st.columns(3)
-    
+
     with c_d1:
         st.info(f"**L1: Predictive (Attack)**\nTarget: **{details['predictive_target']}** Nodes\n*Strategy: Pre-warm based on AI Forecast*")
-        
+
     with c_d2:
         # Highlight Reactive Override
         is_override = details['reactive_target'] > details['predictive_target']
@@ -478,7 +517,7 @@ def update():
             st.error(f"**L2: Reactive (Defense)**\nTarget: **{details['reactive_target']}** Nodes\n*⚠️ OVERRIDE TRIGGERED: Load Spike Detected!*")
         else:
             st.success(f"**L2: Reactive (Defense)**\nTarget: **{details['reactive_target']}** Nodes\n*Status: Safe (Below Forecast)*")
-            
+
     with c_d3:
         # Cooldown Status
         if details['cooldown'] > 0:
@@ -488,66 +527,50 @@ def update():
 
     st.markdown("---")
 
-    with placeholder_charts.container():
-        # Row 1: Main Chart
-        fig = go.Figure()
-        
-        # Actual uses current timestamps
-        fig.add_trace(go.Scatter(
-            x=hist['timestamp'], 
-            y=hist['requests'], 
-            name='Actual', 
-            line=dict(color='#00e5ff', width=2), 
-            fill='tozeroy', 
-            fillcolor='rgba(0, 229, 255, 0.1)'
-        ))
-        
-        # Forecast: Shift timestamps FORWARD by 1 interval (shows future prediction)
-        # Calculate interval from resolution
-        interval_map = {'1m': pd.Timedelta(minutes=1), '5m': pd.Timedelta(minutes=5), '15m': pd.Timedelta(minutes=15)}
-        interval = interval_map.get(resolution, pd.Timedelta(minutes=1))
-        
-        # Shift forecast timestamps forward
-        forecast_timestamps = [t + interval for t in hist['timestamp']]
-        
-        fig.add_trace(go.Scatter(
-            x=forecast_timestamps,  # FUTURE timestamps
-            y=hist['forecast'], 
-            name='Forecast', 
-            line=dict(color='#ffb300', dash='dash', width=2)
-        ))
-        fig.update_layout(
-            title="TRAFFIC LOAD VS PREDICTION",
-            template="plotly_dark",
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(11, 15, 26, 0.5)',
-            height=350,
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        st.plotly_chart(fig, width='stretch')
-        
-        # Row 2: Server Grid + Residuals
-        c_grid, c_res = st.columns([1, 1])
-        with c_grid:
-            st.markdown("### 🖥️ SERVER FLEET STATUS")
-            st.markdown(render_server_grid(replicas, max_replicas=12), unsafe_allow_html=True)
-            
-        with c_res:
-            res_val = np.array(hist['requests'], dtype=float) - np.array(hist['forecast'], dtype=float)
-            fig2 = go.Figure(go.Bar(x=hist['timestamp'], y=res_val, marker_color='#ff3b5c'))
-            fig2.update_layout(
-                title="FORECAST ERROR RESIDUALS",
-                template="plotly_dark",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(11, 15, 26, 0.5)',
-                height=250,
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            st.plotly_chart(fig2, width='stretch')
-
-if is_running:
-    update()
-    time.sleep(simulation_speed)
-    st.rerun()
-else:
-    st.info("SYSTEM PAUSED")
+    fig, fig2 = get_figures()
+    timestamps = hist.timestamps
+    requests = hist['requests']
+    forecasts = hist['forecast']
+
+    # Row 1: Main Chart (forecast shifted FORWARD by 1 interval)
+    interval = INTERVALS.get(resolution, pd.Timedelta(minutes=1)).to_timedelta64()
+    # Traces longer than config.MAX_CHART_POINTS are LTTB-downsampled
+    x, y = downsample(timestamps, requests)
+    fig.data[0].update(x=x, y=y)
+    x, y = downsample(timestamps + interval, forecasts)
+    fig.data[1].update(x=x, y=y)
+    st.plotly_chart(fig, width='stretch', key="chart_traffic")
+
+    # Row 2: Server Grid + Residuals
+    c_grid, c_res = st.columns([1, 1])
+    with c_grid:
+        st.markdown("### 🖥️ SERVER FLEET STATUS")
+        st.markdown(render_server_grid(replicas, max_replicas=12), unsafe_allow_html=True)
+
+    with c_res:
+        x, y = downsample(timestamps, requests - forecasts, method="minmax")
+        fig2.data[0].update(x=x, y=y)
+        st.plotly_chart(fig2, width='stretch', key="chart_residuals")
+
+
+# Only this fragment re-executes each cycle; the CSS, sidebar and data
+# loading above run again only when the operator changes a control.
+@st.fragment(run_every=simulation_speed if is_running else None)
+def live_panel():
+    if not is_running:
+        st.info("SYSTEM PAUSED")
+        if 'last_tick' in st.session_state:
+            render(st.session_state.last_tick)
+        return
+
+    tick = step()
+    if tick is None:
+        st.info("Simulation Complete")
+        if 'last_tick' in st.session_state:
+            render(st.session_state.last_tick)
+        return
+    st.session_state.last_tick = tick
+    render(tick)
+
+
+live_panel()
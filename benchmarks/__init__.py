@@ -0,0 +1 @@
+"""Micro-benchmarks for the PLANORA hot paths. Run modules with `python -m benchmarks.<name>`."""
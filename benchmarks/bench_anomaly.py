@@ -0,0 +1,108 @@
+"""
+Benchmark: AnomalyDetector (list + np.mean/np.std per tick)
+vs StreamingAnomalyDetector (ring buffer + running sums),
+and N independent detectors vs one AnomalyDetectorBank.
+
+Usage:
+    python -m benchmarks.bench_anomaly [--ticks 5000] [--bank]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.anomaly import LABELS, AnomalyDetector, AnomalyDetectorBank, StreamingAnomalyDetector
+
+WINDOW_SIZES = [30, 1_000, 100_000]
+STREAM_COUNTS = [10, 100, 1_000]
+
+
+def make_residual_stream(n: int, seed: int = 42):
+    """Synthetic load/forecast pair with noise and a few injected spikes/drops."""
+    rng = np.random.default_rng(seed)
+    forecast = 500 + 200 * np.sin(np.arange(n) / 60.0)
+    actual = forecast + rng.normal(0, 25, n)
+    spikes = rng.choice(n, size=max(1, n // 200), replace=False)
+    actual[spikes] += rng.choice([-1, 1], size=len(spikes)) * rng.uniform(100, 400, len(spikes))
+    return actual.tolist(), forecast.tolist()
+
+
+def prime(detector, actual, forecast):
+    """Fill the detector window so the timed ticks run at steady state."""
+    if isinstance(detector, AnomalyDetector):
+        detector.errors = [a - f for a, f in zip(actual, forecast)][-detector.window_size:]
+    else:
+        for a, f in zip(actual, forecast):
+            detector.detect(a, f)
+
+
+def time_ticks(detector, actual, forecast):
+    t0 = time.perf_counter()
+    labels = [detector.detect(a, f) for a, f in zip(actual, forecast)]
+    return time.perf_counter() - t0, labels
+
+
+def run(ticks: int):
+    print(f"{'window':>8} | {'baseline us/tick':>16} | {'streaming us/tick':>17} | {'speedup':>7} | verdicts")
+    print("-" * 70)
+    for window in WINDOW_SIZES:
+        actual, forecast = make_residual_stream(window + ticks)
+        warm_a, warm_f = actual[:window], forecast[:window]
+        run_a, run_f = actual[window:], forecast[window:]
+
+        baseline = AnomalyDetector(window_size=window)
+        streaming = StreamingAnomalyDetector(window_size=window)
+        prime(baseline, warm_a, warm_f)
+        prime(streaming, warm_a, warm_f)
+
+        t_base, labels_base = time_ticks(baseline, run_a, run_f)
+        t_stream, labels_stream = time_ticks(streaming, run_a, run_f)
+
+        mismatches = sum(a != b for a, b in zip(labels_base, labels_stream))
+        verdict = "identical" if mismatches == 0 else f"{mismatches} mismatches"
+        print(f"{window:>8} | {t_base / ticks * 1e6:>16.2f} | {t_stream / ticks * 1e6:>17.2f} | "
+              f"{t_base / t_stream:>6.1f}x | {verdict}")
+
+
+def run_bank(ticks: int, window: int = 30):
+    print(f"{'streams':>8} | {'detectors us/tick':>17} | {'bank us/tick':>12} | {'speedup':>7} | verdicts")
+    print("-" * 70)
+    for n_streams in STREAM_COUNTS:
+        rng = np.random.default_rng(n_streams)
+        forecast = np.full((ticks, n_streams), 500.0)
+        actual = forecast + rng.normal(0, 25, (ticks, n_streams))
+
+        detectors = [AnomalyDetector(window_size=window) for _ in range(n_streams)]
+        t0 = time.perf_counter()
+        labels_loop = np.array([[LABELS.index(d.detect(a, f)) for d, a, f in zip(detectors, row_a, row_f)]
+                                for row_a, row_f in zip(actual.tolist(), forecast.tolist())])
+        t_loop = time.perf_counter() - t0
+
+        bank = AnomalyDetectorBank(n_streams, window_size=window)
+        t0 = time.perf_counter()
+        labels_bank = np.array([bank.update(row_a, row_f)[1] for row_a, row_f in zip(actual, forecast)])
+        t_bank = time.perf_counter() - t0
+
+        mismatches = int((labels_loop != labels_bank).sum())
+        verdict = "identical" if mismatches == 0 else f"{mismatches} mismatches"
+        print(f"{n_streams:>8} | {t_loop / ticks * 1e6:>17.1f} | {t_bank / ticks * 1e6:>12.1f} | "
+              f"{t_loop / t_bank:>6.1f}x | {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=5000, help="Timed ticks per window size")
+    parser.add_argument("--bank", action="store_true", help="Benchmark AnomalyDetectorBank instead")
+    args = parser.parse_args()
+    if args.bank:
+        run_bank(min(args.ticks, 500))
+    else:
+        run(args.ticks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: CustomARIMAPredictor per-tick latency, full refit every call
+vs online mode (Kalman filter extend, periodic / drift-triggered refit).
+
+Usage:
+    python -m benchmarks.bench_arima [--resolution 5min] [--ticks 200] [--steps 6]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from engine.arima_model import CustomARIMAPredictor
+
+
+def load_requests(resolution: str) -> pd.DataFrame:
+    df = pd.read_csv(os.path.join(config.DATA_DIR, f"train_{resolution}.csv"), index_col=0, parse_dates=True)
+    return pd.DataFrame({"timestamp": df.index, "requests": df["request_count"].to_numpy()})
+
+
+def time_ticks(predictor, df, start, ticks, steps, every=1):
+    """Slides a look_back window one tick at a time; returns (latencies, forecasts by tick)."""
+    latencies, forecasts = [], {}
+    for i in range(start, start + ticks, every):
+        window = df.iloc[i - predictor.look_back:i]
+        t0 = time.perf_counter()
+        forecasts[i] = predictor.predict(window, steps)
+        latencies.append(time.perf_counter() - t0)
+    return np.array(latencies), forecasts
+
+
+def run(resolution: str, ticks: int, steps: int, refit_every: int):
+    df = load_requests(resolution)
+    offline = CustomARIMAPredictor()
+    online = CustomARIMAPredictor(online=True, refit_every=refit_every)
+    start = 2 * offline.look_back
+
+    # The full refit is slow, so it is sampled every 10th tick
+    t_off, f_off = time_ticks(offline, df, start, ticks, steps, every=10)
+    t_on, f_on = time_ticks(online, df, start, ticks, steps)
+
+    rel = [np.max(np.abs(np.subtract(f_on[i], f_off[i])) / np.maximum(f_off[i], 1.0)) for i in f_off]
+    print(f"ticks:        {ticks} @ {resolution}, look_back={offline.look_back}, steps={steps}")
+    print(f"full refit:   median {np.median(t_off) * 1e3:8.1f} ms/tick, p95 {np.percentile(t_off, 95) * 1e3:8.1f} ms")
+    print(f"online:       median {np.median(t_on) * 1e3:8.1f} ms/tick, p95 {np.percentile(t_on, 95) * 1e3:8.1f} ms, "
+          f"mean {t_on.mean() * 1e3:.1f} ms ({online.n_refits} refits)")
+    print(f"speedup:      {np.median(t_off) / np.median(t_on):.1f}x (median)")
+    print(f"forecast gap: max relative difference vs full refit {max(rel):.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", default="5min", choices=["5min", "15min"], help="Train CSV resolution")
+    parser.add_argument("--ticks", type=int, default=200, help="Timed ticks")
+    parser.add_argument("--steps", type=int, default=6, help="Forecast horizon")
+    parser.add_argument("--refit-every", type=int, default=288, help="Online scheduled refit interval")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    run(args.resolution, args.ticks, args.steps, args.refit_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: per-tick Autoscaler.calculate_replicas vs the vectorized simulate() replay,
+and the per-tick cost and outcome of the MPC policy (core.mpc).
+
+Usage:
+    python -m benchmarks.bench_autoscaler [--days 365] [--mpc-ticks 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from core.autoscaler import ACTIONS, Autoscaler, simulate
+from core.mpc import MPCAutoscaler
+
+
+def make_trace(n: int, seed: int = 42):
+    """Daily-cycle 1-minute load with noise; forecast = load shifted by one tick."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    loads = 1200 + 900 * np.sin(2 * np.pi * t / 1440) + rng.normal(0, 150, n)
+    loads = loads.clip(min=0)
+    forecasts = np.concatenate(([loads[0]], loads[:-1]))
+    return loads, forecasts
+
+
+def run(days: int):
+    n = days * 1440
+    loads, forecasts = make_trace(n)
+
+    # Baseline on a slice (the per-tick path is too slow for a full year)
+    n_base = min(n, 100_000)
+    scaler = Autoscaler()
+    replicas = config.INITIAL_REPLICAS
+    base_replicas = []
+    t0 = time.perf_counter()
+    for load, fcast in zip(loads[:n_base].tolist(), forecasts[:n_base].tolist()):
+        replicas, _, _, _ = scaler.calculate_replicas(load, fcast, replicas)
+        base_replicas.append(replicas)
+    t_base = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = simulate(loads, forecasts, config.INITIAL_REPLICAS)
+    t_sim = time.perf_counter() - t0
+
+    identical = np.array_equal(result.replicas[:n_base], base_replicas)
+    actions = np.bincount(result.actions, minlength=len(ACTIONS))
+    print(f"ticks:              {n:,} ({days} days @ 1 min)")
+    print(f"calculate_replicas: {t_base / n_base * 1e6:.2f} us/tick (measured on {n_base:,} ticks)")
+    print(f"simulate():         {t_sim / n * 1e6:.3f} us/tick, {t_sim:.3f} s total")
+    print(f"speedup:            {(t_base / n_base) / (t_sim / n):.1f}x, replicas identical: {identical}")
+    print("actions:            " + ", ".join(f"{a}={c:,}" for a, c in zip(ACTIONS, actions)))
+    print(f"total cost:         {result.cost.sum():,.1f}")
+
+
+def served_replicas(replicas: np.ndarray, boot_delay: int, initial: int) -> np.ndarray:
+    """Replicas serving each tick: new ones need `boot_delay` ticks, removed ones stop at once."""
+    padded = np.concatenate((np.full(boot_delay, initial), replicas))
+    return np.lib.stride_tricks.sliding_window_view(padded, boot_delay + 1).min(axis=1)
+
+
+def run_mpc(ticks: int):
+    """MPC vs 3-layer on the same trace, both scored with the replica boot delay."""
+    scaler = MPCAutoscaler()
+    loads, _ = make_trace(ticks + scaler.horizon + 1)
+    # Perfect-foresight forecasts, so the comparison isolates the policy
+    next_loads = loads[1:ticks + 1]
+    loads = loads[:ticks + scaler.horizon + 1]
+
+    replicas = config.INITIAL_REPLICAS
+    mpc_replicas = np.empty(ticks, dtype=np.int64)
+    t0 = time.perf_counter()
+    for t in range(ticks):
+        replicas, _, _, _ = scaler.calculate_replicas(loads[t], loads[t + 1:t + 1 + scaler.horizon], replicas)
+        mpc_replicas[t] = replicas
+    t_mpc = time.perf_counter() - t0
+    base_replicas = simulate(loads[:ticks], next_loads, config.INITIAL_REPLICAS).replicas
+
+    n_levels = scaler.max_servers - scaler.min_servers + 1
+    print(f"\nMPC policy ({n_levels} replica levels x {scaler.horizon + 1} steps, boot delay {scaler.boot_delay}):")
+    print(f"calculate_replicas: {t_mpc / ticks * 1e6:.1f} us/tick (measured on {ticks:,} ticks)")
+    for name, r in (("3-layer", base_replicas), ("MPC", mpc_replicas)):
+        served = served_replicas(r, scaler.boot_delay, config.INITIAL_REPLICAS)
+        under = int((loads[:ticks] > served * scaler.capacity_per_replica).sum())
+        actions = int((np.diff(r) != 0).sum())
+        cost = r.sum() * config.COST_PER_REPLICA_PER_TICK
+        print(f"  {name:<8} cost {cost:10,.1f}  under-provisioned ticks {under:6,}  scaling actions {actions:6,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365, help="Days of 1-minute data to replay")
+    parser.add_argument("--mpc-ticks", type=int, default=20_000, help="Ticks replayed through the MPC policy")
+    args = parser.parse_args()
+    run(args.days)
+    run_mpc(args.mpc_ticks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: LSTMPredictor multi-step forecast, legacy loop (model.predict +
+np.append per step) vs the buffered direct-call path, single series and batched.
+
+The model has the trained architecture (LSTM 50 -> LSTM 50 -> Dense 1) with
+random weights; only latency and agreement between the paths are measured.
+
+--cold-start compares a fresh process loading a trained model with Keras
+(model.keras) vs the NumPy backend (weights.npz): wall time to the first
+forecast and peak RSS.
+
+Usage:
+    python -m benchmarks.bench_lstm [--look-back 30] [--steps 15] [--series 64]
+    python -m benchmarks.bench_lstm --cold-start [--model result_lstm/1min_request_count/LSTM]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.predictor_factory import LSTMPredictor
+
+
+def build_model(look_back: int):
+    import keras
+    model = keras.Sequential([
+        keras.Input((look_back, 1)),
+        keras.layers.LSTM(50, return_sequences=True),
+        keras.layers.Dropout(0.2),
+        keras.layers.LSTM(50),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(1),
+    ])
+    return model
+
+
+def build_scaler(values: np.ndarray):
+    from sklearn.preprocessing import MinMaxScaler
+    return MinMaxScaler().fit(values.reshape(-1, 1))
+
+
+def legacy_predict(predictor: LSTMPredictor, recent_data: pd.DataFrame, steps: int):
+    """The pre-buffer implementation: model.predict and np.append every step."""
+    series = recent_data['requests'].values[-predictor.look_back:].reshape(-1, 1)
+    current_input = predictor.scaler.transform(series).reshape((1, predictor.look_back, 1))
+    predictions = []
+    for _ in range(steps):
+        y_val_scaled = predictor.model.predict(current_input, verbose=0)[0, 0]
+        predictions.append(y_val_scaled)
+        current_input = np.append(current_input[:, 1:, :], np.array([[[y_val_scaled]]]), axis=1)
+    return predictor.scaler.inverse_transform(np.array(predictions).reshape(-1, 1)).flatten()
+
+
+def timed(fn, repeat):
+    fn()  # warm-up (tracing, first-call allocation)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - t0) / repeat, out
+
+
+def run(look_back: int, steps: int, n_series: int, repeat: int):
+    rng = np.random.default_rng(42)
+    frames = [pd.DataFrame({'requests': 500 + 200 * np.sin(np.arange(look_back) / 5 + i) + rng.normal(0, 20, look_back)})
+              for i in range(n_series)]
+    predictor = LSTMPredictor(build_model(look_back), build_scaler(np.concatenate([f['requests'] for f in frames])), look_back)
+
+    t_legacy, ref = timed(lambda: legacy_predict(predictor, frames[0], steps), repeat)
+    t_fast, fast = timed(lambda: predictor.predict(frames[0], steps), repeat)
+    t_loop, _ = timed(lambda: [predictor.predict(f, steps) for f in frames], max(1, repeat // 10))
+    t_batch, batch = timed(lambda: predictor.predict_batch(frames, steps), repeat)
+
+    print(f"look_back={look_back}, steps={steps}, series={n_series}")
+    print(f"legacy predict():      {t_legacy * 1e3:8.2f} ms/forecast")
+    print(f"buffered predict():    {t_fast * 1e3:8.2f} ms/forecast ({t_legacy / t_fast:.1f}x)")
+    print(f"{n_series} series, one by one: {t_loop * 1e3:8.2f} ms")
+    print(f"{n_series} series, batched:    {t_batch * 1e3:8.2f} ms ({t_loop / t_batch:.1f}x, "
+          f"{t_legacy * n_series / t_batch:.0f}x vs legacy)")
+    print(f"max |legacy - buffered| = {np.max(np.abs(ref - fast)):.2e}, "
+          f"batch row 0 matches: {np.allclose(batch[0], fast, rtol=1e-5)}")
+
+
+COLD_START_SNIPPETS = {
+    "keras": (
+        "import keras, numpy as np\n"
+        "m = keras.models.load_model(os.path.join(d, 'model.keras'), compile=False)\n"
+        "y = m(np.zeros((1,) + m.input_shape[1:], 'float32'))\n"
+    ),
+    "numpy": (
+        "from engine.numpy_lstm import NumpyLSTMModel\n"
+        "m = NumpyLSTMModel.load(os.path.join(d, 'weights.npz'))\n"
+        "y = m(__import__('numpy').zeros((1,) + m.input_shape, 'float32'))\n"
+    ),
+}
+
+
+def run_cold_start(model: str):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for backend, snippet in COLD_START_SNIPPETS.items():
+        code = (
+            "import os, sys, time, resource\n"
+            "t0 = time.perf_counter()\n"
+            f"sys.path.insert(0, {root!r}); d = os.path.join({root!r}, 'models', {model!r})\n"
+            + snippet +
+            "print(time.perf_counter() - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)\n"
+        )
+        env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+        seconds, rss_mb = map(float, out.stdout.split()[-2:])
+        print(f"{backend:>6}: first forecast after {seconds:6.2f} s, peak RSS {rss_mb:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--look-back", type=int, default=30, help="Window length (30 = 1min models)")
+    parser.add_argument("--steps", type=int, default=15, help="Forecast horizon")
+    parser.add_argument("--series", type=int, default=64, help="Series in the batched run")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed repetitions")
+    parser.add_argument("--cold-start", action="store_true", help="Compare Keras vs NumPy backend process start")
+    parser.add_argument("--model", default="result_lstm/1min_request_count/LSTM", help="Model dir under models/")
+    args = parser.parse_args()
+    if args.cold_start:
+        run_cold_start(args.model)
+    else:
+        run(args.look_back, args.steps, args.series, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
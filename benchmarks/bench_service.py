@@ -0,0 +1,183 @@
+"""
+Benchmark: forecast service latency and throughput under concurrent load.
+
+Starts `python -m api.main` on a free port (or targets --url) and, for each
+concurrency level, keeps that many keep-alive connections busy posting
+/forecast requests built from real windows of data/<resolution>.csv.
+Reports p50/p99 latency, requests/sec and the mean micro-batch size the
+server formed (from /models). The client is plain asyncio streams, so the
+generator itself adds little overhead.
+
+Usage:
+    python -m benchmarks.bench_service [--model lstm] [--concurrency 1 4 16 64] [--requests 400]
+    python -m benchmarks.bench_service --url http://127.0.0.1:8000 --model arima --requests 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+FEATURES = ["request_count", "weighted_load", "total_bytes"]
+
+
+def make_payloads(resolution: str, model: str, steps: int, look_back: int, n: int) -> List[bytes]:
+    """n request bodies, each a different window of the test split."""
+    df = pd.read_csv(os.path.join(config.DATA_DIR, f"test_{resolution}.csv"), index_col=0, parse_dates=True)
+    starts = np.linspace(0, len(df) - look_back, n).astype(int)
+    payloads = []
+    for s in starts:
+        window = df.iloc[s:s + look_back]
+        payloads.append(json.dumps({
+            "model": model, "resolution": resolution, "steps": steps,
+            "data": {c: window[c].astype(float).tolist() for c in FEATURES},
+            "timestamps": window.index.astype(str).tolist(),
+        }).encode())
+    return payloads
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client on asyncio streams."""
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def get_json(host: str, port: int, path: str) -> Dict:
+    conn = Connection(host, port)
+    try:
+        return json.loads((await conn.request("GET", path))[1])
+    finally:
+        conn.close()
+
+
+async def run_level(host: str, port: int, payloads: List[bytes], concurrency: int, total: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        conn = Connection(host, port)
+        try:
+            for i in counter:
+                t0 = time.perf_counter()
+                status, _ = await conn.request("POST", "/forecast", payloads[i % len(payloads)])
+                latencies.append(time.perf_counter() - t0)
+                errors += status != 200
+        finally:
+            conn.close()
+
+    before = await get_json(host, port, "/models")
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    after = await get_json(host, port, "/models")
+
+    requests = batches = 0
+    for model_id, stats in after["stats"]["lstm"].items():
+        prev = before["stats"]["lstm"].get(model_id, {"requests": 0, "batches": 0})
+        requests += stats["requests"] - prev["requests"]
+        batches += stats["batches"] - prev["batches"]
+    ms = np.array(latencies) * 1000.0
+    return {"concurrency": concurrency, "p50": float(np.percentile(ms, 50)), "p99": float(np.percentile(ms, 99)),
+            "rps": len(ms) / elapsed, "mean_batch": requests / batches if batches else float("nan"),
+            "errors": errors}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(host: str, port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await get_json(host, port, "/health")
+            return
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"service on {host}:{port} did not become ready")
+            await asyncio.sleep(0.2)
+
+
+async def bench(args, host: str, port: int):
+    await wait_ready(host, port)
+    payloads = make_payloads(args.resolution, args.model, args.steps, args.look_back, args.windows)
+    # Warm-up: loads the model and, for ARIMA, the pool workers
+    await run_level(host, port, payloads, 1, 2)
+    print(f"model={args.model} resolution={args.resolution} steps={args.steps} requests/level={args.requests}")
+    print(f"{'concurrency':>11} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'batch':>7} {'errors':>7}")
+    for c in args.concurrency:
+        r = await run_level(host, port, payloads, c, max(args.requests, c))
+        print(f"{r['concurrency']:>11} {r['p50']:>9.2f} {r['p99']:>9.2f} {r['rps']:>9.0f} "
+              f"{r['mean_batch']:>7.1f} {r['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Benchmark a running service instead of starting one")
+    parser.add_argument("--model", default="lstm", help="naive, arima, lstm, bilstm or a full model id")
+    parser.add_argument("--resolution", default="5min", choices=["1min", "5min", "15min"])
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--look-back", type=int, default=60, help="Rows sent per request")
+    parser.add_argument("--windows", type=int, default=64, help="Distinct windows cycled through")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level")
+    parser.add_argument("--window-ms", type=float, default=5.0, help="Micro-batch window of the started service")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlparse(args.url)
+        asyncio.run(bench(args, url.hostname, url.port or 80))
+        return
+
+    port = _free_port()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, "-m", "api.main", "--port", str(port),
+                               "--window-ms", str(args.window_ms)], cwd=root)
+    try:
+        asyncio.run(bench(args, "127.0.0.1", port))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: import-time cost of the engine entry points, via `python -X importtime`.
+
+Each target is imported in a fresh interpreter. The report shows the
+cumulative import time, the slowest transitive imports and whether any
+heavy backend dependency (statsmodels, TensorFlow, Prophet, ...) was loaded
+before a predictor was requested. With --max-ms the run fails if a target
+gets slower than the budget or loads a heavy dependency, so the lazy
+registry cannot silently regress.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 5] [--max-ms 800]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("statsmodels", "tensorflow", "keras", "prophet", "sklearn", "joblib", "torch")
+
+TARGETS = {
+    "engine": "import engine",
+    "engine.registry": "import engine.registry",
+    "engine.predictor_factory": "import engine.predictor_factory",
+    "engine.loader": "import engine.loader",
+    "get_predictor('naive')": "from engine.registry import get_predictor; get_predictor('naive')",
+    "get_predictor('arima')": "from engine.registry import get_predictor; get_predictor('arima')",
+}
+
+# Targets expected to load a heavy dependency, so --max-ms does not apply to them
+EXPECTED_HEAVY = {"get_predictor('arima')"}
+
+
+def import_profile(code: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """(total ms, [(module, cumulative ms)] top-level first, heavy modules loaded) for one fresh run."""
+    probe = code + f"; import sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Drop the separator space; what remains indents nested imports by two per level
+        modules.append((name[1:].rstrip(), int(cumulative) / 1000.0))
+    # Only top-level imports (no leading indentation) add up to the total
+    total = sum(ms for name, ms in modules if not name.startswith(" "))
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return total, modules, heavy
+
+
+def run(repeat: int, top: int) -> Dict[str, Tuple[float, List[str]]]:
+    # Interpreter startup (site, encodings, ...) is the same for every target and subtracted
+    startup_runs = [import_profile("pass") for _ in range(repeat)]
+    startup = min(r[0] for r in startup_runs)
+    startup_modules = {name.strip() for name, _ in startup_runs[0][1]}
+    print(f"{'interpreter startup':<26} {startup:8.1f} ms (subtracted below)")
+    results = {}
+    for label, code in TARGETS.items():
+        runs = [import_profile(code) for _ in range(repeat)]
+        total, modules, heavy = min(runs, key=lambda r: r[0])
+        total -= startup
+        slowest = sorted(((n.strip(), ms) for n, ms in modules if n.strip() not in startup_modules),
+                         key=lambda x: -x[1])[:top]
+        print(f"{label:<26} {total:8.1f} ms (best of {repeat})  heavy: {', '.join(heavy) or '-'}")
+        for name, ms in slowest:
+            print(f"    {ms:8.1f} ms  {name}")
+        results[label] = (total, heavy)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target (best is reported)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest transitive imports shown per target")
+    parser.add_argument("--max-ms", type=float, help="Fail if a lazy target exceeds this many ms or loads a heavy dependency")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.top)
+    if args.max_ms is None:
+        return
+    failures = [
+        f"{label}: {total:.0f} ms" + (f", loaded {', '.join(heavy)}" if heavy else "")
+        for label, (total, heavy) in results.items()
+        if label not in EXPECTED_HEAVY and (total > args.max_ms or heavy)
+    ]
+    if failures:
+        print("\nFAILED startup budget:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"\nAll lazy targets within {args.max_ms:g} ms and free of heavy imports.")
+
+
+if __name__ == "__main__":
+    main()
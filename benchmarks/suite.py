@@ -0,0 +1,422 @@
+"""
+Benchmark suite: every hot path, timed on fixed-seed fixtures, saved as JSON.
+
+Fixtures come from data/test_1min.csv and data/train_5min.csv and are built
+once; each case's setup returns the callable that gets timed. Calls per
+sample are auto-ranged (timeit) so fast cases are not dominated by timer
+resolution, and the median over --repeat samples is the headline number.
+Cases that loop over many ticks report per-op times as well.
+
+Results are written to benchmarks/results/<commit>.json, or to
+<commit>-<filter>.json for a --filter run so partial runs never replace the
+full baseline. With --compare, the run is checked against an earlier
+results file and exits non-zero if any case's median got slower than
+--threshold times the baseline.
+
+Usage:
+    python -m benchmarks.suite [--filter autoscaler] [--repeat 5] [--out results.json]
+    python -m benchmarks.suite --compare benchmarks/results/<old commit>.json [--threshold 1.25]
+    python -m benchmarks.suite --list
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SEED = 1234
+TICKS = 1000          # ticks per call for the per-tick cases
+MIN_SAMPLE_TIME = 0.2  # seconds per sample when auto-ranging
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[["Fixtures"], Callable[[], object]]
+    ops: int = 1  # operations per call (ticks, rows, ...); 0 = one per fixture row
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, ops: int = 1):
+    """Registers a setup function; it receives the fixtures and returns the callable to time."""
+    def register(setup):
+        CASES.append(Case(name, setup, ops))
+        return setup
+    return register
+
+
+class Fixtures:
+    """Data shared by all cases, loaded lazily so --filter only pays for what it runs."""
+    test_1min_path = os.path.join(config.DATA_DIR, "test_1min.csv")
+    train_5min_path = os.path.join(config.DATA_DIR, "train_5min.csv")
+
+    @cached_property
+    def test_1min(self) -> pd.DataFrame:
+        """Dashboard-shaped frame: timestamp, requests and the other metric columns."""
+        df = pd.read_csv(self.test_1min_path, index_col=0, parse_dates=True)
+        df = df.rename(columns={"request_count": "requests"}).rename_axis("timestamp").reset_index()
+        return df
+
+    @cached_property
+    def train_5min(self) -> pd.DataFrame:
+        df = pd.read_csv(self.train_5min_path, index_col=0, parse_dates=True)
+        return df.rename(columns={"request_count": "requests"}).rename_axis("timestamp").reset_index()
+
+    @cached_property
+    def ticks(self):
+        """(loads, forecasts) for TICKS ticks of test_1min; forecasts are the last value plus seeded noise."""
+        rng = np.random.default_rng(SEED)
+        loads = self.test_1min["requests"].to_numpy(dtype=float)[:TICKS + 1]
+        forecasts = loads[:-1] * rng.normal(1.0, 0.1, TICKS)
+        return loads[1:].tolist(), forecasts.tolist()
+
+    @cached_property
+    def arima_window(self) -> pd.DataFrame:
+        return self.train_5min[["timestamp", "requests"]].iloc[-1000:].reset_index(drop=True)
+
+    @cached_property
+    def lstm_window(self) -> pd.DataFrame:
+        return self.test_1min.iloc[:30]
+
+
+# ---------------------------------------------------------------- predictors
+
+@case("predictors.arima.predict")
+def _arima_predict(fx: Fixtures):
+    from engine.arima_model import CustomARIMAPredictor
+    predictor = CustomARIMAPredictor()
+    return lambda: predictor.predict(fx.arima_window, steps=6)
+
+
+@case("predictors.lstm_mock.predict")
+def _lstm_mock_predict(fx: Fixtures):
+    from engine.mocks import MockLSTM, MockScaler
+    from engine.predictor_factory import LSTMPredictor
+    np.random.seed(SEED)
+    predictor = LSTMPredictor(MockLSTM(), MockScaler(), look_back=30)
+    return lambda: predictor.predict(fx.lstm_window, steps=6)
+
+
+@case("predictors.lstm_mock.predict_windows[256]", ops=256)
+def _lstm_mock_windows(fx: Fixtures):
+    from engine.mocks import MockLSTM, MockScaler
+    from engine.predictor_factory import LSTMPredictor
+    np.random.seed(SEED)
+    predictor = LSTMPredictor(MockLSTM(), MockScaler(), look_back=30)
+    values = fx.test_1min["requests"].to_numpy(dtype=float)
+    windows = np.lib.stride_tricks.sliding_window_view(values, 30)[:256]
+    return lambda: predictor.predict_windows(windows, steps=6)
+
+
+@case("predictors.lstm_numpy.predict")
+def _lstm_numpy_predict(fx: Fixtures):
+    from engine.loader import ModelLoader
+    from engine.predictor_factory import make_lstm_predictor
+    loader = ModelLoader(config.MODEL_DIR)
+    base = os.path.join("result_lstm", "1min_request_count", "LSTM")
+    model = loader.load_numpy_model(os.path.join(base, "weights.npz"))
+    if model is None:
+        return None
+    predictor = make_lstm_predictor(model, loader.load_scaler(os.path.join(base, "scaler.pkl")))
+    window = fx.test_1min.iloc[:predictor.look_back]
+    return lambda: predictor.predict(window, steps=6)
+
+
+@case("predictors.forecast_cache.hit")
+def _forecast_cache_hit(fx: Fixtures):
+    from engine.forecast_cache import CachedPredictor, ForecastCache
+    from engine.predictor_factory import NaivePredictor
+    predictor = CachedPredictor(NaivePredictor(), "naive", "5min", ForecastCache())
+    predictor.predict(fx.arima_window, 6)
+    return lambda: predictor.predict(fx.arima_window, 6)
+
+
+@case("predictors.conformal.quantiles")
+def _conformal_quantiles(fx: Fixtures):
+    from engine.conformal import ResidualCalibration
+    rng = np.random.default_rng(SEED)
+    predicted = rng.uniform(50, 500, 2000)
+    calibration = ResidualCalibration(predicted + rng.normal(0, 20, 2000), predicted)
+    point = predicted[:6].tolist()
+    return lambda: calibration.quantiles(point, (0.1, 0.5, 0.9))
+
+
+# ---------------------------------------------------------------- autoscaler
+
+@case("autoscaler.calculate_replicas", ops=TICKS)
+def _calculate_replicas(fx: Fixtures):
+    from core.autoscaler import Autoscaler
+    loads, forecasts = fx.ticks
+
+    def run():
+        scaler = Autoscaler()
+        replicas = config.INITIAL_REPLICAS
+        for load, fcast in zip(loads, forecasts):
+            replicas, _, _, _ = scaler.calculate_replicas(load, fcast, replicas)
+    return run
+
+
+@case("autoscaler.simulate", ops=0)
+def _simulate(fx: Fixtures):
+    from core.autoscaler import simulate
+    loads = fx.test_1min["requests"].to_numpy(dtype=float)
+    forecasts = np.concatenate((loads[:1], loads[:-1]))
+    return lambda: simulate(loads, forecasts)
+
+
+@case("autoscaler.mpc.calculate_replicas")
+def _mpc(fx: Fixtures):
+    from core.mpc import MPCAutoscaler
+    scaler = MPCAutoscaler()
+    loads, forecasts = fx.ticks
+    horizon = forecasts[:scaler.horizon]
+    return lambda: scaler.calculate_replicas(loads[0], horizon, config.INITIAL_REPLICAS)
+
+
+# ---------------------------------------------------------------- anomaly
+
+@case("anomaly.AnomalyDetector.detect", ops=TICKS)
+def _anomaly_detect(fx: Fixtures):
+    from core.anomaly import AnomalyDetector
+    loads, forecasts = fx.ticks
+
+    def run():
+        detector = AnomalyDetector()
+        for load, fcast in zip(loads, forecasts):
+            detector.detect(load, fcast)
+    return run
+
+
+@case("anomaly.StreamingAnomalyDetector.detect_code", ops=TICKS)
+def _anomaly_streaming(fx: Fixtures):
+    from core.anomaly import StreamingAnomalyDetector
+    loads, forecasts = fx.ticks
+
+    def run():
+        detector = StreamingAnomalyDetector()
+        for load, fcast in zip(loads, forecasts):
+            detector.detect_code(load, fcast)
+    return run
+
+
+@case("anomaly.detect_batch", ops=0)
+def _anomaly_batch(fx: Fixtures):
+    from core.anomaly import detect_batch
+    loads = fx.test_1min["requests"].to_numpy(dtype=float)
+    forecasts = np.concatenate((loads[:1], loads[:-1]))
+    return lambda: detect_batch(loads, forecasts)
+
+
+# ---------------------------------------------------------------- simulation
+
+@case("simulation.TimeTraveler.next_tick", ops=TICKS)
+def _next_tick(fx: Fixtures):
+    from utils.simulation import TimeTraveler
+    sim = TimeTraveler(fx.test_1min)
+
+    def run():
+        sim.reset()
+        for _ in range(TICKS):
+            sim.next_tick()
+    return run
+
+
+# ---------------------------------------------------------------- loaders
+
+@case("loaders.pandas.read_csv[test_1min]")
+def _pandas_read_csv(fx: Fixtures):
+    return lambda: pd.read_csv(fx.test_1min_path)
+
+
+@case("loaders.csv_cache.read_csv[test_1min]")
+def _csv_cache(fx: Fixtures):
+    from utils.csv_cache import read_csv
+    read_csv(fx.test_1min_path)  # builds the binary cache outside the timing
+    return lambda: read_csv(fx.test_1min_path)
+
+
+@case("loaders.data_processing.load_traffic_data[test_1min]")
+def _load_traffic_data(fx: Fixtures):
+    from utils.data_processing import load_traffic_data
+    load_traffic_data(fx.test_1min_path)
+    return lambda: load_traffic_data(fx.test_1min_path)
+
+
+@case("loaders.replay.load_replay_frame[test_1min]")
+def _load_replay_frame(fx: Fixtures):
+    from core.replay import load_replay_frame
+    load_replay_frame(fx.test_1min_path)
+    return lambda: load_replay_frame(fx.test_1min_path)
+
+
+@case("loaders.policy_sweep.load_trace[train_5min]")
+def _load_trace(fx: Fixtures):
+    from core.policy_sweep import load_trace
+    return lambda: load_trace("5min")
+
+
+@case("loaders.batch_forecast.frames_from_csv[train_5min]")
+def _frames_from_csv(fx: Fixtures):
+    from engine.batch_forecast import frames_from_csv
+    return lambda: frames_from_csv(fx.train_5min_path, windows=4)
+
+
+# ---------------------------------------------------------------- end to end
+
+@case("replay.replay[test_1min]", ops=0)
+def _replay(fx: Fixtures):
+    from core.replay import load_replay_frame, replay
+    frame = load_replay_frame(fx.test_1min_path)
+    return lambda: replay(frame)
+
+
+@case("replay.replay_vectorized[test_1min]", ops=0)
+def _replay_vectorized(fx: Fixtures):
+    from core.replay import load_replay_frame, replay_vectorized
+    frame = load_replay_frame(fx.test_1min_path)
+    return lambda: replay_vectorized(frame)
+
+
+# ---------------------------------------------------------------- runner
+
+def time_case(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Seconds per call over `repeat` auto-ranged samples."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= MIN_SAMPLE_TIME:
+            break
+        number = max(number * 2, int(number * MIN_SAMPLE_TIME / max(elapsed, 1e-9) * 1.2))
+    # The calibration run counts as the first sample
+    samples = [elapsed / number] + [t / number for t in timer.repeat(repeat - 1, number)]
+    return {"min": min(samples), "median": statistics.median(samples), "mean": statistics.fmean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0, "number": number, "repeat": len(samples)}
+
+
+def run(cases: List[Case], repeat: int) -> Dict[str, Dict]:
+    fx = Fixtures()
+    results = {}
+    for c in cases:
+        fn = c.setup(fx)
+        if fn is None:
+            print(f"{c.name:<56} skipped (fixture unavailable)")
+            continue
+        ops = c.ops or len(fx.test_1min)
+        stats = time_case(fn, repeat)
+        stats["ops"] = ops
+        stats["per_op"] = stats["median"] / ops
+        results[c.name] = stats
+        per_op = f"  {stats['per_op'] * 1e6:10.3f} us/op" if ops > 1 else ""
+        print(f"{c.name:<56} {_fmt(stats['median'])} ±{stats['stdev'] / stats['median'] * 100:4.1f}%{per_op}")
+    return results
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:9.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.3f} ms"
+    return f"{seconds * 1e6:9.3f} us"
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata() -> Dict[str, object]:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "seed": SEED,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline_path: str, threshold: float) -> List[str]:
+    """Prints median ratios against `baseline_path`; returns the cases slower than `threshold`."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    base_results = baseline["results"]
+    print(f"\nvs {os.path.basename(baseline_path)} (commit {str(baseline['meta'].get('commit'))[:10]}):")
+    regressions = []
+    for name, stats in results.items():
+        if name not in base_results:
+            print(f"  {name:<56} new")
+            continue
+        ratio = stats["median"] / base_results[name]["median"]
+        flag = ""
+        if ratio > threshold:
+            flag = "REGRESSION"
+            regressions.append(f"{name}: {ratio:.2f}x slower")
+        elif ratio < 1 / threshold:
+            flag = "faster"
+        print(f"  {name:<56} {ratio:6.2f}x  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per case (median is reported)")
+    parser.add_argument("--out", help="Results JSON (default benchmarks/results/<commit>[-<filter>].json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    args = parser.parse_args()
+
+    cases = [c for c in CASES if args.filter in c.name]
+    if args.list:
+        print("\n".join(c.name for c in cases))
+        return
+
+    t0 = time.perf_counter()
+    results = run(cases, args.repeat)
+    meta = metadata()
+    out = args.out
+    if not out:
+        name = (meta["commit"] or "unknown")[:12]
+        if args.filter:
+            name += "-" + re.sub(r"[^\w.-]+", "_", args.filter)
+        out = os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n{len(results)} cases in {time.perf_counter() - t0:.1f} s -> {os.path.relpath(out, ROOT)}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print("\nFAILED, slower than baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ AWS_DARK_BG = "#16191f"
 # --- Simulation Settings ---
 SIMULATION_SPEED_DEFAULT = 0.5  # seconds per tick
 SIMULATION_STEPS = 200
+HISTORY_WINDOW = 60  # Points kept in the dashboard's live history
+MAX_CHART_POINTS = 500  # Per-trace point budget before charts are downsampled
 
 # --- Autoscaling Parameters ---
 DEFAULT_SCALE_OUT_THRESHOLD = 150  # req/min
@@ -22,10 +24,18 @@ MIN_REPLICAS = 1
 MAX_REPLICAS = 20
 INITIAL_REPLICAS = 5
 FIXED_REPLICAS = 10
+# Forecast quantile sized for when the autoscaler gets quantile forecasts
+CAPACITY_QUANTILE = 0.9
 
 # --- Cost Model ---
 COST_PER_REPLICA_PER_TICK = 0.1 # Currency unit
 
+# --- MPC Policy (core.mpc) ---
+MPC_HORIZON = 15             # forecast steps planned over
+MPC_BOOT_DELAY = 2           # ticks before a new replica serves traffic
+MPC_TARGET_UTILIZATION = 0.8 # planned load / capacity ceiling
+MPC_ACTION_PENALTY = 0.3     # cost of one scaling action (currency units)
+
 # --- Anomaly Detection ---
 ANOMALY_SPIKE_MULTIPLIER = 1.5
 ANOMALY_DROP_MULTIPLIER = 0.5
@@ -35,3 +45,12 @@ ANOMALY_DROP_THRESHOLD = 30
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 MODEL_DIR = os.path.join(BASE_DIR, "models")  # Fix: models/ not data/models/
+
+# --- Model Cache ---
+MODEL_CACHE_BUDGET_MB = 512  # Estimated in-memory size kept by engine.loader.MODEL_REGISTRY
+
+# --- Forecast Cache (engine.forecast_cache) ---
+FORECAST_CACHE_SIZE = 4096   # Forecasts kept in memory (LRU)
+FORECAST_CACHE_TTL = 900     # seconds
+# Directory shared between processes; unset keeps the cache in memory only
+FORECAST_CACHE_DIR = os.environ.get("PLANORA_FORECAST_CACHE_DIR") or None
@@ -1,2 +1,3 @@
-from .autoscaler import Autoscaler
-from .anomaly import AnomalyDetector
+from .autoscaler import Autoscaler, simulate
+from .mpc import MPCAutoscaler, plan_replicas
+from .anomaly import AnomalyDetector, AnomalyDetectorBank, StreamingAnomalyDetector, detect_batch
@@ -1,8 +1,17 @@
-import config
+import math
+from array import array
+from typing import Optional, Tuple
 
 import numpy as np
 import config
 
+# Label codes shared by every detector implementation (index into LABELS).
+NORMAL, SPIKE, DROP, HIGH_LOAD = 0, 1, 2, 3
+LABELS = ("NORMAL", "DDoS / SPIKE DETECTED", "SUDDEN DROP DETECTED", "HIGH LOAD WARNING")
+
+# Minimum residuals in the window before a verdict other than NORMAL is possible.
+MIN_SAMPLES = 10
+
 class AnomalyDetector:
     def __init__(self, window_size=30):
         self.window_size = window_size
@@ -22,7 +31,7 @@ class AnomalyDetector:
             self.errors.pop(0)
             
         # Need enough data to compute stats
-        if len(self.errors) < 10:
+        if len(self.errors) < MIN_SAMPLES:
             return "NORMAL"
             
         # Compute Stats (Mean & StdDev of Residuals)
@@ -53,3 +62,278 @@ class AnomalyDetector:
             return "HIGH LOAD WARNING"
             
         return "NORMAL"
+
+    def detect_batch(self, actual: np.ndarray, forecast: np.ndarray) -> np.ndarray:
+        """
+        Vectorized replay of detect() over whole arrays, starting from an empty window.
+        Does not touch the detector state. Returns label codes (see LABELS).
+        """
+        return detect_batch(actual, forecast, window_size=self.window_size)
+
+
+def classify_z_score(z_score: float) -> int:
+    """Maps a residual Z-Score to a label code using the AnomalyDetector rules."""
+    if z_score > 3.0:
+        return SPIKE
+    if z_score < -3.0:
+        return DROP
+    if z_score > 2.0:
+        return HIGH_LOAD
+    return NORMAL
+
+
+class StreamingAnomalyDetector:
+    """
+    O(1)-per-tick equivalent of AnomalyDetector.
+
+    Residuals live in a preallocated ring buffer. Mean and variance come from
+    running sums taken relative to a shift value (to limit cancellation), and
+    the sums are recomputed exactly from the buffer every `resync_every` ticks
+    so rounding drift cannot accumulate.
+    """
+    def __init__(self, window_size=30, resync_every=None):
+        self.window_size = window_size
+        self.resync_every = resync_every or window_size
+        self._buf = array('d', bytes(8 * window_size))
+        self._cursor = 0
+        self._count = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._since_resync = 0
+        # Constant windows are tracked exactly so the std == 0 guard matches np.std
+        self._ticks = 0
+        self._last_change = 0
+        self._prev = math.nan
+
+    @property
+    def errors(self) -> np.ndarray:
+        """Residual window in arrival order (oldest first)."""
+        buf = np.frombuffer(self._buf)
+        if self._count < self.window_size:
+            return buf[:self._count].copy()
+        return np.roll(buf, -self._cursor)
+
+    def _resync(self):
+        window = np.frombuffer(self._buf)[:self._count] if self._count < self.window_size else np.frombuffer(self._buf)
+        self._shift = float(window.mean())
+        centered = window - self._shift
+        self._sum = float(centered.sum())
+        self._sumsq = float(centered @ centered)
+        self._since_resync = 0
+
+    def detect_code(self, current_load: float, forecast_load: float) -> int:
+        """Same verdict as detect(), returned as a label code."""
+        error = float(current_load - forecast_load)
+        buf = self._buf
+        i = self._cursor
+
+        if self._count == self.window_size:
+            old = buf[i] - self._shift
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self._count += 1
+
+        buf[i] = error
+        x = error - self._shift
+        self._sum += x
+        self._sumsq += x * x
+
+        i += 1
+        self._cursor = 0 if i == self.window_size else i
+
+        if error != self._prev:
+            self._last_change = self._ticks
+        self._prev = error
+        self._ticks += 1
+
+        self._since_resync += 1
+        if self._since_resync >= self.resync_every:
+            self._resync()
+
+        n = self._count
+        if n < MIN_SAMPLES:
+            return NORMAL
+
+        # Every residual in the window is identical -> np.std would be exactly 0
+        if self._ticks - self._last_change >= n:
+            return NORMAL
+
+        mean_shifted = self._sum / n
+        var = self._sumsq / n - mean_shifted * mean_shifted
+        std_error = math.sqrt(var) if var > 0 else 1.0
+
+        return classify_z_score((error - self._shift - mean_shifted) / std_error)
+
+    def detect(self, current_load: float, forecast_load: float) -> str:
+        """
+        Stateful Z-Score detection with the same rules as AnomalyDetector.detect.
+        """
+        return LABELS[self.detect_code(current_load, forecast_load)]
+
+
+class AnomalyDetectorBank:
+    """
+    Many residual streams (one per endpoint/service) in a single
+    (n_streams, window_size) float64 array with per-stream cursors.
+
+    update() advances every stream by one tick with vectorized running
+    sums and returns per-stream Z-Scores and label codes. Verdicts per stream
+    match an independent AnomalyDetector fed the same residuals.
+    """
+    def __init__(self, n_streams: int, window_size: int = 30, resync_every: Optional[int] = None):
+        self.n_streams = n_streams
+        self.window_size = window_size
+        self.resync_every = resync_every or window_size
+        self.errors = np.zeros((n_streams, window_size))
+        self.cursors = np.zeros(n_streams, dtype=np.intp)
+        self.counts = np.zeros(n_streams, dtype=np.intp)
+        self._rows = np.arange(n_streams)
+        self._shift = np.zeros(n_streams)
+        self._sum = np.zeros(n_streams)
+        self._sumsq = np.zeros(n_streams)
+        self._since_resync = np.zeros(n_streams, dtype=np.intp)
+        self._ticks = np.zeros(n_streams, dtype=np.int64)
+        self._last_change = np.zeros(n_streams, dtype=np.int64)
+        self._prev = np.full(n_streams, np.nan)
+
+    def _resync(self, rows: np.ndarray):
+        window = self.errors[rows]
+        filled = np.arange(self.window_size) < self.counts[rows, None]
+        counts = self.counts[rows]
+        shift = np.where(filled, window, 0.0).sum(axis=1) / counts
+        centered = np.where(filled, window - shift[:, None], 0.0)
+        self._shift[rows] = shift
+        self._sum[rows] = centered.sum(axis=1)
+        self._sumsq[rows] = np.einsum('ij,ij->i', centered, centered)
+        self._since_resync[rows] = 0
+
+    def update(self, actual: np.ndarray, forecast: np.ndarray,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pushes one residual per stream. `actual`/`forecast` have length n_streams;
+        `mask` optionally restricts the tick to a subset of streams.
+
+        Returns (z_scores, codes), both of length n_streams. Streams still in
+        warm-up or not updated this tick get NaN / NORMAL.
+        """
+        rows = self._rows if mask is None else np.flatnonzero(mask)
+        error = np.asarray(actual, dtype=float)[rows] - np.asarray(forecast, dtype=float)[rows]
+        shift = self._shift[rows]
+
+        cur = self.cursors[rows]
+        full = self.counts[rows] == self.window_size
+        old = np.where(full, self.errors[rows, cur] - shift, 0.0)
+        self._sum[rows] -= old
+        self._sumsq[rows] -= old * old
+        self.counts[rows] += ~full
+
+        self.errors[rows, cur] = error
+        x = error - shift
+        self._sum[rows] += x
+        self._sumsq[rows] += x * x
+        cur += 1
+        cur[cur == self.window_size] = 0
+        self.cursors[rows] = cur
+
+        ticks = self._ticks[rows]
+        self._last_change[rows] = np.where(error != self._prev[rows], ticks, self._last_change[rows])
+        self._prev[rows] = error
+        self._ticks[rows] = ticks + 1
+
+        self._since_resync[rows] += 1
+        due = rows[self._since_resync[rows] >= self.resync_every]
+        if len(due):
+            self._resync(due)
+
+        n = self.counts[rows]
+        mean_shifted = self._sum[rows] / n
+        var = self._sumsq[rows] / n - mean_shifted * mean_shifted
+        std = np.sqrt(np.maximum(var, 0.0))
+        std[std == 0] = 1.0
+        z_rows = (error - self._shift[rows] - mean_shifted) / std
+        # Constant window -> np.std == 0 -> residual equals the mean
+        z_rows[self._ticks[rows] - self._last_change[rows] >= n] = 0.0
+        z_rows[n < MIN_SAMPLES] = np.nan
+
+        z = np.full(self.n_streams, np.nan)
+        z[rows] = z_rows
+        return z, classify_z_scores(z)
+
+
+# Z-Scores this close to a rule threshold are recomputed exactly in detect_batch
+_THRESHOLD_TOL = 1e-6
+
+
+def classify_z_scores(z_scores: np.ndarray) -> np.ndarray:
+    """Vectorized classify_z_score. NaN (warm-up) maps to NORMAL."""
+    z = np.asarray(z_scores, dtype=float)
+    return np.select([z > 3.0, z < -3.0, z > 2.0], [SPIKE, DROP, HIGH_LOAD], NORMAL).astype(np.int8)
+
+
+def _exact_z_score(errors: np.ndarray, i: int, window_size: int) -> float:
+    """Per-tick AnomalyDetector arithmetic for the window ending at i."""
+    window = errors[max(0, i + 1 - window_size):i + 1]
+    std_error = np.std(window)
+    if std_error == 0:
+        std_error = 1
+    return (errors[i] - np.mean(window)) / std_error
+
+
+def rolling_z_scores(actual: np.ndarray, forecast: np.ndarray, window_size: int = 30) -> np.ndarray:
+    """
+    Z-Score of every residual against the trailing window that includes it,
+    exactly as AnomalyDetector.detect would compute tick by tick.
+    Warm-up ticks (fewer than MIN_SAMPLES residuals) are NaN.
+
+    Uses centered cumulative sums; windows where rounding could flip a verdict
+    (Z-Score next to a threshold, or near-zero variance) are recomputed exactly.
+    """
+    errors = np.asarray(actual, dtype=float) - np.asarray(forecast, dtype=float)
+    n = len(errors)
+    z = np.full(n, np.nan)
+    if n == 0:
+        return z
+
+    counts = np.minimum(np.arange(1, n + 1), window_size)
+    starts = np.arange(1, n + 1) - counts
+
+    centered = errors - errors.mean()
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    csq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    ends = np.arange(1, n + 1)
+    mean = (csum[ends] - csum[starts]) / counts
+    var = (csq[ends] - csq[starts]) / counts - mean * mean
+
+    # A window is constant iff no residual inside it differs from its predecessor
+    changes = np.concatenate(([0], np.cumsum(errors[1:] != errors[:-1])))
+    constant = changes[ends - 1] == changes[starts]
+
+    std = np.sqrt(np.maximum(var, 0.0))
+    std[(std == 0) | constant] = 1.0
+    z_fast = (centered - mean) / std
+    z_fast[constant] = 0.0
+
+    valid = counts >= MIN_SAMPLES
+    z[valid] = z_fast[valid]
+
+    # Exact fallback where the cumulative-sum estimate is not trustworthy
+    tol = _THRESHOLD_TOL * np.maximum(1.0, np.abs(z))
+    near = np.zeros(n, dtype=bool)
+    for threshold in (3.0, -3.0, 2.0):
+        near |= np.abs(z - threshold) <= tol
+    near |= valid & ~constant & (var <= 1e-9 * max(float(np.mean(centered * centered)), 1e-300))
+    for i in np.flatnonzero(near & valid):
+        z[i] = _exact_z_score(errors, i, window_size)
+
+    return z
+
+
+def detect_batch(actual: np.ndarray, forecast: np.ndarray, window_size: int = 30) -> np.ndarray:
+    """
+    Label codes for a whole series in one vectorized pass.
+    Identical to calling AnomalyDetector(window_size).detect tick by tick
+    (including the MIN_SAMPLES warm-up and the std == 0 guard).
+    """
+    return classify_z_scores(rolling_z_scores(actual, forecast, window_size))
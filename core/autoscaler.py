@@ -1,23 +1,46 @@
 import math
-from typing import Tuple
+from typing import Dict, NamedTuple, Sequence, Tuple, Union
+import numpy as np
 import config
 
+# Action codes used by simulate() (index into ACTIONS).
+ACTION_STABLE, ACTION_SCALE_OUT, ACTION_SCALE_IN, ACTION_COOLDOWN = 0, 1, 2, 3
+ACTIONS = ("STABLE", "SCALE OUT", "SCALE IN", "COOLDOWN")
+
+def select_quantile(forecast, q: float):
+    """
+    `forecast` unchanged, or for a {quantile: forecast} mapping (see
+    BasePredictor.predict_quantiles) the entry whose quantile is closest to `q`.
+    """
+    if isinstance(forecast, dict):
+        return forecast[min(forecast, key=lambda k: abs(k - q))]
+    return forecast
+
 class Autoscaler:
-    def __init__(self, min_servers=config.MIN_REPLICAS, max_servers=config.MAX_REPLICAS):
+    def __init__(self, min_servers=config.MIN_REPLICAS, max_servers=config.MAX_REPLICAS,
+                 quantile: float = config.CAPACITY_QUANTILE):
         self.cooldown_counter = 0
         self.last_action = "NONE"
         self.min_servers = min_servers
         self.max_servers = max_servers
         self.capacity_per_replica = config.DEFAULT_SCALE_OUT_THRESHOLD
+        # Risk-aware mode: quantile forecasts are sized at this quantile
+        self.quantile = quantile
 
-    def calculate_replicas(self, current_load: float, forecast_load: float, current_replicas: int) -> Tuple[int, str, float]:
+    def calculate_replicas(self, current_load: float, forecast_load: Union[float, Dict[float, Sequence[float]]],
+                           current_replicas: int) -> Tuple[int, str, float]:
         """
         Calculates required replicas using 3-Layer Defense Strategy.
         current_replicas: Needed for Rule-based layer (Cooldown).
+        forecast_load: a point forecast, or predict_quantiles() output to size
+        for the `quantile` of the first step.
         
         Returns: (num_replicas, reason, estimated_cost)
         """
         reason = []
+        if isinstance(forecast_load, dict):
+            forecast_load = select_quantile(forecast_load, self.quantile)[0]
+            reason.append(f"Q{self.quantile:g}")
         
         # ─────────────────────────────────────────────────────────────
         # LAYER 1: PREDICTIVE (Attack) - Proactive Scaling
@@ -89,3 +112,86 @@ class Autoscaler:
         }
         
         return target_replicas, final_reason, cost, details
+
+    def simulate(self, loads: np.ndarray, forecasts: np.ndarray, initial_replicas: int = config.INITIAL_REPLICAS) -> "SimulationResult":
+        """
+        Headless replay of calculate_replicas over whole arrays with this
+        autoscaler's bounds and capacity, continuing from its cooldown state.
+        The final cooldown is written back, as if calculate_replicas had run.
+        """
+        result = simulate(
+            loads, forecasts, initial_replicas,
+            min_servers=self.min_servers,
+            max_servers=self.max_servers,
+            capacity_per_replica=self.capacity_per_replica,
+            initial_cooldown=self.cooldown_counter,
+        )
+        if len(result.replicas):
+            self.cooldown_counter = int(result.cooldown[-1])
+            self.last_action = ACTIONS[result.actions[-1]]
+        return result
+
+
+class SimulationResult(NamedTuple):
+    replicas: np.ndarray   # int64, replicas after each tick's decision
+    actions: np.ndarray    # int8 action codes (see ACTIONS)
+    cooldown: np.ndarray   # int64, cooldown counter after each tick
+    cost: np.ndarray       # float64, replicas * COST_PER_REPLICA_PER_TICK
+
+
+def simulate(loads: np.ndarray, forecasts: np.ndarray, initial_replicas: int = config.INITIAL_REPLICAS,
+             min_servers: int = config.MIN_REPLICAS, max_servers: int = config.MAX_REPLICAS,
+             capacity_per_replica: float = config.DEFAULT_SCALE_OUT_THRESHOLD,
+             cooldown_period: int = config.DEFAULT_COOLDOWN_PERIOD,
+             initial_cooldown: int = 0) -> SimulationResult:
+    """
+    Replays the 3-Layer Defense logic of Autoscaler.calculate_replicas over a
+    whole trace, feeding each tick's replicas into the next one.
+
+    Layers 1-2 and the bounds do not depend on state, so they are computed for
+    every tick at once. Only the cooldown state machine runs sequentially, as
+    a tight loop over plain ints (no strings, dicts or per-tick allocation).
+    """
+    loads = np.asarray(loads, dtype=float)
+    forecasts = np.asarray(forecasts, dtype=float)
+
+    # LAYER 1 + 2: predictive ceil, reactive override (max of the two)
+    predictive = np.ceil(forecasts / capacity_per_replica)
+    reactive = np.ceil(loads / capacity_per_replica)
+    targets = np.maximum(predictive, reactive)
+    # LAYER 3a: bounds
+    targets = np.minimum(np.maximum(targets, min_servers), max_servers).astype(np.int64)
+
+    n = len(targets)
+    out_replicas = [0] * n
+    out_actions = [0] * n
+    out_cooldown = [0] * n
+
+    # LAYER 3b: cooldown state machine
+    current = int(initial_replicas)
+    counter = int(initial_cooldown)
+    for i, target in enumerate(targets.tolist()):
+        if target > current:
+            current = target
+            counter = cooldown_period
+            action = ACTION_SCALE_OUT
+        elif target < current:
+            if counter > 0:
+                counter -= 1
+                action = ACTION_COOLDOWN
+            else:
+                current = target
+                counter = cooldown_period
+                action = ACTION_SCALE_IN
+        else:
+            if counter > 0:
+                counter -= 1
+            action = ACTION_STABLE
+        out_replicas[i] = current
+        out_actions[i] = action
+        out_cooldown[i] = counter
+
+    replicas = np.array(out_replicas, dtype=np.int64)
+    actions = np.array(out_actions, dtype=np.int8)
+    cooldown = np.array(out_cooldown, dtype=np.int64)
+    return SimulationResult(replicas, actions, cooldown, replicas * config.COST_PER_REPLICA_PER_TICK)
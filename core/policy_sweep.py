@@ -0,0 +1,165 @@
+"""
+Offline parameter sweep for the 3-Layer autoscaler policy.
+
+Evaluates a grid (or a random sample of it) of capacity / cooldown /
+min / max replica settings with core.autoscaler.simulate over real traffic
+from data/train_*.csv. The load and forecast arrays are placed once in
+shared memory and attached read-only by every worker of a process pool, so
+each task only ships a small parameter dict.
+
+Usage:
+    python -m core.policy_sweep --resolution 5min [--samples 200] [--workers 8] [--out sweep.csv]
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from core.autoscaler import ACTION_SCALE_IN, ACTION_SCALE_OUT, simulate
+
+DEFAULT_GRID = {
+    "capacity_per_replica": [100, 125, 150, 175, 200, 250],
+    "cooldown_period": [0, 1, 3, 5, 10, 15],
+    "min_servers": [1, 2, 3, 5],
+    "max_servers": [10, 20, 30, 50],
+}
+
+# Worker-side views on the shared trace (set by _attach_trace)
+_SHM = None
+_LOADS = None
+_FORECASTS = None
+
+
+def load_trace(resolution: str = "5min", column: str = "request_count",
+               forecast_csv: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    With `forecast_csv`, loads and forecasts are its 'actual' and 'predicted'
+    columns. Otherwise loads come from data/train_<resolution>.csv and
+    forecasts from the naive last-value forecast used by NaivePredictor.
+    """
+    if forecast_csv:
+        pred = pd.read_csv(forecast_csv)
+        return pred["actual"].to_numpy(dtype=float), pred["predicted"].to_numpy(dtype=float)
+
+    df = pd.read_csv(os.path.join(config.DATA_DIR, f"train_{resolution}.csv"))
+    loads = df[column].to_numpy(dtype=float)
+    forecasts = np.concatenate((loads[:1], loads[:-1]))
+    return loads, forecasts
+
+
+def expand_grid(grid: Dict[str, Sequence], samples: Optional[int] = None, seed: int = 42) -> List[Dict]:
+    """Cartesian product of `grid` (invalid min > max combos dropped), optionally randomly sampled."""
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    combos = [c for c in combos if c.get("min_servers", config.MIN_REPLICAS) <= c.get("max_servers", config.MAX_REPLICAS)]
+    if samples and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+def _attach_trace(shm_name: str, n: int):
+    global _SHM, _LOADS, _FORECASTS
+    # Workers share the parent's resource tracker, so the segment is unlinked once, by the parent
+    _SHM = shared_memory.SharedMemory(name=shm_name)
+    trace = np.ndarray((2, n), dtype=np.float64, buffer=_SHM.buf)
+    trace.flags.writeable = False
+    _LOADS, _FORECASTS = trace[0], trace[1]
+
+
+def evaluate_policy(params: Dict, loads: np.ndarray, forecasts: np.ndarray,
+                    sla_capacity: float = config.DEFAULT_SCALE_OUT_THRESHOLD) -> Dict:
+    """
+    Replays one policy and summarizes it. A tick is under-provisioned when the
+    replicas after the decision cannot serve the actual load at `sla_capacity`
+    requests per replica.
+    """
+    initial = min(max(config.INITIAL_REPLICAS, params.get("min_servers", config.MIN_REPLICAS)),
+                  params.get("max_servers", config.MAX_REPLICAS))
+    result = simulate(loads, forecasts, initial, **params)
+    actions = result.actions
+    return {
+        **params,
+        "cost": float(result.cost.sum()),
+        "under_provisioned_ticks": int(np.count_nonzero(result.replicas * sla_capacity < loads)),
+        "scaling_actions": int(np.count_nonzero((actions == ACTION_SCALE_OUT) | (actions == ACTION_SCALE_IN))),
+        "mean_replicas": float(result.replicas.mean()),
+    }
+
+
+def _evaluate_shared(args):
+    params, sla_capacity = args
+    return evaluate_policy(params, _LOADS, _FORECASTS, sla_capacity)
+
+
+def pareto_front(results: pd.DataFrame,
+                 objectives: Iterable[str] = ("cost", "under_provisioned_ticks", "scaling_actions")) -> pd.DataFrame:
+    """Rows not dominated on `objectives` (all minimized)."""
+    values = results[list(objectives)].to_numpy(dtype=float)
+    keep = np.ones(len(values), dtype=bool)
+    for i, row in enumerate(values):
+        dominated = np.all(values <= row, axis=1) & np.any(values < row, axis=1)
+        keep[i] = not dominated.any()
+    return results[keep].sort_values(list(objectives)).reset_index(drop=True)
+
+
+def run_sweep(loads: np.ndarray, forecasts: np.ndarray, combos: List[Dict],
+              workers: Optional[int] = None,
+              sla_capacity: float = config.DEFAULT_SCALE_OUT_THRESHOLD) -> pd.DataFrame:
+    """Evaluates every policy in `combos` across a process pool sharing one copy of the trace."""
+    n = len(loads)
+    workers = workers or os.cpu_count() or 1
+    shm = shared_memory.SharedMemory(create=True, size=max(2 * n * 8, 1))
+    try:
+        trace = np.ndarray((2, n), dtype=np.float64, buffer=shm.buf)
+        trace[0], trace[1] = loads, forecasts
+        chunksize = max(1, len(combos) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_trace, initargs=(shm.name, n)) as pool:
+            rows = list(pool.map(_evaluate_shared, [(c, sla_capacity) for c in combos], chunksize=chunksize))
+        del trace
+    finally:
+        shm.close()
+        shm.unlink()
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", default="5min", choices=["5min", "15min"], help="Train CSV resolution")
+    parser.add_argument("--column", default="request_count", help="Load column")
+    parser.add_argument("--forecast-csv", help="Predictions CSV (actual/predicted) to use instead of the naive forecast")
+    parser.add_argument("--samples", type=int, help="Random sample size from the grid (default: full grid)")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: all cores)")
+    parser.add_argument("--sla-capacity", type=float, default=config.DEFAULT_SCALE_OUT_THRESHOLD,
+                        help="Real requests per replica used to count under-provisioned ticks")
+    parser.add_argument("--out", help="Write all results to this CSV")
+    args = parser.parse_args()
+
+    loads, forecasts = load_trace(args.resolution, args.column, args.forecast_csv)
+    combos = expand_grid(DEFAULT_GRID, args.samples)
+
+    t0 = time.perf_counter()
+    results = run_sweep(loads, forecasts, combos, args.workers, args.sla_capacity)
+    elapsed = time.perf_counter() - t0
+
+    print(f"Evaluated {len(results)} policies over {len(loads):,} ticks in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f} policies/s)")
+    front = pareto_front(results)
+    with pd.option_context("display.max_rows", 50, "display.width", 160):
+        print(f"\nPareto frontier ({len(front)} policies):")
+        print(front.to_string(index=False))
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"\nSaved results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Headless replay of the dashboard loop.
+
+Runs the same per-tick pipeline as app.py's update() - TimeTraveler ->
+forecast -> Autoscaler.calculate_replicas -> anomaly detection - over a
+data/test_*.csv or a predictions CSV, without Streamlit, sleeps or reruns.
+Every decision is written to a columnar .npz (one array per column; .csv
+also accepted), and the run prints throughput, per-stage latency and the
+cost / SLA summary used by core.policy_sweep.
+
+Raw data CSVs have no forecast column, so like the dashboard the forecast
+defaults to the actual load (--forecast naive uses the previous tick instead).
+--vectorized replays the whole trace with core.autoscaler.simulate and
+core.anomaly.detect_batch, which produce the same decisions.
+
+Usage:
+    python -m core.replay data/test_5min.csv [--out replay.npz] [--forecast naive]
+    python -m core.replay models/result_lstm/5min_request_count/LSTM/predictions.csv [--vectorized]
+"""
+import argparse
+import time
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+from core.anomaly import LABELS, StreamingAnomalyDetector, detect_batch
+from core.autoscaler import ACTION_SCALE_IN, ACTION_SCALE_OUT, ACTIONS, Autoscaler, simulate
+from utils.csv_cache import read_csv as read_csv_cached
+from utils.simulation import TimeTraveler
+
+STAGES = ("tick", "forecast", "scale", "anomaly")
+
+# Column names used by the predictions CSVs -> the names app.py works with
+COLUMN_ALIASES = {
+    "actual": "requests",
+    "predicted": "forecast",
+    "hybrid_pred": "forecast",
+    "ds": "timestamp",
+    "y": "requests",
+    "yhat": "forecast",
+    "request_count": "requests",
+}
+
+_ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+
+class ReplayResult(NamedTuple):
+    decisions: pd.DataFrame           # one row per tick
+    elapsed: float                    # wall time of the replay loop, seconds
+    stage_ns: Dict[str, np.ndarray]   # per-tick latency of each stage (vectorized: one total per stage)
+
+
+def load_replay_frame(path: str, forecast: str = "actual") -> pd.DataFrame:
+    """
+    Reads a data or predictions CSV into 'timestamp', 'requests', 'forecast'
+    columns, renamed the way app.py's loaders do. When the file has no
+    forecast, `forecast` selects 'actual' (dashboard default) or 'naive'.
+    """
+    df = read_csv_cached(path)
+    if "timestamp" not in df.columns and "ds" not in df.columns:
+        df = df.rename(columns={df.columns[0]: "timestamp"})
+    df = df.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if k in df.columns and v not in df.columns})
+    if "requests" not in df.columns:
+        raise ValueError(f"{path}: no requests/actual/request_count column")
+
+    requests = df["requests"].to_numpy(dtype=float)
+    if "forecast" in df.columns:
+        forecasts = df["forecast"].to_numpy(dtype=float)
+    elif forecast == "naive":
+        forecasts = np.concatenate((requests[:1], requests[:-1]))
+    else:
+        forecasts = requests.copy()
+    return pd.DataFrame({"timestamp": pd.to_datetime(df["timestamp"]), "requests": requests, "forecast": forecasts})
+
+
+def replay(frame: pd.DataFrame, min_servers: int = config.MIN_REPLICAS, max_servers: int = config.MAX_REPLICAS,
+           initial_replicas: int = config.INITIAL_REPLICAS, window_size: int = 30,
+           limit: Optional[int] = None) -> ReplayResult:
+    """
+    Tick-by-tick replay with the dashboard's objects, timing each stage.
+    Allocates the output columns up front; nothing per tick beyond what
+    calculate_replicas itself builds.
+    """
+    sim = TimeTraveler(frame)
+    requests_col, forecast_col = sim.arrays["requests"], sim.arrays["forecast"]
+    autoscaler = Autoscaler(min_servers=min_servers, max_servers=max_servers)
+    detector = StreamingAnomalyDetector(window_size=window_size)
+
+    n = min(limit, sim.max_steps) if limit else sim.max_steps
+    replicas_out = np.empty(n, dtype=np.int64)
+    actions_out = np.empty(n, dtype=np.int8)
+    cooldown_out = np.empty(n, dtype=np.int64)
+    anomaly_out = np.empty(n, dtype=np.int8)
+    stage_ns = {stage: np.empty(n, dtype=np.int64) for stage in STAGES}
+    t_tick, t_forecast, t_scale, t_anomaly = (stage_ns[s] for s in STAGES)
+
+    clock = time.perf_counter_ns
+    current = initial_replicas
+    t0 = time.perf_counter()
+    for i in range(n):
+        a = clock()
+        step = sim.advance()
+        curr_req = requests_col[step]
+        b = clock()
+        fcast = forecast_col[step]
+        c = clock()
+        current, _, _, details = autoscaler.calculate_replicas(curr_req, fcast, current)
+        d = clock()
+        anomaly_out[i] = detector.detect_code(curr_req, fcast)
+        e = clock()
+
+        replicas_out[i] = current
+        actions_out[i] = _ACTION_CODES[details["action"]]
+        cooldown_out[i] = details["cooldown"]
+        t_tick[i] = b - a
+        t_forecast[i] = c - b
+        t_scale[i] = d - c
+        t_anomaly[i] = e - d
+    elapsed = time.perf_counter() - t0
+
+    decisions = _decisions(frame.iloc[:n], replicas_out, actions_out, cooldown_out, anomaly_out)
+    return ReplayResult(decisions, elapsed, stage_ns)
+
+
+def replay_vectorized(frame: pd.DataFrame, min_servers: int = config.MIN_REPLICAS,
+                      max_servers: int = config.MAX_REPLICAS, initial_replicas: int = config.INITIAL_REPLICAS,
+                      window_size: int = 30, limit: Optional[int] = None) -> ReplayResult:
+    """Same decisions as replay(), computed over the whole trace at once."""
+    frame = frame.iloc[:limit] if limit else frame
+    clock = time.perf_counter_ns
+    t0 = time.perf_counter()
+    a = clock()
+    loads = frame["requests"].to_numpy(dtype=float)
+    b = clock()
+    forecasts = frame["forecast"].to_numpy(dtype=float)
+    c = clock()
+    result = simulate(loads, forecasts, initial_replicas, min_servers=min_servers, max_servers=max_servers)
+    d = clock()
+    anomalies = detect_batch(loads, forecasts, window_size)
+    e = clock()
+    elapsed = time.perf_counter() - t0
+
+    stage_ns = {stage: np.array([ns]) for stage, ns in zip(STAGES, (b - a, c - b, d - c, e - d))}
+    decisions = _decisions(frame, result.replicas, result.actions, result.cooldown, anomalies.astype(np.int8))
+    return ReplayResult(decisions, elapsed, stage_ns)
+
+
+def _decisions(frame: pd.DataFrame, replicas, actions, cooldown, anomalies) -> pd.DataFrame:
+    return pd.DataFrame({
+        "timestamp": frame["timestamp"].to_numpy(),
+        "requests": frame["requests"].to_numpy(dtype=float),
+        "forecast": frame["forecast"].to_numpy(dtype=float),
+        "replicas": replicas,
+        "action": actions,
+        "cooldown": cooldown,
+        "cost": replicas * config.COST_PER_REPLICA_PER_TICK,
+        "anomaly": anomalies,
+    })
+
+
+def summarize(decisions: pd.DataFrame, sla_capacity: float = config.DEFAULT_SCALE_OUT_THRESHOLD) -> Dict:
+    """Cost / SLA metrics with the same definitions as core.policy_sweep.evaluate_policy."""
+    replicas = decisions["replicas"].to_numpy()
+    actions = decisions["action"].to_numpy()
+    under = replicas * sla_capacity < decisions["requests"].to_numpy()
+    return {
+        "ticks": len(decisions),
+        "cost": float(decisions["cost"].sum()),
+        "under_provisioned_ticks": int(np.count_nonzero(under)),
+        "sla_violation_rate": float(under.mean()) if len(under) else 0.0,
+        "scaling_actions": int(np.count_nonzero((actions == ACTION_SCALE_OUT) | (actions == ACTION_SCALE_IN))),
+        "mean_replicas": float(replicas.mean()) if len(replicas) else 0.0,
+        "anomalies": int(np.count_nonzero(decisions["anomaly"].to_numpy())),
+    }
+
+
+def write_decisions(decisions: pd.DataFrame, path: str):
+    """One array per column in an .npz (label tables included), or a plain CSV with labels."""
+    if path.endswith(".csv"):
+        out = decisions.copy()
+        out["action"] = np.asarray(ACTIONS)[out["action"].to_numpy()]
+        out["anomaly"] = np.asarray(LABELS)[out["anomaly"].to_numpy()]
+        out.to_csv(path, index=False)
+        return
+    columns = {col: decisions[col].to_numpy() for col in decisions.columns}
+    np.savez(path, action_labels=np.asarray(ACTIONS), anomaly_labels=np.asarray(LABELS), **columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", help="data/test_*.csv or a predictions CSV")
+    parser.add_argument("--out", default="replay.npz", help="Decisions file (.npz, or .csv)")
+    parser.add_argument("--forecast", default="actual", choices=["actual", "naive"],
+                        help="Forecast to use when the CSV has none")
+    parser.add_argument("--min-replicas", type=int, default=config.MIN_REPLICAS)
+    parser.add_argument("--max-replicas", type=int, default=config.MAX_REPLICAS)
+    parser.add_argument("--sla-capacity", type=float, default=config.DEFAULT_SCALE_OUT_THRESHOLD,
+                        help="Requests one replica can serve within SLA")
+    parser.add_argument("--limit", type=int, help="Replay only the first N ticks")
+    parser.add_argument("--vectorized", action="store_true", help="Whole-trace simulate/detect_batch instead of per tick")
+    args = parser.parse_args()
+
+    frame = load_replay_frame(args.csv, args.forecast)
+    run = replay_vectorized if args.vectorized else replay
+    result = run(frame, min_servers=args.min_replicas, max_servers=args.max_replicas, limit=args.limit)
+    write_decisions(result.decisions, args.out)
+
+    n = len(result.decisions)
+    print(f"{n} ticks in {result.elapsed * 1000:.1f} ms ({n / max(result.elapsed, 1e-9):,.0f} ticks/s) -> {args.out}")
+    for stage, ns in result.stage_ns.items():
+        if not n:
+            break
+        if args.vectorized:
+            print(f"  {stage:<9} total {ns.sum() / 1e6:8.2f} ms  ({ns.sum() / max(n, 1) / 1e3:.2f} us/tick)")
+        else:
+            print(f"  {stage:<9} mean {ns.mean() / 1e3:7.2f} us  p50 {np.percentile(ns, 50) / 1e3:7.2f} us"
+                  f"  p99 {np.percentile(ns, 99) / 1e3:7.2f} us")
+    summary = summarize(result.decisions, args.sla_capacity)
+    print(f"cost {summary['cost']:.2f} | under-provisioned {summary['under_provisioned_ticks']} ticks "
+          f"({summary['sla_violation_rate']:.2%}) | scaling actions {summary['scaling_actions']} | "
+          f"mean replicas {summary['mean_replicas']:.2f} | anomalies {summary['anomalies']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,18 @@
-from .predictor_factory import PredictorFactory
-from .loader import ModelLoader
+import importlib
+
+# Resolved on first access so `import engine` (or any engine submodule)
+# does not pull in pandas/statsmodels/joblib up front.
+_EXPORTS = {
+    'PredictorFactory': '.predictor_factory',
+    'ModelLoader': '.loader',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
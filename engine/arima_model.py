@@ -1,9 +1,13 @@
 import numpy as np
 import pandas as pd
 import time
-from typing import List, Union, Tuple
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Union, Tuple
 import logging
 
+from core.anomaly import DROP, SPIKE, StreamingAnomalyDetector
+from .predictor_factory import DEFAULT_QUANTILES
+
 try:
     from statsmodels.tsa.arima.model import ARIMA
 except ImportError:
@@ -11,15 +15,102 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+MINUTES_PER_DAY = 1440
+MINUTES_PER_HOUR = 60
+
+
+def minute_bins(index: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray]:
+    """(minute_of_day, minute_of_hour) integer bins for every timestamp."""
+    if not isinstance(index, pd.DatetimeIndex):
+         index = pd.to_datetime(index)
+    minute = index.minute.to_numpy(dtype=np.intp)
+    return index.hour.to_numpy(dtype=np.intp) * 60 + minute, minute
+
+
+class SeasonalProfile:
+    """
+    Per-bin mean (minute of day / minute of hour) kept as fixed-size sum and
+    count arrays. Adding a point is O(1); with `window` set, the oldest point
+    is subtracted again once more than `window` points have been added.
+    Empty bins read as 0.
+    """
+    def __init__(self, n_bins: int, window: Optional[int] = None):
+        self.n_bins = n_bins
+        self.window = window
+        self.sums = np.zeros(n_bins)
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        # Ring buffer of the (bin, value) pairs currently counted, oldest at _start
+        size = window or 0
+        self._bins = np.zeros(size, dtype=np.intp)
+        self._values = np.zeros(size)
+        self._start = 0
+        self._count = 0
+
+    def _remove(self, bins: np.ndarray, values: np.ndarray):
+        np.subtract.at(self.sums, bins, values)
+        np.subtract.at(self.counts, bins, 1)
+        # Emptied bins restart from an exact 0 instead of rounding residue
+        self.sums[bins[self.counts[bins] == 0]] = 0.0
+
+    def extend(self, bins: np.ndarray, values: np.ndarray):
+        """Adds points (bin indices and values), evicting the oldest beyond `window`."""
+        bins = np.asarray(bins, dtype=np.intp)
+        values = np.asarray(values, dtype=float)
+        if self.window:
+            bins, values = bins[-self.window:], values[-self.window:]
+            k = len(values)
+            overflow = self._count + k - self.window
+            if overflow > 0:
+                old = (self._start + np.arange(overflow)) % self.window
+                self._remove(self._bins[old], self._values[old])
+                self._start = (self._start + overflow) % self.window
+                self._count -= overflow
+            pos = (self._start + self._count + np.arange(k)) % self.window
+            self._bins[pos] = bins
+            self._values[pos] = values
+            self._count += k
+        np.add.at(self.sums, bins, values)
+        np.add.at(self.counts, bins, 1)
+
+    def lookup(self, bins: np.ndarray) -> np.ndarray:
+        """Profile mean for each bin index."""
+        counts = self.counts[bins]
+        return np.where(counts > 0, self.sums[bins] / np.maximum(counts, 1), 0.0)
+
+
 class CustomARIMAPredictor:
     """
     Ported from '26.02.03_Build_Arima_3.ipynb'.
     Implements ARIMA with Log-Linear Amplitude Correction.
     Trains on-the-fly using the provided history window.
+
+    With `online=True` the fitted results are kept between calls. Observations
+    newer than the last one seen are run through the Kalman filter
+    (`results.extend`) with the parameters and scale held fixed, while the
+    seasonal profiles slide with the window. A full refit happens every `refit_every` new observations, when the
+    drift detector on the one-step residuals fires, or when the window does
+    not continue the previous one (gap, rewind, no timestamps).
     """
-    def __init__(self, order: Tuple[int, int, int] = (2, 1, 2), look_back: int = 1000):
+    def __init__(self, order: Tuple[int, int, int] = (2, 1, 2), look_back: int = 1000,
+                 online: bool = False, refit_every: int = 288, drift_window: int = 30):
         self.order = order
         self.look_back = look_back # Limit training data size for speed
+        self.online = online
+        self.refit_every = refit_every
+        self.drift_window = drift_window
+        self.n_refits = 0
+        self.reset()
+
+    def reset(self):
+        """Drops the online state; the next predict() refits from scratch."""
+        self._res = None
+        self._S_daily = None
+        self._S_short = None
+        self._std = None
+        self._freq = None
+        self._last_time = None
+        self._since_refit = 0
+        self._drift = None
     
     def build_peak_feature(self, index: pd.DatetimeIndex) -> np.ndarray:
         """
@@ -33,74 +124,30 @@ class CustomARIMAPredictor:
     def build_seasonal_profiles(self, series_log: pd.Series):
         """
         Builds daily and hourly seasonal profiles from log-transformed series.
+        Both keep their last `look_back` points so they can slide with the window.
         """
-        df = series_log.to_frame('y')
-        df['minute_of_day'] = df.index.hour * 60 + df.index.minute
-        df['minute_of_hour'] = df.index.minute
+        md, mh = minute_bins(series_log.index)
+        values = np.asarray(series_log, dtype=float)
 
-        S_daily = df.groupby('minute_of_day')['y'].mean()
-        S_short = df.groupby('minute_of_hour')['y'].mean()
+        S_daily = SeasonalProfile(MINUTES_PER_DAY, window=self.look_back)
+        S_short = SeasonalProfile(MINUTES_PER_HOUR, window=self.look_back)
+        S_daily.extend(md, values)
+        S_short.extend(mh, values)
 
         return S_daily, S_short
 
     def remove_seasonality(self, series_log: pd.Series, S_daily, S_short):
-        mod = series_log.copy()
-        
-        # Safe access to seasonal profiles (handle missing keys if any)
-        # Using map/reindex is safer but direct access is faster if indices match
-        md = mod.index.hour * 60 + mod.index.minute
-        mh = mod.index.minute
-        
-        # Use reindex to align with current index structure if needed, 
-        # but here we just map values.
-        # Note: S_daily is indexed by minute_of_day (0-1439)
-        # S_short is indexed by minute_of_hour (0-59)
-        
-        daily_pattern = S_daily.reindex(md).values
-        short_pattern = S_short.reindex(mh).values
-        
-        # Fill NaNs if any minute is not in training profile (rare but possible)
-        # We assume 0 seasonality if missing
-        daily_pattern = np.nan_to_num(daily_pattern)
-        short_pattern = np.nan_to_num(short_pattern)
-
-        mod = mod - daily_pattern
-        mod = mod - short_pattern
-
-        return mod
+        # Minutes missing from the training profiles count as 0 seasonality
+        md, mh = minute_bins(series_log.index)
+        return series_log - S_daily.lookup(md) - S_short.lookup(mh)
 
     def add_seasonality(self, pred_ds_values: np.ndarray, index: pd.DatetimeIndex, S_daily, S_short):
-        if not isinstance(index, pd.DatetimeIndex):
-             index = pd.to_datetime(index)
-             
-        md = index.hour * 60 + index.minute
-        mh = index.minute
-
-        daily_pattern = S_daily.reindex(md).values
-        short_pattern = S_short.reindex(mh).values
-        
-        daily_pattern = np.nan_to_num(daily_pattern)
-        short_pattern = np.nan_to_num(short_pattern)
-
-        pred_log = pred_ds_values + daily_pattern + short_pattern
+        md, mh = minute_bins(index)
+        pred_log = pred_ds_values + S_daily.lookup(md) + S_short.lookup(mh)
         return pred_log
 
-    def predict(self, recent_data: Union[pd.DataFrame, np.ndarray, List[float]], steps: int = 1) -> List[float]:
-        """
-        Trains ARIMA on `recent_data` and forecasts `steps` ahead.
-        Expects `recent_data` to have 'timestamp' and 'requests' (or 'total_bytes') columns.
-        If 'timestamp' is missing, it will infer or error.
-        """
-        if ARIMA is None:
-            logger.error("statsmodels is not installed. Returning naive predictions.")
-            if isinstance(recent_data, pd.DataFrame) and 'requests' in recent_data.columns:
-                 return [float(recent_data.iloc[-1]['requests'])] * steps
-            elif isinstance(recent_data, (list, np.ndarray)) and len(recent_data) > 0:
-                 return [float(recent_data[-1])] * steps
-            else:
-                 return [0.0] * steps
-
-        # 1. Prepare Training Data
+    def _prepare(self, recent_data: Union[pd.DataFrame, np.ndarray, List[float]]) -> Tuple[pd.DataFrame, pd.Series]:
+        """Returns the time-indexed frame and its target column."""
         if isinstance(recent_data, (list, np.ndarray)):
             df = pd.DataFrame({'requests': recent_data})
             # Fallback: create dummy index
@@ -114,14 +161,16 @@ class CustomARIMAPredictor:
             else:
                  # Fallback: create dummy index
                  df.index = pd.date_range(end=pd.Timestamp.now(), periods=len(df), freq='5T')
-        
-        target_col = 'requests' if 'requests' in df.columns else df.columns[0]
-        train = df[target_col]
 
-        # Limit history
-        if len(train) > self.look_back:
-            train = train[-self.look_back:]
+        target_col = 'requests' if 'requests' in df.columns else next(c for c in df.columns if c != 'timestamp')
+        return df, df[target_col]
+
+    def _infer_freq(self, index: pd.DatetimeIndex) -> str:
+        inferred_freq = pd.infer_freq(index) if len(index) >= 3 else None
+        return inferred_freq or '5T' # Default
 
+    def _fit(self, train: pd.Series):
+        """Steps 2-6: profiles, scale and a full ARIMA fit on `train`."""
         # 2. Log Transform
         train_log = np.log1p(train)
 
@@ -136,52 +185,181 @@ class CustomARIMAPredictor:
 
         # 5. Exogenous Features (Peak Hour)
         exog_train = self.build_peak_feature(train_ds.index)
-        
-        # Prepare Exog for Forecast
-        last_time = df.index[-1]
-        # Infer frequency
-        inferred_freq = pd.infer_freq(df.index)
-        if not inferred_freq:
-            inferred_freq = '5T' # Default
-
-        future_dates = pd.date_range(start=last_time, periods=steps+1, freq=inferred_freq)[1:]
-        exog_test = self.build_peak_feature(future_dates)
 
         # 6. Train ARIMA
         # Enforce order from config or default
-        try:
-            model = ARIMA(train_ds, exog=exog_train, order=self.order)
-            res = model.fit()
-            
-            # 7. Forecast
+        model = ARIMA(train_ds, exog=exog_train, order=self.order)
+        res = model.fit()
+        self.n_refits += 1
+        return res, S_daily, S_short, std
+
+    def _forecast(self, res, last_time, freq: str, steps: int, S_daily, S_short, std: float,
+                  qs: Optional[Sequence[float]] = None) -> Union[List[float], Dict[float, List[float]]]:
+        """
+        Steps 7-8: forecast from `res` and undo scale, seasonality and log.
+        With `qs`, returns {q: forecast} from the state-space forecast variance.
+        """
+        future_dates = pd.date_range(start=last_time, periods=steps+1, freq=freq)[1:]
+        exog_test = self.build_peak_feature(future_dates)
+
+        # 7. Forecast
+        if qs is None:
             pred_ds = res.forecast(steps=steps, exog=exog_test)
-            
-            # 8. Inverse Transform
-            # Scale back
-            pred_ds = pred_ds * std
-            
-            # Add seasonality
-            pred_log = self.add_seasonality(pred_ds.values, future_dates, S_daily, S_short)
-            
-            # Exp transform
-            pred = np.expm1(pred_log)
-            pred = np.maximum(pred, 0)
-            
-            # 9. Amplitude Correction (Optional/Advanced)
-            # Notebook mentions: scale = a * log(y_pred) + b. 
-            # But the notebook code assumes `evaluate` calculates error ratios on TEST set.
-            # In live inference, we don't have y_true for the future.
-            # We can only learn `a` and `b` from TRAINING errors (residuals).
-            # For simplicity and robustness in this first integration, we perform the core ARIMA forecast.
-            # Use ratio correction if we had a hold-out set, but here we train on all recent data.
-            
-            return pred.tolist()
+            return self._inverse(np.asarray(pred_ds), future_dates, S_daily, S_short, std).tolist()
+
+        forecast = res.get_forecast(steps=steps, exog=exog_test)
+        mean = np.asarray(forecast.predicted_mean)
+        se = np.sqrt(np.asarray(forecast.var_pred_mean))
+        # Every inverse step is monotonic, so Gaussian quantiles of the
+        # transformed series map straight to quantiles of the forecast
+        return {q: self._inverse(mean + NormalDist().inv_cdf(q) * se, future_dates, S_daily, S_short, std).tolist()
+                for q in qs}
+
+    def _inverse(self, pred_ds: np.ndarray, future_dates: pd.DatetimeIndex, S_daily, S_short, std: float) -> np.ndarray:
+        """Step 8: back from the deseasonalized, scaled log series to request counts."""
+        # 8. Inverse Transform
+        # Scale back
+        pred_ds = pred_ds * std
+
+        # Add seasonality
+        pred_log = self.add_seasonality(pred_ds, future_dates, S_daily, S_short)
+
+        # Exp transform
+        pred = np.expm1(pred_log)
+        pred = np.maximum(pred, 0)
+
+        # 9. Amplitude Correction (Optional/Advanced)
+        # Notebook mentions: scale = a * log(y_pred) + b.
+        # But the notebook code assumes `evaluate` calculates error ratios on TEST set.
+        # In live inference, we don't have y_true for the future.
+        # We can only learn `a` and `b` from TRAINING errors (residuals).
+        # For simplicity and robustness in this first integration, we perform the core ARIMA forecast.
+        # Use ratio correction if we had a hold-out set, but here we train on all recent data.
+
+        return pred
+
+    def _refit(self, df: pd.DataFrame, train: pd.Series):
+        """Full refit of the online state on the last `look_back` points."""
+        self._res, self._S_daily, self._S_short, self._std = self._fit(train[-self.look_back:])
+        self._freq = self._infer_freq(df.index)
+        self._last_time = train.index[-1]
+        self._since_refit = 0
+
+        # Seed the drift detector with the tail of the in-sample residuals
+        self._drift = StreamingAnomalyDetector(window_size=self.drift_window)
+        for r in np.asarray(self._res.resid)[-self.drift_window:].tolist():
+            self._drift.detect_code(r, 0.0)
+
+    def _needs_refit(self, train: pd.Series, new: pd.Series) -> bool:
+        if self._res is None:
+            return True
+        if train.index[-1] < self._last_time:
+            return True # Window rewound (replay restarted)
+        if not len(new):
+            return False
+        if self._since_refit + len(new) >= self.refit_every:
+            return True
+        # New points must continue right after the last filtered one
+        return new.index[0] != self._last_time + pd.tseries.frequencies.to_offset(self._freq)
+
+    def update(self, recent_data: Union[pd.DataFrame, np.ndarray, List[float]]) -> bool:
+        """
+        Brings the online state up to the end of `recent_data` without
+        forecasting. Returns True if a full refit was needed.
+        """
+        return self._update(*self._prepare(recent_data))
+
+    def _update(self, df: pd.DataFrame, train: pd.Series) -> bool:
+        new = train[train.index > self._last_time] if self._res is not None else train[:0]
+
+        if self._needs_refit(train, new):
+            self._refit(df, train)
+            return True
+        if not len(new):
+            return False
+
+        # Slide the seasonal profiles over the new points
+        new_log = np.log1p(new)
+        md, mh = minute_bins(new.index)
+        self._S_daily.extend(md, new_log.values)
+        self._S_short.extend(mh, new_log.values)
+
+        new_ds = self.remove_seasonality(new_log, self._S_daily, self._S_short) / self._std
+        self._res = self._res.extend(new_ds.values, exog=self.build_peak_feature(new.index))
+        self._last_time = new.index[-1]
+        self._since_refit += len(new)
+
+        # One-step-ahead residuals of the filtered points feed the drift detector
+        codes = [self._drift.detect_code(r, 0.0) for r in np.asarray(self._res.resid).tolist()]
+        if SPIKE in codes or DROP in codes:
+            logger.info("ARIMA residual drift detected, refitting")
+            self._refit(df, train)
+            return True
+        return False
+
+    def _predict_prepared(self, df: pd.DataFrame, train: pd.Series, steps: int,
+                          qs: Optional[Sequence[float]] = None):
+        """Steps 2-8 on an already prepared frame; raises instead of falling back."""
+        if self.online:
+            self._update(df, train)
+            return self._forecast(self._res, self._last_time, self._freq, steps,
+                                  self._S_daily, self._S_short, self._std, qs)
+
+        # Limit history
+        if len(train) > self.look_back:
+            train = train[-self.look_back:]
+
+        res, S_daily, S_short, std = self._fit(train)
+        return self._forecast(res, df.index[-1], self._infer_freq(df.index), steps, S_daily, S_short, std, qs)
+
+    def predict(self, recent_data: Union[pd.DataFrame, np.ndarray, List[float]], steps: int = 1) -> List[float]:
+        """
+        Trains ARIMA on `recent_data` and forecasts `steps` ahead.
+        Expects `recent_data` to have 'timestamp' and 'requests' (or 'total_bytes') columns.
+        If 'timestamp' is missing, it will infer or error.
+
+        In online mode only the points after the previous call are filtered in;
+        see the class docstring for when a full refit happens instead.
+        """
+        if ARIMA is None:
+            logger.error("statsmodels is not installed. Returning naive predictions.")
+            if isinstance(recent_data, pd.DataFrame) and 'requests' in recent_data.columns:
+                 return [float(recent_data.iloc[-1]['requests'])] * steps
+            elif isinstance(recent_data, (list, np.ndarray)) and len(recent_data) > 0:
+                 return [float(recent_data[-1])] * steps
+            else:
+                 return [0.0] * steps
+
+        # 1. Prepare Training Data
+        df, train = self._prepare(recent_data)
+
+        try:
+            return self._predict_prepared(df, train, steps)
 
         except Exception as e:
             logger.error(f"ARIMA prediction failed: {e}")
+            self.reset()
             # Fallback
             return [float(train.iloc[-1])] * steps
 
+    def predict_quantiles(self, recent_data: Union[pd.DataFrame, np.ndarray, List[float]], steps: int = 1,
+                          qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[float, List[float]]:
+        """
+        predict() as {q: forecast} per quantile, from the ARIMA forecast
+        variance. q=0.5 is the point forecast; on failure every q gets the fallback.
+        """
+        if ARIMA is None:
+            point = self.predict(recent_data, steps)
+            return {q: list(point) for q in qs}
+
+        df, train = self._prepare(recent_data)
+        try:
+            return self._predict_prepared(df, train, steps, qs)
+        except Exception as e:
+            logger.error(f"ARIMA prediction failed: {e}")
+            self.reset()
+            return {q: [float(train.iloc[-1])] * steps for q in qs}
+
 if __name__ == "__main__":
     # Test block
     dates = pd.date_range(start="2023-01-01", periods=200, freq="5T")
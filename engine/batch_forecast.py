@@ -0,0 +1,229 @@
+"""
+Batch ARIMA forecasting for many series at once.
+
+Every series (series_id -> DataFrame with 'timestamp' and one target column)
+is fitted by CustomARIMAPredictor in its own task on a process pool sized to
+the available cores. Workers are pinned to one BLAS thread each so N fits do
+not fight over N x cores threads. Results stream back as they complete;
+a series that fails or exceeds its timeout gets the naive last-value forecast
+instead of holding up the batch.
+
+Usage:
+    python -m engine.batch_forecast --resolution 5min [--windows 4] [--steps 6] [--timeout 30]
+"""
+import argparse
+import contextlib
+import math
+import os
+import signal
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from engine.arima_model import CustomARIMAPredictor
+
+# Metric columns present in every data/*.csv
+SERIES_COLUMNS = ["request_count", "total_bytes", "weighted_load", "unique_users"]
+
+BLAS_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+# Keeps the threadpoolctl limit alive for the worker's lifetime
+_BLAS_LIMIT = None
+
+
+class SeriesForecast(NamedTuple):
+    series_id: Hashable
+    forecast: List[float]
+    ok: bool               # False -> naive last-value fallback
+    elapsed: float         # seconds spent on this series in the worker
+    error: Optional[str]
+
+
+class SeriesTimeout(Exception):
+    pass
+
+
+def _limit_blas_threads(n_threads: int = 1):
+    """Pool initializer: one BLAS/OpenMP thread per worker process."""
+    global _BLAS_LIMIT
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(n_threads)
+    # BLAS is already loaded in forked workers, so the env vars alone are not enough
+    try:
+        from threadpoolctl import threadpool_limits
+        _BLAS_LIMIT = threadpool_limits(limits=n_threads)
+    except ImportError:
+        pass
+    warnings.filterwarnings("ignore")
+
+
+@contextlib.contextmanager
+def _alarm(timeout: Optional[float]):
+    """Raises SeriesTimeout after `timeout` seconds (POSIX only, no-op elsewhere)."""
+    if not timeout or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def _expired(signum, frame):
+        raise SeriesTimeout(f"exceeded {timeout:g}s")
+
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _last_value(frame: pd.DataFrame) -> float:
+    _, train = CustomARIMAPredictor()._prepare(frame)
+    return float(train.iloc[-1]) if len(train) else 0.0
+
+
+def naive_forecast(series_id: Hashable, frame: pd.DataFrame, steps: int, error: str, elapsed: float = 0.0) -> SeriesForecast:
+    """Last-value fallback, same as CustomARIMAPredictor when a fit fails."""
+    try:
+        value = _last_value(frame)
+    except Exception:
+        value = 0.0
+    return SeriesForecast(series_id, [value] * steps, False, elapsed, error)
+
+
+def forecast_series(series_id: Hashable, frame: pd.DataFrame, steps: int = 1,
+                    order: Tuple[int, int, int] = (2, 1, 2), look_back: int = 1000,
+                    timeout: Optional[float] = None) -> SeriesForecast:
+    """Fits and forecasts one series; never raises."""
+    t0 = time.perf_counter()
+    try:
+        predictor = CustomARIMAPredictor(order=order, look_back=look_back)
+        with _alarm(timeout):
+            df, train = predictor._prepare(frame)
+            forecast = predictor._predict_prepared(df, train, steps)
+        return SeriesForecast(series_id, forecast, True, time.perf_counter() - t0, None)
+    except Exception as e:
+        return naive_forecast(series_id, frame, steps, f"{type(e).__name__}: {e}", time.perf_counter() - t0)
+
+
+def _terminate(pool: ProcessPoolExecutor):
+    """Shuts the pool down without waiting, killing workers still busy with timed-out fits."""
+    terminate_workers = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate_workers is not None:
+        terminate_workers()
+        return
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def iter_forecasts(frames: Dict[Hashable, pd.DataFrame], steps: int = 1,
+                   workers: Optional[int] = None, timeout: Optional[float] = 60.0,
+                   order: Tuple[int, int, int] = (2, 1, 2), look_back: int = 1000) -> Iterator[SeriesForecast]:
+    """
+    Yields a SeriesForecast per series in completion order.
+
+    `timeout` is enforced per series inside the worker. The whole batch also
+    gets a backstop deadline of timeout x ceil(series / workers) (plus slack),
+    counted over the time spent waiting for results only, so a slow consumer
+    does not eat into it. Once it expires, anything unfinished is yielded as
+    a naive fallback and the workers are terminated.
+    """
+    if not frames:
+        return
+    workers = min(workers or os.cpu_count() or 1, len(frames))
+    deadline = None
+    if timeout:
+        deadline = timeout * math.ceil(len(frames) / workers) + 5.0
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_limit_blas_threads)
+    expired = False
+    try:
+        futures = {
+            pool.submit(forecast_series, sid, frame, steps, order, look_back, timeout): sid
+            for sid, frame in frames.items()
+        }
+        pending = set(futures)
+        waited = 0.0
+        while pending:
+            t0 = time.monotonic()
+            done, pending = wait(pending, timeout=None if deadline is None else max(deadline - waited, 0.0),
+                                 return_when=FIRST_COMPLETED)
+            waited += time.monotonic() - t0
+            if not done:
+                expired = True
+                break
+            for future in done:
+                sid = futures[future]
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # Worker crashed (BrokenProcessPool) or result could not be unpickled
+                    yield naive_forecast(sid, frames[sid], steps, f"{type(e).__name__}: {e}")
+        if expired:
+            for future in pending:
+                future.cancel()
+            _terminate(pool)
+            for future in pending:
+                yield naive_forecast(futures[future], frames[futures[future]], steps, "batch deadline exceeded")
+    finally:
+        if not expired:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def forecast_many(frames: Dict[Hashable, pd.DataFrame], steps: int = 1, **kwargs) -> Dict[Hashable, SeriesForecast]:
+    """Collects iter_forecasts into a dict keyed like `frames`."""
+    results = {r.series_id: r for r in iter_forecasts(frames, steps, **kwargs)}
+    return {sid: results[sid] for sid in frames}
+
+
+def frames_from_csv(path: str, columns: Sequence[str] = SERIES_COLUMNS, look_back: int = 1000,
+                    windows: int = 1) -> Dict[Tuple[str, int], pd.DataFrame]:
+    """
+    Splits a data/*.csv into one ('timestamp', column) frame per metric column.
+    With windows > 1, also takes that many evenly spaced look_back windows
+    per column (e.g. backtest origins). Keys are (column, window end row).
+    """
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    ends = np.linspace(look_back, len(df), windows, dtype=int) if windows > 1 else [len(df)]
+    frames = {}
+    for column in columns:
+        for end in ends:
+            window = df.iloc[max(0, end - look_back):end]
+            frames[(column, int(end))] = pd.DataFrame({"timestamp": window.index, column: window[column].to_numpy()})
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", default="5min", choices=["1min", "5min", "15min"], help="Data CSV resolution")
+    parser.add_argument("--split", default="train", choices=["train", "test"], help="Data CSV split")
+    parser.add_argument("--windows", type=int, default=1, help="Look-back windows per metric column")
+    parser.add_argument("--steps", type=int, default=6, help="Forecast horizon")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-series timeout in seconds")
+    args = parser.parse_args()
+
+    path = os.path.join(config.DATA_DIR, f"{args.split}_{args.resolution}.csv")
+    if not os.path.exists(path):
+        available = sorted(f for f in os.listdir(config.DATA_DIR) if f.startswith(("train_", "test_")))
+        parser.error(f"no {args.split} split at {args.resolution} ({path} missing); available: {', '.join(available)}")
+    frames = frames_from_csv(path, windows=args.windows)
+    t0 = time.perf_counter()
+    failed = 0
+    for r in iter_forecasts(frames, args.steps, workers=args.workers, timeout=args.timeout):
+        failed += not r.ok
+        status = "ok" if r.ok else f"FALLBACK ({r.error})"
+        print(f"{str(r.series_id):<32} {r.elapsed:6.2f}s  {np.round(r.forecast, 1).tolist()}  {status}")
+    elapsed = time.perf_counter() - t0
+    print(f"\n{len(frames)} series in {elapsed:.2f}s ({len(frames) / elapsed:.2f} series/s), {failed} fallbacks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Conformal residual calibration, turning point forecasts into quantiles.
+
+The stored evaluation runs (result_lstm/.../predictions.csv,
+results_hybrid/.../hybrid_predictions.csv) hold held-out actuals next to
+the model's one-step predictions. Their residuals, divided by
+sqrt(prediction) so that busy and calm periods give comparable scores,
+are sorted once. A quantile q of a new forecast is then
+    point + score_q * sqrt(point) * sqrt(h)
+where score_q is the finite-sample conformal quantile of the scores and
+h the horizon step (errors of a recursive forecast grow roughly like a
+random walk). Everything per tick is a lookup plus a few NumPy ops.
+"""
+import math
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Column holding the point prediction, in order of preference
+PREDICTED_COLUMNS = ("predicted", "hybrid_pred", "lstm_pred", "yhat")
+
+
+def _scale(values: np.ndarray) -> np.ndarray:
+    return np.sqrt(np.maximum(values, 1.0))
+
+
+class ResidualCalibration:
+    def __init__(self, actual: Sequence[float], predicted: Sequence[float]):
+        actual = np.asarray(actual, dtype=float)
+        predicted = np.asarray(predicted, dtype=float)
+        scores = (actual - predicted) / _scale(predicted)
+        self.scores = np.sort(scores[np.isfinite(scores)])
+        if not len(self.scores):
+            raise ValueError("no finite residuals to calibrate on")
+        self._score_cache: Dict[float, float] = {}
+
+    def score(self, q: float) -> float:
+        """
+        Conformal quantile of the scores: the ceil((n+1)q)-th smallest for
+        upper quantiles, the floor((n+1)q)-th for lower ones (clipped to the sample).
+        """
+        value = self._score_cache.get(q)
+        if value is None:
+            n = len(self.scores)
+            rank = math.ceil((n + 1) * q) if q >= 0.5 else math.floor((n + 1) * q)
+            value = float(self.scores[min(max(rank, 1), n) - 1])
+            self._score_cache[q] = value
+        return value
+
+    def quantiles(self, point: Sequence[float], qs: Sequence[float]) -> Dict[float, List[float]]:
+        """{q: forecast} around the multi-step point forecast `point`."""
+        point = np.asarray(point, dtype=float)
+        spread = _scale(point) * np.sqrt(np.arange(1, len(point) + 1))
+        return {q: np.maximum(point + self.score(q) * spread, 0.0).tolist() for q in qs}
+
+
+def load_residual_calibration(path: str) -> ResidualCalibration:
+    """Calibration from a predictions CSV with an 'actual' and a prediction column."""
+    df = pd.read_csv(path)
+    predicted = next((c for c in PREDICTED_COLUMNS if c in df.columns), None)
+    if "actual" not in df.columns or predicted is None:
+        raise ValueError(f"{os.path.basename(path)} needs 'actual' and one of {PREDICTED_COLUMNS}")
+    return ResidualCalibration(df["actual"].to_numpy(), df[predicted].to_numpy())
+
+
+def calibration_file(resolution: str, target: str = "request_count", model: str = "LSTM") -> str:
+    """Path of the stored predictions for `model` ('LSTM', 'BiLSTM' or 'hybrid'), relative to MODEL_DIR."""
+    res = resolution if resolution.endswith("min") else resolution.replace("m", "min")
+    if model.lower() == "hybrid":
+        return os.path.join("results_hybrid", f"{res}_{target}", "hybrid_predictions.csv")
+    return os.path.join("result_lstm", f"{res}_{target}", model, "predictions.csv")
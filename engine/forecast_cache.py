@@ -0,0 +1,304 @@
+"""
+Forecast memoization in front of BasePredictor.predict.
+
+Replays, reruns after a sidebar tweak and several dashboards on the same CSV
+keep asking for forecasts of identical trailing windows. CachedPredictor
+fingerprints the window (xxhash over the raw column buffers when the
+package is installed, BLAKE2 otherwise) and keys the result by
+(model, resolution, predictor parameters, steps, fingerprint) in a bounded
+LRU with a TTL. With `disk_dir` set, entries are also written as small .npy
+files that every process pointing at the same directory can reuse.
+
+The key includes a fingerprint of the wrapped model and scaler: the
+MODEL_REGISTRY key (path, mtime, size) for objects loaded through
+ModelLoader, a hash of the weights or pickle otherwise. Online predictors
+(CustomARIMAPredictor(online=True)) are passed through unmemoized by
+default, since a hit would skip their filter update.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+import config
+from .loader import MODEL_REGISTRY
+from .numpy_lstm import NumpyLSTMModel
+from .predictor_factory import DEFAULT_QUANTILES, BasePredictor
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Predictor attributes that change the forecast for the same window
+PARAM_ATTRIBUTES = ("look_back", "features", "order", "online")
+# Attributes holding the fitted objects (or, for HybridPredictor, the sub-predictors)
+MODEL_ATTRIBUTES = ("model", "scaler", "prophet", "lstm")
+
+
+def _hasher():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def _column_bytes(values: np.ndarray) -> np.ndarray:
+    """The raw buffer as uint8 (datetime64 included); object columns are hashed by pandas first."""
+    if values.dtype == object:
+        values = pd.util.hash_array(values)
+    return np.ascontiguousarray(values).reshape(-1).view(np.uint8)
+
+
+def window_fingerprint(recent_data: Union[pd.DataFrame, np.ndarray, List[float]]) -> str:
+    """
+    Hex digest of everything a predictor can read from `recent_data`: the raw
+    buffer of every column (timestamps included) with its name and dtype.
+    Hashing goes over the buffers directly, no per-value Python work.
+    """
+    h = _hasher()
+    if isinstance(recent_data, pd.DataFrame):
+        h.update(repr(recent_data.shape).encode())
+        for name in recent_data.columns:
+            values = recent_data[name].to_numpy()
+            h.update(f"{name}:{values.dtype.str};".encode())
+            h.update(_column_bytes(values))
+        if isinstance(recent_data.index, pd.DatetimeIndex) and len(recent_data):
+            h.update(b"index:")
+            h.update(_column_bytes(recent_data.index.asi8))
+    else:
+        values = np.asarray(recent_data)
+        h.update(f"{values.shape}:{values.dtype.str};".encode())
+        h.update(_column_bytes(values))
+    return h.hexdigest()
+
+
+def _object_fingerprint(obj) -> Hashable:
+    key = MODEL_REGISTRY.key_of(obj)
+    if key is not None:
+        return key
+    h = _hasher()
+    if isinstance(obj, NumpyLSTMModel):
+        for name in sorted(obj.weights):
+            h.update(name.encode())
+            h.update(_column_bytes(np.asarray(obj.weights[name])))
+        return ("weights", h.hexdigest())
+    try:
+        h.update(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        # Unpicklable and not from the registry: only valid inside this process
+        return ("object", os.getpid(), id(obj))
+    return ("pickle", h.hexdigest())
+
+
+def model_fingerprint(predictor) -> tuple:
+    """Identity of the model/scaler objects behind `predictor` (recursing into sub-predictors)."""
+    parts = []
+    for name in MODEL_ATTRIBUTES:
+        obj = getattr(predictor, name, None)
+        if obj is None:
+            continue
+        if isinstance(obj, BasePredictor):
+            parts.append((name, type(obj).__name__, model_fingerprint(obj)))
+        else:
+            parts.append((name, _object_fingerprint(obj)))
+    return tuple(parts)
+
+
+class ForecastCache:
+    """
+    Thread-safe LRU of forecasts with a time-to-live, optionally backed by a
+    directory shared between processes.
+
+    `maxsize` bounds the in-memory entries; disk entries are pruned to the
+    same count (oldest first) every `maxsize` writes.
+    """
+    def __init__(self, maxsize: int = config.FORECAST_CACHE_SIZE, ttl: float = config.FORECAST_CACHE_TTL,
+                 disk_dir: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, forecast tuple)
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def _file_name(key: Hashable) -> str:
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest() + ".npy"
+
+    def get(self, key: Hashable) -> Optional[List[float]]:
+        """The cached forecast for `key`, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[1])
+                del self._entries[key]
+                self.expired += 1
+
+        forecast = self._disk_get(key)
+        with self._lock:
+            if forecast is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, forecast, now)
+        return list(forecast)
+
+    def put(self, key: Hashable, forecast: List[float]):
+        forecast = tuple(float(v) for v in forecast)
+        with self._lock:
+            self._insert(key, forecast, time.monotonic())
+        self._disk_put(key, forecast)
+
+    def _insert(self, key: Hashable, forecast: tuple, now: float):
+        self._entries[key] = (now + self.ttl, forecast)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: Hashable) -> Optional[tuple]:
+        if not self.disk_dir:
+            return None
+        path = os.path.join(self.disk_dir, self._file_name(key))
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            return tuple(np.load(path, allow_pickle=False).tolist())
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: Hashable, forecast: tuple):
+        if not self.disk_dir:
+            return
+        path = os.path.join(self.disk_dir, self._file_name(key))
+        # Unique temp name: several processes may write the same key at once
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(forecast, dtype=float), allow_pickle=False)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % self.maxsize == 0
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        try:
+            with os.scandir(self.disk_dir) as it:
+                files = [(e.stat().st_mtime, e.path) for e in it if e.name.endswith(".npy")]
+        except OSError:
+            return
+        cutoff = time.time() - self.ttl
+        files.sort()
+        for i, (mtime, path) in enumerate(files):
+            if mtime < cutoff or i < len(files) - self.maxsize:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __getstate__(self):
+        with self._lock:
+            state = self.__dict__.copy()
+            state["_entries"] = self._entries.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "disk_hits": self.disk_hits,
+                    "misses": self.misses, "expired": self.expired, "evictions": self.evictions}
+
+
+# Shared by every CachedPredictor in the process (and every Streamlit session)
+FORECAST_CACHE = ForecastCache(disk_dir=config.FORECAST_CACHE_DIR)
+
+
+class CachedPredictor(BasePredictor):
+    """
+    Wraps a predictor so repeated predict() calls on an identical window are
+    served from `cache`. Everything else (predict_windows, look_back, ...)
+    is forwarded to the wrapped predictor.
+
+    Copies and unpickled instances keep sharing FORECAST_CACHE; a private
+    `cache` is copied along with the predictor.
+
+    `memoize` defaults to False for online predictors, whose predict() updates
+    state; they are then only forwarded.
+    """
+    def __init__(self, predictor, model: str = "", resolution: str = "", cache: Optional[ForecastCache] = None,
+                 memoize: Optional[bool] = None):
+        self.predictor = predictor
+        self.cache = cache or FORECAST_CACHE
+        self.memoize = not getattr(predictor, "online", False) if memoize is None else memoize
+        params = tuple((a, repr(getattr(predictor, a))) for a in PARAM_ATTRIBUTES if hasattr(predictor, a))
+        self.model_key = (model, resolution, type(predictor).__name__, params, model_fingerprint(predictor))
+
+    def predict(self, recent_data, steps: int = 1) -> List[float]:
+        if not self.memoize:
+            return list(self.predictor.predict(recent_data, steps))
+        key = self.model_key + (steps, window_fingerprint(recent_data))
+        forecast = self.cache.get(key)
+        if forecast is None:
+            forecast = list(self.predictor.predict(recent_data, steps))
+            self.cache.put(key, forecast)
+        return forecast
+
+    def predict_quantiles(self, recent_data, steps: int = 1,
+                          qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[float, List[float]]:
+        qs = tuple(qs)
+        if not self.memoize:
+            return self.predictor.predict_quantiles(recent_data, steps, qs)
+        key = self.model_key + (steps, qs, window_fingerprint(recent_data))
+        flat = self.cache.get(key)
+        if flat is None:
+            result = self.predictor.predict_quantiles(recent_data, steps, qs)
+            flat = [v for q in qs for v in result[q]]
+            self.cache.put(key, flat)
+        return {q: flat[i * steps:(i + 1) * steps] for i, q in enumerate(qs)}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if state.get("cache") is FORECAST_CACHE:
+            state["cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache = self.cache or FORECAST_CACHE
+
+    def __getattr__(self, name):
+        # Only reached for missing attributes; `predictor` itself is missing
+        # while copy/pickle rebuild the instance, so don't recurse on it
+        predictor = self.__dict__.get("predictor")
+        if predictor is None:
+            raise AttributeError(name)
+        return getattr(predictor, name)
@@ -1,66 +1,226 @@
 import os
-import joblib
+import glob
 import pickle
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional
+
+import config
+from .numpy_lstm import NumpyLSTMModel, WEIGHTS_FILE
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(obj, path: str) -> int:
+    """Rough in-memory size of a loaded model, used for the cache budget."""
+    if isinstance(obj, NumpyLSTMModel):
+        return sum(w.nbytes for w in obj.weights.values())
+    file_size = os.path.getsize(path) if os.path.isfile(path) else 0
+    count_params = getattr(obj, "count_params", None)
+    if callable(count_params):
+        try:
+            return max(file_size, 4 * int(count_params()))
+        except Exception:
+            pass
+    return file_size
+
+
+class ModelRegistry:
+    """
+    Thread-safe, process-wide cache of deserialized models.
+
+    Entries are keyed by (kind, path, mtime, size), so a file rewritten on disk
+    is loaded again. The least recently used entries are evicted once the
+    estimated total size exceeds `budget_bytes`. Loads are single-flight:
+    concurrent callers asking for the same key wait for one load instead of
+    each deserializing the file.
+    """
+    def __init__(self, budget_bytes: int = config.MODEL_CACHE_BUDGET_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (model, size)
+        self._inflight: Dict[Hashable, Future] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(kind: str, path: str) -> tuple:
+        st = os.stat(path)
+        return kind, os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+    def get(self, kind: str, path: str, load: Callable[[str], object]):
+        """Cached model for `path`, calling `load(path)` at most once per key. Errors propagate."""
+        key = self.make_key(kind, path)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            model = load(path)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            if model is not None:
+                self._insert(key, model, estimate_size(model, path))
+        future.set_result(model)
+        return model
+
+    def _insert(self, key: tuple, model, size: int):
+        # Older versions of the same file can never be hit again
+        for stale in [k for k in self._entries if k[:2] == key[:2]]:
+            self._drop(stale)
+        self._entries[key] = (model, size)
+        self.total_bytes += size
+        while self.total_bytes > self.budget_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: tuple):
+        _, size = self._entries.pop(key)
+        self.total_bytes -= size
+
+    def key_of(self, model) -> Optional[tuple]:
+        """Registry key (kind, path, mtime, size) of a cached model object, or None."""
+        with self._lock:
+            return next((k for k, (m, _) in self._entries.items() if m is model), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.total_bytes, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+
+# Shared by every ModelLoader (and every Streamlit session) in the process
+MODEL_REGISTRY = ModelRegistry()
+
 
 class ModelLoader:
-    def __init__(self, model_dir: str):
+    def __init__(self, model_dir: str, registry: Optional[ModelRegistry] = None):
         self.model_dir = model_dir
+        self.registry = registry or MODEL_REGISTRY
         self.logger = logging.getLogger(__name__)
 
-    def load_keras_model(self, model_name: str):
-        """
-        Loads a Keras model from model_dir.
-        """
+    def _cached(self, kind: str, model_name: str, load: Callable[[str], object], label: str):
+        """Registry lookup with the loaders' existing warn/log-and-return-None behaviour."""
         path = os.path.join(self.model_dir, model_name)
         if not os.path.exists(path):
-            self.logger.warning(f"Model not found at {path}")
+            self.logger.warning(f"{label} not found at {path}")
             return None
-            
+
         try:
+            return self.registry.get(kind, path, load)
+        except Exception as e:
+            self.logger.error(f"❌ Error loading {label} {model_name}: {e}")
+            return None
+
+    def load_keras_model(self, model_name: str):
+        """
+        Loads a Keras model from model_dir.
+        """
+        def load(path):
             import tensorflow as tf
             model = tf.keras.models.load_model(path)
             self.logger.info(f"✅ Loaded Keras model from {path}")
             return model
-        except Exception as e:
-            self.logger.error(f"❌ Error loading Keras model {model_name}: {e}")
-            return None
-            return None
+
+        return self._cached("keras", model_name, load, "Keras model")
+
+    def load_numpy_model(self, model_name: str):
+        """
+        Loads an exported weights.npz (see engine.numpy_lstm) without TensorFlow.
+        """
+        def load(path):
+            model = NumpyLSTMModel.load(path)
+            self.logger.info(f"✅ Loaded NumPy model from {path}")
+            return model
+
+        return self._cached("numpy", model_name, load, "NumPy model")
 
     def load_scaler(self, scaler_name: str):
         """
         Loads a scaler (sklearn) from model_dir.
         """
-        path = os.path.join(self.model_dir, scaler_name)
-        if not os.path.exists(path):
-            self.logger.warning(f"Scaler not found at {path}")
-            return None
-            
-        try:
-            # Try joblib first
-            return joblib.load(path)
-        except:
-            try:
-                with open(path, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                self.logger.error(f"Error loading scaler: {e}")
-                return None
+        return self._cached("scaler", scaler_name, _load_pickled, "Scaler")
 
     def load_generic_model(self, model_name: str):
         """
         Loads generic models (ARIMA, Prophet) from pickle/joblib.
         """
-        path = os.path.join(self.model_dir, model_name)
-        if not os.path.exists(path):
+        return self._cached("generic", model_name, _load_pickled, "generic model")
+
+    def load_calibration(self, predictions_name: str):
+        """
+        Conformal residual calibration (engine.conformal) from a stored
+        predictions CSV, computed once and cached like the models.
+        """
+        def load(path):
+            from .conformal import load_residual_calibration
+            return load_residual_calibration(path)
+
+        return self._cached("calibration", predictions_name, load, "Calibration")
+
+    def resolution_models(self, resolution: str) -> List[str]:
+        """Exported LSTM/BiLSTM weights and scalers for a resolution ('5m' or '5min'), relative to model_dir."""
+        res = resolution if resolution.endswith("min") else resolution.replace("m", "min")
+        pattern = os.path.join(self.model_dir, "result_lstm", f"{res}_*", "*", "")
+        names = []
+        for model_dir in sorted(glob.glob(pattern)):
+            for filename in (WEIGHTS_FILE, "scaler.pkl"):
+                if os.path.exists(os.path.join(model_dir, filename)):
+                    names.append(os.path.relpath(os.path.join(model_dir, filename), self.model_dir))
+        return names
+
+    def prewarm(self, resolution: str, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Loads every model of `resolution` into the registry. With `background`
+        this runs on a daemon thread; callers that ask for a model meanwhile
+        wait for the in-flight load instead of starting their own.
+        """
+        def run():
+            for name in self.resolution_models(resolution):
+                if name.endswith(".npz"):
+                    self.load_numpy_model(name)
+                else:
+                    self.load_scaler(name)
+
+        if not background:
+            run()
             return None
-            
-        try:
-            return joblib.load(path)
-        except:
-            try:
-                with open(path, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                self.logger.error(f"Error loading generic model {model_name}: {e}")
-                return None
+        thread = threading.Thread(target=run, name=f"prewarm-{resolution}", daemon=True)
+        thread.start()
+        return thread
+
+
+def _load_pickled(path: str):
+    try:
+        # Try joblib first
+        import joblib
+        return joblib.load(path)
+    except Exception:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
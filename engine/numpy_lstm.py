@@ -0,0 +1,258 @@
+"""
+NumPy-only inference for the trained LSTM / BiLSTM models.
+
+`export` reads each models/result_lstm/<res>_<target>/<LSTM|BiLSTM>/model.keras
+once (this step needs TensorFlow) and writes the LSTM, Bidirectional and
+Dense weights plus the layer layout to weights.npz next to it. NumpyLSTMModel
+loads that file with np.load and runs the forward pass in plain NumPy, so
+serving never imports TensorFlow. Dropout is an inference no-op and is skipped.
+
+`verify` replays the notebook's test windows through Keras and through the
+NumPy model and compares both against the stored predictions.csv.
+
+Usage:
+    python -m engine.numpy_lstm export [--root models/result_lstm]
+    python -m engine.numpy_lstm verify [--root models/result_lstm]
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+WEIGHTS_FILE = "weights.npz"
+LSTM_RESULTS_DIR = os.path.join(config.MODEL_DIR, "result_lstm")
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "hard_sigmoid": lambda x: np.clip(x + 3.0, 0.0, 6.0) / 6.0,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "linear": lambda x: x,
+}
+
+
+def _activation(name: str):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}'")
+    return ACTIVATIONS[name]
+
+
+def lstm_forward(x: np.ndarray, kernel: np.ndarray, recurrent_kernel: np.ndarray, bias: np.ndarray,
+                 activation: str = "tanh", recurrent_activation: str = "sigmoid",
+                 return_sequences: bool = False, go_backwards: bool = False) -> np.ndarray:
+    """
+    Keras LSTM cell over (batch, time, features). Gate order in the fused
+    kernels is input, forget, cell, output.
+    """
+    act, rec_act = _activation(activation), _activation(recurrent_activation)
+    batch, steps, _ = x.shape
+    units = recurrent_kernel.shape[0]
+    if go_backwards:
+        x = x[:, ::-1]
+
+    # Input projections for every timestep at once; only h @ U is sequential
+    z_x = x @ kernel + bias
+    h = np.zeros((batch, units), dtype=x.dtype)
+    c = np.zeros((batch, units), dtype=x.dtype)
+    outputs = np.empty((batch, steps, units), dtype=x.dtype) if return_sequences else None
+    for t in range(steps):
+        z = z_x[:, t] + h @ recurrent_kernel
+        i = rec_act(z[:, :units])
+        f = rec_act(z[:, units:2 * units])
+        g = act(z[:, 2 * units:3 * units])
+        o = rec_act(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * act(c)
+        if return_sequences:
+            outputs[:, t] = h
+    return outputs if return_sequences else h
+
+
+class NumpyLSTMModel:
+    """
+    Forward pass of an exported Sequential LSTM/BiLSTM/Dense model.
+    Callable like a Keras model: model(x) -> (batch, outputs) ndarray.
+    """
+    def __init__(self, layers: List[Dict], weights: Dict[str, np.ndarray], input_shape=None,
+                 features: Optional[List[str]] = None):
+        self.layers = layers
+        self.weights = weights
+        self.input_shape = tuple(input_shape) if input_shape else None
+        self.features = features
+        self.dtype = np.float32
+
+    @property
+    def look_back(self) -> Optional[int]:
+        return self.input_shape[0] if self.input_shape else None
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyLSTMModel":
+        with np.load(path, allow_pickle=False) as npz:
+            meta = json.loads(str(npz["__meta__"]))
+            weights = {k: npz[k] for k in npz.files if k != "__meta__"}
+        return cls(meta["layers"], weights, meta.get("input_shape"), meta.get("features"))
+
+    def save(self, path: str):
+        meta = {"layers": self.layers, "input_shape": self.input_shape, "features": self.features}
+        np.savez_compressed(path, __meta__=np.array(json.dumps(meta)), **self.weights)
+
+    def _lstm(self, x, spec, prefix, go_backwards=False):
+        w = self.weights
+        return lstm_forward(x, w[prefix + "kernel"], w[prefix + "recurrent_kernel"], w[prefix + "bias"],
+                            spec["activation"], spec["recurrent_activation"],
+                            spec["return_sequences"], go_backwards)
+
+    def __call__(self, x, training: bool = False) -> np.ndarray:
+        out = np.asarray(x, dtype=self.dtype)
+        for spec in self.layers:
+            name = spec["name"]
+            if spec["kind"] == "lstm":
+                out = self._lstm(out, spec, f"{name}/")
+            elif spec["kind"] == "bilstm":
+                fwd = self._lstm(out, spec, f"{name}/forward/")
+                bwd = self._lstm(out, spec, f"{name}/backward/", go_backwards=True)
+                if spec["return_sequences"]:
+                    bwd = bwd[:, ::-1]
+                out = np.concatenate([fwd, bwd], axis=-1)
+            elif spec["kind"] == "dense":
+                out = _activation(spec["activation"])(out @ self.weights[f"{name}/kernel"] + self.weights[f"{name}/bias"])
+        return out
+
+    def predict(self, x, verbose=0) -> np.ndarray:
+        return self(x)
+
+
+def _lstm_spec(layer) -> Dict:
+    cfg = layer.get_config()
+    return {
+        "activation": cfg.get("activation", "tanh"),
+        "recurrent_activation": cfg.get("recurrent_activation", "sigmoid"),
+        "return_sequences": bool(cfg.get("return_sequences", False)),
+    }
+
+
+def from_keras(model, features: Optional[List[str]] = None) -> NumpyLSTMModel:
+    """Extracts layer layout and weights from a loaded Keras Sequential model."""
+    layers, weights = [], {}
+    for layer in model.layers:
+        kind = type(layer).__name__
+        name = layer.name
+        if kind == "Dropout" or kind == "InputLayer":
+            continue
+        if kind == "LSTM":
+            kernel, recurrent, bias = layer.get_weights()
+            layers.append({"kind": "lstm", "name": name, **_lstm_spec(layer)})
+            weights.update({f"{name}/kernel": kernel, f"{name}/recurrent_kernel": recurrent, f"{name}/bias": bias})
+        elif kind == "Bidirectional":
+            if layer.merge_mode != "concat":
+                raise ValueError(f"Unsupported Bidirectional merge_mode '{layer.merge_mode}'")
+            fk, fr, fb, bk, br, bb = layer.get_weights()
+            layers.append({"kind": "bilstm", "name": name, **_lstm_spec(layer.forward_layer)})
+            for direction, (k, r, b) in (("forward", (fk, fr, fb)), ("backward", (bk, br, bb))):
+                weights.update({f"{name}/{direction}/kernel": k, f"{name}/{direction}/recurrent_kernel": r,
+                                f"{name}/{direction}/bias": b})
+        elif kind == "Dense":
+            kernel, bias = layer.get_weights()
+            layers.append({"kind": "dense", "name": name, "activation": layer.get_config().get("activation", "linear")})
+            weights.update({f"{name}/kernel": kernel, f"{name}/bias": bias})
+        else:
+            raise ValueError(f"Unsupported layer type '{kind}' ({name})")
+    input_shape = tuple(int(d) for d in model.input_shape[1:])
+    return NumpyLSTMModel(layers, weights, input_shape, features)
+
+
+def read_configuration(result_dir: str) -> Dict:
+    """configuration.csv written by the training notebook, with `features` parsed."""
+    path = os.path.join(result_dir, "configuration.csv")
+    if not os.path.exists(path):
+        return {}
+    row = pd.read_csv(path).iloc[0].to_dict()
+    row["features"] = ast.literal_eval(row["features"])
+    return row
+
+
+def export_model(result_dir: str) -> str:
+    """model.keras -> weights.npz in the same directory. Needs TensorFlow/Keras."""
+    import keras
+    model = keras.models.load_model(os.path.join(result_dir, "model.keras"), compile=False)
+    np_model = from_keras(model, read_configuration(result_dir).get("features"))
+    out = os.path.join(result_dir, WEIGHTS_FILE)
+    np_model.save(out)
+    return out
+
+
+def test_windows(result_dir: str, scaler):
+    """Scaled test windows built the way the notebook built X_test."""
+    cfg = read_configuration(result_dir)
+    test = pd.read_csv(os.path.join(config.DATA_DIR, f"test_{cfg['resolution']}.csv"), index_col=0, parse_dates=True)
+    scaled = scaler.transform(test[cfg["features"]].values)
+    look_back = int(cfg["lookback"])
+    windows = np.lib.stride_tricks.sliding_window_view(scaled, (look_back, scaled.shape[1]))[:-1, 0]
+    return windows, cfg
+
+
+def verify_model(result_dir: str, use_keras: bool = True) -> Dict:
+    """Max abs differences: NumPy vs Keras (scaled) and NumPy vs predictions.csv (original units)."""
+    import joblib
+    scaler = joblib.load(os.path.join(result_dir, "scaler.pkl"))
+    windows, cfg = test_windows(result_dir, scaler)
+    np_model = NumpyLSTMModel.load(os.path.join(result_dir, WEIGHTS_FILE))
+
+    y_np = np_model(windows)[:, 0]
+    expanded = np.zeros((len(y_np), windows.shape[2]))
+    expanded[:, 0] = y_np
+    pred_np = scaler.inverse_transform(expanded)[:, 0]
+    stored = pd.read_csv(os.path.join(result_dir, "predictions.csv"))["predicted"].to_numpy()
+
+    report = {
+        "model": os.path.relpath(result_dir, config.MODEL_DIR),
+        "windows": len(windows),
+        "max_abs_vs_predictions_csv": float(np.max(np.abs(pred_np - stored))),
+        "mean_abs_predicted": float(np.mean(np.abs(stored))),
+    }
+    if use_keras:
+        import keras
+        model = keras.models.load_model(os.path.join(result_dir, "model.keras"), compile=False)
+        y_keras = np.asarray(model.predict(windows, batch_size=1024, verbose=0))[:, 0]
+        report["max_abs_vs_keras_scaled"] = float(np.max(np.abs(y_np - y_keras)))
+        expanded[:, 0] = y_keras
+        report["keras_max_abs_vs_predictions_csv"] = float(np.max(np.abs(scaler.inverse_transform(expanded)[:, 0] - stored)))
+    return report
+
+
+def find_models(root: str = LSTM_RESULTS_DIR) -> List[str]:
+    return sorted(os.path.dirname(p) for p in glob.glob(os.path.join(root, "*", "*", "model.keras")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--root", default=LSTM_RESULTS_DIR, help="Directory holding <res>_<target>/<model>/model.keras")
+    parser.add_argument("--no-keras", action="store_true", help="verify: only compare against predictions.csv")
+    args = parser.parse_args()
+
+    for result_dir in find_models(args.root):
+        if args.command == "export":
+            t0 = time.perf_counter()
+            out = export_model(result_dir)
+            print(f"{os.path.relpath(out, config.BASE_DIR)}  {os.path.getsize(out) / 1024:.0f} KB  "
+                  f"({time.perf_counter() - t0:.2f}s)")
+        else:
+            r = verify_model(result_dir, use_keras=not args.no_keras)
+            line = f"{r['model']:<34} {r['windows']:>6} windows | NumPy vs predictions.csv {r['max_abs_vs_predictions_csv']:.2e}"
+            if "max_abs_vs_keras_scaled" in r:
+                line += (f" | NumPy vs Keras (scaled) {r['max_abs_vs_keras_scaled']:.2e}"
+                         f" | Keras vs predictions.csv {r['keras_max_abs_vs_predictions_csv']:.2e}")
+            print(line + f" (mean |y| {r['mean_abs_predicted']:.3g})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,42 @@
+import logging
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional, Union
-from .arima_model import CustomARIMAPredictor
+from typing import List, Dict, Optional, Sequence, Union
+import config
+from . import registry
+from .numpy_lstm import NumpyLSTMModel
+
+logger = logging.getLogger(__name__)
+
+# Training feature names -> dashboard column names
+FEATURE_ALIASES = {'request_count': 'requests'}
+
+# Quantiles returned by predict_quantiles() when none are requested
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+# Model type -> (models key, engine.conformal.calibration_file model) of its calibration
+CALIBRATED_MODELS = {'lstm': ('lstm_calibration', 'LSTM'), 'hybrid': ('hybrid_calibration', 'hybrid')}
 
 class BasePredictor:
+    # engine.conformal.ResidualCalibration (e.g. from ModelLoader.load_calibration);
+    # without one, predict_quantiles() degenerates to the point forecast
+    calibration = None
+    _warned_uncalibrated = False
+
     def predict(self, recent_data: Union[pd.DataFrame, np.ndarray], steps: int = 1) -> List[float]:
         raise NotImplementedError
 
+    def predict_quantiles(self, recent_data: Union[pd.DataFrame, np.ndarray], steps: int = 1,
+                          qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[float, List[float]]:
+        """{q: multi-step forecast} for each quantile in `qs`."""
+        point = self.predict(recent_data, steps)
+        if self.calibration is None:
+            if not self._warned_uncalibrated:
+                logger.warning(f"{type(self).__name__} has no calibration; every quantile is the point forecast")
+                self._warned_uncalibrated = True
+            return {q: list(point) for q in qs}
+        return self.calibration.quantiles(point, qs)
+
 class NaivePredictor(BasePredictor):
     """
     Predicts the last value repeatedly (flat line).
@@ -21,56 +51,104 @@ class NaivePredictor(BasePredictor):
         return [float(last_val)] * steps
 
 class LSTMPredictor(BasePredictor):
-    def __init__(self, model, scaler, look_back: int = 30):
+    def __init__(self, model, scaler, look_back: int = 30, features: Optional[List[str]] = None):
         self.model = model
         self.scaler = scaler
         self.look_back = look_back
-        
+        # Input columns, target first. While forecasting recursively the
+        # extra columns are held at their last observed value.
+        self.features = features or ['requests']
+        self._forward = None
+        self._buf = None
+
+    def _get_forward(self):
+        """
+        One forward pass, (batch, look_back, n_features) -> (batch, 1) as NumPy.
+        Keras models are called directly through a tf.function instead of
+        model.predict(), which rebuilds a data pipeline on every call.
+        """
+        if self._forward is None:
+            if isinstance(self.model, NumpyLSTMModel):
+                self._forward = self.model
+            elif callable(self.model):
+                call = lambda x: self.model(x, training=False)
+                try:
+                    import tensorflow as tf
+                    call = tf.function(call, reduce_retracing=True)
+                except ImportError:
+                    pass
+                self._forward = lambda x: np.asarray(call(x))
+            else:
+                # Mocks / objects that only expose predict()
+                self._forward = lambda x: np.asarray(self.model.predict(x, verbose=0))
+        return self._forward
+
+    def _window(self, recent_data: pd.DataFrame) -> np.ndarray:
+        """Last `look_back` rows of the feature columns, (look_back, n_features)."""
+        columns = [f if f in recent_data.columns else FEATURE_ALIASES.get(f, f) for f in self.features]
+        return recent_data[columns].values[-self.look_back:]
+
+    def predict_windows(self, windows: np.ndarray, steps: int = 1) -> np.ndarray:
+        """
+        Recursive multi-step forecast for many series in one forward pass per step.
+        `windows` is (n_series, look_back) or (n_series, look_back, n_features)
+        raw values; returns (n_series, steps) in target units.
+
+        Windows and predictions share one preallocated (n_series, look_back + steps)
+        buffer, so each step's input is a view that slides one slot to the right.
+        """
+        windows = np.asarray(windows, dtype=float)
+        if windows.ndim == 2:
+            windows = windows[:, :, None]
+        n, _, n_features = windows.shape
+
+        # 1. Scale
+        if self.scaler:
+            scaled = self.scaler.transform(windows.reshape(-1, n_features)).reshape(windows.shape)
+        else:
+            scaled = windows
+
+        # 2. Buffer (reused across calls of the same shape)
+        shape = (n, self.look_back + steps, n_features)
+        if self._buf is None or self._buf.shape != shape:
+            self._buf = np.empty(shape, dtype=np.float32)
+        buf = self._buf
+        buf[:, :self.look_back] = scaled
+        buf[:, self.look_back:, 1:] = scaled[:, -1:, 1:]
+
+        # 3. Predict, feeding each step back in as the newest target value
+        forward = self._get_forward()
+        for k in range(steps):
+            buf[:, self.look_back + k, 0] = forward(buf[:, k:k + self.look_back])[:, 0]
+
+        # 4. Inverse Scale (target is column 0 of the scaler)
+        predictions = buf[:, self.look_back:, 0].astype(float)
+        if self.scaler:
+            expanded = np.zeros((n * steps, n_features))
+            expanded[:, 0] = predictions.ravel()
+            predictions = self.scaler.inverse_transform(expanded)[:, 0].reshape(n, steps)
+        return predictions
+
+    def predict_batch(self, recent_data: List[pd.DataFrame], steps: int = 1) -> List[List[float]]:
+        """predict() for many series, batched into one forward pass per step."""
+        results = [None] * len(recent_data)
+        ready = [i for i, df in enumerate(recent_data) if len(df) >= self.look_back]
+        for i, df in enumerate(recent_data):
+            if len(df) < self.look_back:
+                results[i] = NaivePredictor().predict(df, steps)
+        if ready:
+            windows = np.stack([self._window(recent_data[i]) for i in ready])
+            for i, row in zip(ready, self.predict_windows(windows, steps)):
+                results[i] = row.tolist()
+        return results
+
     def predict(self, recent_data: pd.DataFrame, steps: int = 1) -> List[float]:
-        # Implementation assumes usage of 'requests' column
-        # Needs exactly `look_back` data points
+        # Needs at least `look_back` rows of every feature column
         if len(recent_data) < self.look_back:
             # Not enough data
             return NaivePredictor().predict(recent_data, steps)
-            
-        # 1. Prepare Data
-        # Extract last `look_back` values
-        series = recent_data['requests'].values[-self.look_back:].reshape(-1, 1)
-        
-        # 2. Scale
-        if self.scaler:
-            series_scaled = self.scaler.transform(series)
-        else:
-            series_scaled = series
-            
-        # 3. Reshape for LSTM (samples, time steps, features)
-        X_input = series_scaled.reshape((1, self.look_back, 1))
-        
-        # 4. Predict
-        # Note: This simple loop predicts 1 step at a time if we wanted multi-step
-        # But if model output is 1 unit, we need recursive prediction for multi-step
-        
-        predictions = []
-        current_input = X_input
-        
-        for _ in range(steps):
-            y_pred_scaled = self.model.predict(current_input, verbose=0)
-            y_val_scaled = y_pred_scaled[0, 0]
-            predictions.append(y_val_scaled)
-            
-            # Update input for next step (sliding window)
-            # Remove first element, append new prediction
-            new_step = np.array([[[y_val_scaled]]]) 
-            current_input = np.append(current_input[:, 1:, :], new_step, axis=1)
-            
-        # 5. Inverse Scale
-        predictions = np.array(predictions).reshape(-1, 1)
-        if self.scaler:
-            final_preds = self.scaler.inverse_transform(predictions)
-        else:
-            final_preds = predictions
-            
-        return final_preds.flatten().tolist()
+
+        return self.predict_windows(self._window(recent_data)[None], steps)[0].tolist()
 
 class ArimaPredictor(BasePredictor):
     def __init__(self, model):
@@ -139,40 +217,89 @@ class HybridPredictor(BasePredictor):
         # 3. Combine
         return [t + r for t, r in zip(trend, residuals)]
 
+def make_lstm_predictor(model, scaler) -> LSTMPredictor:
+    """Exported NumPy models carry their own look-back and feature list."""
+    if isinstance(model, NumpyLSTMModel):
+        return LSTMPredictor(model, scaler, look_back=model.look_back, features=model.features)
+    return LSTMPredictor(model, scaler)
+
+def build_naive(models: Dict, scaler=None) -> BasePredictor:
+    return NaivePredictor()
+
+def build_lstm(models: Dict, scaler=None) -> Optional[BasePredictor]:
+    if models.get('lstm'):
+        predictor = make_lstm_predictor(models['lstm'], scaler)
+        predictor.calibration = models.get('lstm_calibration')
+        return predictor
+    return None
+
+def build_arima(models: Dict, scaler=None, **kwargs) -> BasePredictor:
+    # CustomARIMAPredictor trains on the fly, so no pre-loaded model is needed.
+    # Imported here: it pulls in statsmodels.
+    from .arima_model import CustomARIMAPredictor
+    return CustomARIMAPredictor(**kwargs)
+
+def build_prophet(models: Dict, scaler=None) -> Optional[BasePredictor]:
+    if models.get('prophet'):
+        return ProphetPredictor(models['prophet'])
+    return None
+
+def build_hybrid(models: Dict, scaler=None) -> Optional[BasePredictor]:
+    p_model = models.get('prophet')
+    l_model = models.get('lstm')
+    # Hybrid needs both, AND the LSTM should ideally be the residual one.
+    # For demo, we might reuse the standard LSTM if a specific one isn't available,
+    # but usually they are distinct.
+    if p_model and l_model:
+        predictor = HybridPredictor(ProphetPredictor(p_model), make_lstm_predictor(l_model, scaler))
+        predictor.calibration = models.get('hybrid_calibration')
+        return predictor
+    return None
+
+def model_target(models: Dict) -> str:
+    """Forecast target of the loaded LSTM: the first of its features, 'request_count' if unknown."""
+    features = getattr(models.get('lstm'), 'features', None)
+    return features[0] if features else 'request_count'
+
+def with_calibration(models: Dict, model_type: str, resolution: str, target: Optional[str] = None) -> Dict:
+    """
+    `models` plus the conformal calibration of `model_type` for `resolution`
+    and `target` (default: model_target()), loaded from the stored
+    predictions CSV (cached in MODEL_REGISTRY).
+    Models without a calibration, or with one already given, are returned as is.
+    """
+    key, calibration_model = CALIBRATED_MODELS.get(model_type.lower(), (None, None))
+    if key is None or models.get(key) is not None:
+        return models
+    target = target or model_target(models)
+    from .conformal import calibration_file
+    from .loader import ModelLoader
+    calibration = ModelLoader(config.MODEL_DIR).load_calibration(
+        calibration_file(resolution, target, calibration_model))
+    return {**models, key: calibration}
+
 class PredictorFactory:
     @staticmethod
-    def get_predictor(model_type: str, models: Dict[str, any], scaler=None) -> BasePredictor:
+    def get_predictor(model_type: str, models: Dict[str, any], scaler=None,
+                      resolution: Optional[str] = None, target: Optional[str] = None) -> BasePredictor:
         """
-        models: Dict containing 'lstm', 'arima', 'prophet'
+        models: Dict containing 'lstm', 'arima', 'prophet' and optionally
+        'lstm_calibration' / 'hybrid_calibration' (ModelLoader.load_calibration)
+        With `resolution`, missing calibrations are loaded for it and `target`
+        (see with_calibration).
+        Backends come from engine.registry; unknown types get NaivePredictor.
         """
-        mt = model_type.lower()
-        
-        if mt == 'lstm':
-            if models.get('lstm'):
-                return LSTMPredictor(models['lstm'], scaler)
-        
+        if resolution:
+            models = with_calibration(models or {}, model_type, resolution, target)
+        try:
+            return registry.get_predictor(model_type, models, scaler)
+        except KeyError:
+            return NaivePredictor()
 
-        elif mt == 'arima':
-            # Use the new CustomARIMAPredictor that trains on the fly
-            # We don't strictly need a pre-loaded model object from `models` dict
-            # because CustomARIMAPredictor initializes its own internal ARIMA.
-            # However, we can pass config parameters if they were in `models`.
-            return CustomARIMAPredictor()
-        
-        elif mt == 'prophet':
-            if models.get('prophet'):
-                return ProphetPredictor(models['prophet'])
-        
-        elif mt == 'hybrid':
-            p_model = models.get('prophet')
-            l_model = models.get('lstm')
-            # Hybrid needs both, AND the LSTM should ideally be the residual one.
-            # For demo, we might reuse the standard LSTM if a specific one isn't available,
-            # but usually they are distinct.
-            if p_model and l_model:
-                return HybridPredictor(
-                    ProphetPredictor(p_model),
-                    LSTMPredictor(l_model, scaler)
-                )
-        
-        return NaivePredictor()
+    @staticmethod
+    def get_cached_predictor(model_type: str, models: Dict[str, any], scaler=None,
+                             resolution: str = "", cache=None, target: Optional[str] = None) -> BasePredictor:
+        """get_predictor() behind engine.forecast_cache (FORECAST_CACHE unless `cache` is given)."""
+        from .forecast_cache import CachedPredictor
+        return CachedPredictor(PredictorFactory.get_predictor(model_type, models, scaler, resolution, target),
+                               model_type, resolution, cache)
@@ -0,0 +1,109 @@
+"""
+Predictor registry.
+
+Every backend is registered as a lightweight PredictorSpec that names its
+builder as "module:attribute". Nothing is imported at registration time:
+the builder's module, and with it the backend's heavy dependencies
+(statsmodels, TensorFlow, Prophet), is imported on the first get_predictor
+for that name and then reused.
+
+Other packages can add backends through the "planora.predictors" entry-point
+group, e.g. in their pyproject.toml:
+
+    [project.entry-points."planora.predictors"]
+    xgboost = "my_package.forecast:build_xgboost"
+
+Builders are called as builder(models, scaler, **kwargs) and return a
+BasePredictor, or None when the models they need are missing (the caller
+then falls back to NaivePredictor).
+"""
+import importlib
+import threading
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+ENTRY_POINT_GROUP = "planora.predictors"
+
+
+class PredictorSpec(NamedTuple):
+    name: str
+    builder: str                    # "module:attribute"
+    requires: Tuple[str, ...] = ()  # heavy packages the backend pulls in on first use
+    description: str = ""
+
+
+_SPECS: Dict[str, PredictorSpec] = {}
+_BUILDERS: Dict[str, Callable] = {}
+_LOCK = threading.Lock()
+_ENTRY_POINTS_LOADED = False
+
+
+def register_predictor(name: str, builder: str, requires: Tuple[str, ...] = (),
+                       description: str = "", replace: bool = False) -> PredictorSpec:
+    """Registers a backend under `name` (case-insensitive) without importing it."""
+    key = name.lower()
+    if ":" not in builder:
+        raise ValueError(f"builder must be 'module:attribute', got '{builder}'")
+    with _LOCK:
+        if key in _SPECS and not replace:
+            raise ValueError(f"Predictor '{name}' is already registered")
+        spec = PredictorSpec(key, builder, tuple(requires), description)
+        _SPECS[key] = spec
+        _BUILDERS.pop(key, None)
+    return spec
+
+
+def _load_entry_points():
+    global _ENTRY_POINTS_LOADED
+    if _ENTRY_POINTS_LOADED:
+        return
+    _ENTRY_POINTS_LOADED = True
+    from importlib.metadata import entry_points
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name.lower() not in _SPECS:
+            register_predictor(ep.name, ep.value, description=f"entry point from {ep.value.split(':')[0]}")
+
+
+def available_predictors() -> Dict[str, PredictorSpec]:
+    """Registered specs by name, entry points included. Imports no backend."""
+    _load_entry_points()
+    return dict(_SPECS)
+
+
+def resolve(name: str) -> Callable:
+    """The builder for `name`, importing its module on first use."""
+    key = name.lower()
+    builder = _BUILDERS.get(key)
+    if builder is not None:
+        return builder
+    if key not in _SPECS:
+        _load_entry_points()
+    spec = _SPECS.get(key)
+    if spec is None:
+        raise KeyError(f"Unknown predictor '{name}' (available: {', '.join(sorted(_SPECS))})")
+    module, _, attr = spec.builder.partition(":")
+    builder = getattr(importlib.import_module(module), attr)
+    _BUILDERS[key] = builder
+    return builder
+
+
+def get_predictor(name: str, models: Optional[Dict] = None, scaler=None, **kwargs):
+    """
+    Builds the `name` predictor from `models`. Unknown names raise KeyError;
+    a backend whose models are missing gives the naive last-value predictor.
+    """
+    predictor = resolve(name)(models or {}, scaler, **kwargs)
+    if predictor is None:
+        predictor = resolve("naive")(models or {}, scaler)
+    return predictor
+
+
+register_predictor("naive", "engine.predictor_factory:build_naive",
+                   description="Last value repeated; fallback when no model is available")
+register_predictor("arima", "engine.predictor_factory:build_arima", requires=("statsmodels",),
+                   description="CustomARIMAPredictor, fitted on the recent window")
+register_predictor("lstm", "engine.predictor_factory:build_lstm", requires=("tensorflow",),
+                   description="LSTM/BiLSTM from models['lstm'] (TensorFlow only for Keras models)")
+register_predictor("prophet", "engine.predictor_factory:build_prophet", requires=("prophet",),
+                   description="Prophet model from models['prophet']")
+register_predictor("hybrid", "engine.predictor_factory:build_hybrid", requires=("prophet", "tensorflow"),
+                   description="Prophet trend + LSTM residual")
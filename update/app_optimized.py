@@ -629,10 +629,12 @@ def update():
         fcast = data.get('forecast', curr_req)
     else:
         if 'predictor' not in st.session_state or st.session_state.get('pred_type') != model_type:
-            st.session_state.predictor = PredictorFactory.get_predictor(
+            # Memoized: reruns and other sessions on the same data skip the model
+            st.session_state.predictor = PredictorFactory.get_cached_predictor(
                 model_type, 
                 st.session_state.models, 
-                st.session_state.scaler
+                st.session_state.scaler,
+                resolution=resolution
             )
             st.session_state.pred_type = model_type
         
@@ -1,18 +1,27 @@
 """Utils package for PLANORA Dashboard"""
-from .ai_models import get_ai_prediction_multi_horizon, detect_anomaly, generate_simulated_load
-from .scaling_logic import scaling_logic, calculate_cpu_utilization, calculate_cost_savings
-from .data_loader import DataLoader, DataPreprocessor
-from .model_manager import ModelManager, ModelTrainer
+import importlib
 
-__all__ = [
-    'get_ai_prediction_multi_horizon',
-    'detect_anomaly',
-    'generate_simulated_load',
-    'scaling_logic',
-    'calculate_cpu_utilization',
-    'calculate_cost_savings',
-    'DataLoader',
-    'DataPreprocessor',
-    'ModelManager',
-    'ModelTrainer'
-]
+# Exports are imported on first access, so headless tools can use
+# utils.simulation / utils.csv_cache without Streamlit installed.
+_EXPORTS = {
+    'get_ai_prediction_multi_horizon': '.ai_models',
+    'detect_anomaly': '.ai_models',
+    'generate_simulated_load': '.ai_models',
+    'scaling_logic': '.scaling_logic',
+    'calculate_cpu_utilization': '.scaling_logic',
+    'calculate_cost_savings': '.scaling_logic',
+    'DataLoader': '.data_loader',
+    'DataPreprocessor': '.data_loader',
+    'ModelManager': '.model_manager',
+    'ModelTrainer': '.model_manager',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,157 @@
+"""
+Columnar binary cache for the data/*.csv and predictions CSVs.
+
+The first read of a CSV parses it once and writes every column to
+<csv dir>/.npycache/<csv name>.<parse_dates hash>/<i>.npy next to a
+meta.json recording the source size and mtime. Each parse_dates set gets
+its own directory, so callers with different sets never rewrite each
+other's columns. Datetime columns are stored as int64 nanoseconds
+since the epoch, so later reads skip both the CSV parse and pd.to_datetime.
+Later reads memory-map the .npy files. The cache is rebuilt when the CSV
+changes, and anything that cannot be stored losslessly (mixed/NaN strings,
+tz-aware timestamps, unwritable directory) silently falls back to
+pd.read_csv.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR_NAME = ".npycache"
+CACHE_VERSION = 1
+
+# Columns converted with pd.to_datetime when present (object dtype only).
+# 'Unnamed: 0' is the unnamed timestamp index column of the data/*.csv files.
+DATE_COLUMNS = ("timestamp", "ds", "Unnamed: 0")
+
+
+def _cache_dir(path: str, parse_dates: Iterable[str]) -> str:
+    dates = hashlib.blake2b(json.dumps(sorted(parse_dates)).encode(), digest_size=4).hexdigest()
+    return os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME,
+                        f"{os.path.basename(path)}.{dates}")
+
+
+def _tmp_path(path: str) -> str:
+    # Unique temp name: several processes/threads may build the same cache at once
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _source_stamp(path: str) -> Dict[str, int]:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _read_meta(cache_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(cache_dir, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _encode(series: pd.Series):
+    """(array, kind) for a column, or None if it cannot round-trip exactly."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return None
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series.to_numpy(dtype="datetime64[ns]").view(np.int64), "datetime"
+    if series.dtype.kind in "biuf":
+        return series.to_numpy(), "numeric"
+    if series.dtype == object and not series.isna().any() and series.map(type).eq(str).all():
+        return series.to_numpy(dtype=str), "string"
+    return None
+
+
+def _parse(path: str, parse_dates: Iterable[str]) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    for col in parse_dates:
+        if col in df.columns and df[col].dtype == object:
+            try:
+                df[col] = pd.to_datetime(df[col])
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+def _write(path: str, df: pd.DataFrame, parse_dates: Iterable[str]) -> bool:
+    encoded = [_encode(df[col]) for col in df.columns]
+    if any(e is None for e in encoded) or df.columns.duplicated().any():
+        return False
+
+    cache_dir = _cache_dir(path, parse_dates)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        columns = []
+        for i, (col, (values, kind)) in enumerate(zip(df.columns, encoded)):
+            target = os.path.join(cache_dir, f"{i}.npy")
+            tmp = _tmp_path(target)
+            with open(tmp, "wb") as f:
+                np.save(f, values, allow_pickle=False)
+            os.replace(tmp, target)
+            columns.append({"name": str(col), "kind": kind})
+        meta = {"version": CACHE_VERSION, "source": _source_stamp(path), "rows": len(df),
+                "parse_dates": sorted(parse_dates), "columns": columns}
+        # meta.json goes last, so a half-written cache is never considered valid
+        target = os.path.join(cache_dir, "meta.json")
+        tmp = _tmp_path(target)
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, target)
+        return True
+    except OSError:
+        return False
+
+
+def _valid_meta(path: str, parse_dates: Iterable[str]) -> Optional[dict]:
+    meta = _read_meta(_cache_dir(path, parse_dates))
+    if (meta is None or meta.get("version") != CACHE_VERSION
+            or meta.get("source") != _source_stamp(path)
+            or meta.get("parse_dates") != sorted(parse_dates)):
+        return None
+    return meta
+
+
+def load_columns(path: str, parse_dates: Iterable[str] = DATE_COLUMNS) -> Dict[str, np.ndarray]:
+    """
+    Column name -> read-only memory-mapped array (datetime columns as
+    datetime64[ns] views). Builds or refreshes the cache if needed.
+    """
+    parse_dates = list(parse_dates)
+    meta = _valid_meta(path, parse_dates)
+    if meta is None:
+        df = _parse(path, parse_dates)
+        if not _write(path, df, parse_dates):
+            return {str(col): df[col].to_numpy() for col in df.columns}
+        meta = _read_meta(_cache_dir(path, parse_dates))
+
+    cache_dir = _cache_dir(path, parse_dates)
+    columns = {}
+    for i, col in enumerate(meta["columns"]):
+        values = np.load(os.path.join(cache_dir, f"{i}.npy"), mmap_mode="r", allow_pickle=False)
+        if col["kind"] == "datetime":
+            values = values.view("datetime64[ns]")
+        columns[col["name"]] = values
+    return columns
+
+
+def read_csv(path: str, parse_dates: Iterable[str] = DATE_COLUMNS) -> pd.DataFrame:
+    """
+    Drop-in for pd.read_csv(path) followed by pd.to_datetime on the
+    `parse_dates` columns that are present, served from the binary cache.
+    Unlike plain pd.read_csv, those columns (by default DATE_COLUMNS) come
+    back as datetime64 rather than str; pass parse_dates=() to keep strings.
+    """
+    parse_dates = list(parse_dates)
+    meta = _valid_meta(path, parse_dates)
+    if meta is None:
+        df = _parse(path, parse_dates)
+        _write(path, df, parse_dates)
+        return df
+    # Copying out of the mapping first is much faster than letting pandas
+    # consolidate memmaps, and leaves callers with a normal writable frame
+    columns = {name: np.array(values) for name, values in load_columns(path, parse_dates).items()}
+    return pd.DataFrame(columns, copy=False)
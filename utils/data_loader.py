@@ -7,6 +7,8 @@ import streamlit as st
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
+from .csv_cache import read_csv as read_csv_cached
+
 
 class DataLoader:
     """Handle data loading from various sources"""
@@ -26,9 +28,12 @@ class DataLoader:
             - timestamp: datetime
             - requests_per_minute: int/float
             - (optional) replicas: int
+
+        Read through utils.csv_cache: 'timestamp', 'ds' and 'Unnamed: 0'
+        come back as datetime64 (not str) whenever they parse as dates.
         """
         try:
-            df = pd.read_csv(file_path)
+            df = read_csv_cached(file_path)
             
             # Convert timestamp to datetime if needed
             if 'timestamp' in df.columns:
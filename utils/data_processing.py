@@ -1,15 +1,19 @@
 import pandas as pd
 import os
 
+from .csv_cache import read_csv as read_csv_cached
+
 def load_traffic_data(filepath: str) -> pd.DataFrame:
     """
     Loads traffic data from CSV.
     Expected columns: timestamp, requests, bytes (optional)
+    Read through utils.csv_cache, so 'timestamp', 'ds' and 'Unnamed: 0'
+    come back as datetime64 (not str) whenever they parse as dates.
     """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
         
-    df = pd.read_csv(filepath)
+    df = read_csv_cached(filepath)
     
     # Ensure timestamp column exists and is datetime
     if 'timestamp' in df.columns:
@@ -0,0 +1,93 @@
+"""
+Point-budget downsampling for chart traces.
+
+`lttb` is Largest-Triangle-Three-Buckets: it keeps the first and last
+points and, from each bucket in between, the point forming the largest
+triangle with the previously kept point and the next bucket's mean, so
+spikes and gaps survive. `minmax` keeps each bucket's min and max, which
+is exact for extremes and fully vectorized. `downsample` applies one of
+them only when a trace is over budget.
+"""
+from typing import Tuple
+
+import numpy as np
+
+import config
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x)
+    if x.dtype.kind in "mM":
+        x = x.view(np.int64)
+    return x.astype(np.float64, copy=False)
+
+
+def _bucket_edges(n: int, n_buckets: int) -> np.ndarray:
+    """Edges splitting points 1..n-2 into n_buckets near-equal buckets."""
+    return np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the `n_out` points LTTB keeps (all indices if n_out >= len)."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+    xf, yf = _as_float(x), np.asarray(y, dtype=np.float64)
+
+    edges = _bucket_edges(n, n_out - 2)
+    starts, stops = edges[:-1], edges[1:]
+    # Mean of every bucket at once; the last bucket's "next" is the final point
+    counts = stops - starts
+    mean_x = np.add.reduceat(xf[1:n - 1], starts - 1) / counts
+    mean_y = np.add.reduceat(yf[1:n - 1], starts - 1) / counts
+    next_x = np.append(mean_x[1:], xf[-1])
+    next_y = np.append(mean_y[1:], yf[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    # Each bucket depends on the point picked in the one before it; the
+    # triangle areas within a bucket are computed in one vectorized step
+    for b, (lo, hi) in enumerate(zip(starts.tolist(), stops.tolist())):
+        ax, ay = xf[a], yf[a]
+        area = np.abs((ax - next_x[b]) * (yf[lo:hi] - ay) - (ax - xf[lo:hi]) * (next_y[b] - ay))
+        a = lo + int(area.argmax())
+        out[b + 1] = a
+    return out
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of each bucket's min and max (in time order), about `n_out` points in total."""
+    n = len(y)
+    if n_out >= n or n < 3:
+        return np.arange(n)
+    yf = np.asarray(y, dtype=np.float64)
+    n_buckets = max((n_out - 2) // 2, 1)
+    edges = _bucket_edges(n, n_buckets)
+    size = int((edges[1:] - edges[:-1]).max())
+
+    # Pad the buckets to a common width so argmin/argmax run over a 2-D view
+    idx = edges[:-1, None] + np.arange(size)
+    valid = idx < edges[1:, None]
+    idx = np.where(valid, idx, edges[1:, None] - 1)
+    block = yf[idx]
+    lo = idx[np.arange(n_buckets), np.where(valid, block, np.inf).argmin(axis=1)]
+    hi = idx[np.arange(n_buckets), np.where(valid, block, -np.inf).argmax(axis=1)]
+    return np.unique(np.concatenate(([0, n - 1], lo, hi)))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int = config.MAX_CHART_POINTS,
+               method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """(x, y) unchanged if within `max_points`, else the points kept by `method`."""
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    if method == "lttb":
+        idx = lttb_indices(x, y, max_points)
+    elif method == "minmax":
+        idx = minmax_indices(y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method '{method}'")
+    return x[idx], y[idx]
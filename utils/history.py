@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable
+
+import config
+
+
+class HistoryBuffer:
+    """
+    Fixed-window history of the dashboard's per-tick values.
+
+    Timestamps are int64 nanoseconds, values float32, all in preallocated
+    arrays of twice the window. Every append writes its slot and the mirror
+    slot one window further on, so the last `window` points are always one
+    contiguous slice: append is O(1) and the ordered views cost no copy.
+    """
+    def __init__(self, window: int = config.HISTORY_WINDOW,
+                 columns: Iterable[str] = ('requests', 'replicas', 'forecast')):
+        self.window = int(window)
+        self.columns = tuple(columns)
+        self._timestamps = np.zeros(2 * self.window, dtype=np.int64)
+        self._values = {col: np.zeros(2 * self.window, dtype=np.float32) for col in self.columns}
+        self._cursor = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp, **values):
+        """Adds one tick. Columns missing from `values` are stored as NaN."""
+        i = self._cursor
+        j = i + self.window
+        ts = timestamp.value if isinstance(timestamp, pd.Timestamp) else pd.Timestamp(timestamp).value
+        self._timestamps[i] = self._timestamps[j] = ts
+        for col, buf in self._values.items():
+            buf[i] = buf[j] = values.get(col, np.nan)
+        self._cursor = 0 if i + 1 == self.window else i + 1
+        if self._count < self.window:
+            self._count += 1
+
+    def _slice(self) -> slice:
+        start = self._cursor + self.window - self._count
+        return slice(start, start + self._count)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Read-only datetime64[ns] view, oldest first."""
+        view = self._timestamps[self._slice()].view('datetime64[ns]')
+        view.flags.writeable = False
+        return view
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """Read-only float32 view of `column`, oldest first."""
+        view = self._values[column][self._slice()]
+        view.flags.writeable = False
+        return view
+
+    def last(self, column: str, default=None, back: int = 1):
+        """Value `back` ticks ago (1 = latest), or `default` if not that many points yet."""
+        if back > self._count:
+            return default
+        return self._values[column][self._cursor + self.window - back].item()
+
+    def clear(self):
+        self._cursor = 0
+        self._count = 0
@@ -0,0 +1,428 @@
+"""
+Streaming ingestion of NASA-style Common Log Format access logs.
+
+Reads gzip or plain logs in chunks, tokenizes each line with plain string
+slicing (no regex), and folds it into per-minute buckets: request count,
+weighted load, static-resource count, bytes and a HyperLogLog sketch of
+the client hosts. Memory depends on the time span covered, never on the
+number of log lines. Plain files are split into byte ranges and gzip files
+are one shard each; shards are aggregated on a process pool and merged
+(counts added, sketches unioned), then rolled up into 1/5/15-minute
+frames with the same columns as data/*.csv.
+
+Buckets inside a run of empty buckets at least --outage-gap minutes long
+(or inside an explicit --outage window) are flagged is_outage and, where
+the bucket one week earlier has data, filled from it and flagged is_imputed.
+
+The weighting used for weighted_load lives in STATUS_WEIGHTS; the training
+notebooks' exact weights are not in the repo, so the regenerated series
+does not match the shipped data/*.csv the models were trained on. Output
+therefore goes to data/ingested/ by default, and existing CSVs are only
+overwritten with --force.
+
+Usage:
+    python -m utils.log_ingest access_log_Jul95.gz access_log_Aug95.gz [--out data/ingested] [--force]
+        [--workers 4] [--split-at 1995-08-23] [--outage 1995-08-01T14:52/1995-08-03T04:36]
+"""
+import argparse
+import datetime
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+
+RESOLUTIONS = {"1min": 1, "5min": 5, "15min": 15}
+# Default output; kept apart from the training/evaluation CSVs in data/
+INGEST_DIR = os.path.join(config.DATA_DIR, "ingested")
+COLUMNS = ["request_count", "weighted_load", "unique_users", "static_ratio", "total_bytes", "is_outage", "is_imputed"]
+
+# weighted_load weight per status class, in tenths of a request (kept integral so sums are exact)
+STATUS_WEIGHTS = {2: 10, 3: 5, 4: 1, 5: 1}
+STATIC_EXTENSIONS = frozenset(("gif", "jpg", "jpeg", "png", "xbm", "bmp", "ico", "css", "js",
+                               "mpg", "mpeg", "wav", "au", "txt", "pdf", "ps"))
+
+HLL_PRECISION = 10            # 2**10 registers per minute, ~3% error above the linear-counting range
+CHUNK_BYTES = 8 << 20         # lines read per tokenizer batch
+SHARD_BYTES = 256 << 20       # plain files are split into ranges of about this size
+
+_MONTHS = {m: i for i, m in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                                       "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _minute_of(stamp: str) -> int:
+    """'01/Jul/1995:00:00' -> minutes since the epoch (log-local wall time, offset ignored)."""
+    dt = datetime.datetime(int(stamp[7:11]), _MONTHS[stamp[3:6]], int(stamp[0:2]), int(stamp[12:14]), int(stamp[15:17]))
+    return (dt - _EPOCH) // datetime.timedelta(minutes=1)
+
+
+def parse_lines(lines: Sequence[str], minute_cache: Dict[str, int]):
+    """
+    Tokenizes CLF lines into (minutes, weight_tenths, static, bytes, hosts)
+    arrays plus the number of malformed lines skipped. `minute_cache` maps
+    the '[dd/Mon/yyyy:HH:MM' prefix to its minute and is reused across chunks.
+    """
+    minutes, weights, static, nbytes, hosts = [], [], [], [], []
+    bad = 0
+    for line in lines:
+        host, _, rest = line.partition(" ")
+        lb = rest.find("[")
+        q1 = rest.find('"', lb + 1)
+        if lb < 0 or q1 < 0:
+            bad += 1
+            continue
+        q2 = rest.rfind('"')
+        if q2 > q1:
+            request, tail = rest[q1 + 1:q2], rest[q2 + 1:].split()
+        else:
+            # Unterminated request string: status and size are still the last two fields
+            fields = rest[q1 + 1:].rsplit(None, 2)
+            request, tail = fields[0], fields[1:]
+        if len(tail) != 2 or not tail[0].isdigit():
+            bad += 1
+            continue
+
+        stamp = rest[lb + 1:lb + 18]
+        minute = minute_cache.get(stamp)
+        if minute is None:
+            try:
+                minute = _minute_of(stamp)
+            except (ValueError, KeyError):
+                bad += 1
+                continue
+            minute_cache[stamp] = minute
+
+        parts = request.split()
+        path = (parts[1] if len(parts) > 1 else parts[0] if parts else "").split("?", 1)[0]
+        dot = path.rfind(".")
+        size = tail[1]
+
+        minutes.append(minute)
+        weights.append(STATUS_WEIGHTS.get(int(tail[0]) // 100, 0))
+        static.append(dot > path.rfind("/") and path[dot + 1:].lower() in STATIC_EXTENSIONS)
+        nbytes.append(int(size) if size.isdigit() else 0)
+        hosts.append(host)
+
+    return (np.array(minutes, dtype=np.int64), np.array(weights, dtype=np.int64),
+            np.array(static, dtype=bool), np.array(nbytes, dtype=np.int64),
+            np.array(hosts, dtype=object), bad)
+
+
+# ──────────────────────────────────────────────
+# HyperLogLog
+# ──────────────────────────────────────────────
+
+def _clz64(w: np.ndarray) -> np.ndarray:
+    """Leading zero bits of each uint64 (64 for zero), by binary search over shifts."""
+    n = np.zeros(w.shape, dtype=np.int64)
+    x = w.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (x >> np.uint64(64 - shift)) == 0
+        n += np.where(empty, shift, 0)
+        x = np.where(empty, x << np.uint64(shift), x)
+    n[w == 0] = 64
+    return n
+
+
+def hll_update(registers: np.ndarray, rows: np.ndarray, hashes: np.ndarray, precision: int = HLL_PRECISION):
+    """Adds 64-bit `hashes` to the sketches registers[rows] in place."""
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rank = np.minimum(_clz64(hashes << np.uint64(precision)), 64 - precision) + 1
+    np.maximum.at(registers.reshape(-1), rows * registers.shape[1] + index, rank.astype(np.uint8))
+
+
+def hll_estimate(registers: np.ndarray) -> np.ndarray:
+    """Cardinality estimate per sketch (last axis = registers), with small-range linear counting."""
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=-1)
+    zeros = np.count_nonzero(registers == 0, axis=-1)
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+# ──────────────────────────────────────────────
+# Per-minute aggregation
+# ──────────────────────────────────────────────
+
+class MinuteBuckets:
+    """
+    Per-minute sums and host sketches over a growing minute range.
+    Storage grows geometrically at either end, so appending a time-ordered
+    log costs amortized O(1) per minute.
+    """
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.start = 0          # minute (since epoch) of row 0
+        self.n = 0              # rows in use
+        self.sums = np.zeros((4, 0), dtype=np.int64)    # requests, weight tenths, static, bytes
+        self.registers = np.zeros((0, 1 << precision), dtype=np.uint8)
+        self.malformed = 0
+
+    def _cover(self, lo: int, hi: int):
+        """Makes minutes lo..hi (inclusive) addressable."""
+        if self.n == 0:
+            self.start, self.n = lo, 0
+        new_start = min(self.start, lo)
+        new_n = max(self.start + self.n, hi + 1) - new_start
+        capacity = self.sums.shape[1]
+        if new_start == self.start and new_n <= capacity:
+            self.n = new_n
+            return
+        head = self.start - new_start
+        grown = max(new_n, 2 * capacity)
+        sums = np.zeros((4, grown), dtype=np.int64)
+        registers = np.zeros((grown, self.registers.shape[1]), dtype=np.uint8)
+        sums[:, head:head + self.n] = self.sums[:, :self.n]
+        registers[head:head + self.n] = self.registers[:self.n]
+        self.sums, self.registers = sums, registers
+        self.start, self.n = new_start, new_n
+
+    def add(self, minutes: np.ndarray, weights: np.ndarray, static: np.ndarray, nbytes: np.ndarray, hosts: np.ndarray):
+        if not len(minutes):
+            return
+        self._cover(int(minutes.min()), int(minutes.max()))
+        rows = minutes - self.start
+        width = self.n
+        for k, values in enumerate((None, weights, static, nbytes)):
+            self.sums[k, :width] += np.bincount(rows, weights=values, minlength=width).astype(np.int64)
+        # pandas' hash is keyed with a fixed seed, so sketches from different workers are comparable
+        hashes = pd.util.hash_array(hosts)
+        hll_update(self.registers, rows, hashes, self.precision)
+
+    def merge(self, other: "MinuteBuckets"):
+        if other.n == 0:
+            return
+        self._cover(other.start, other.start + other.n - 1)
+        lo = other.start - self.start
+        self.sums[:, lo:lo + other.n] += other.sums[:, :other.n]
+        np.maximum(self.registers[lo:lo + other.n], other.registers[:other.n], out=self.registers[lo:lo + other.n])
+        self.malformed += other.malformed
+
+    def frame(self, resolution: int = 1) -> pd.DataFrame:
+        """Buckets of `resolution` minutes (epoch-aligned) with the data/*.csv metric columns."""
+        if self.n == 0:
+            return pd.DataFrame(columns=COLUMNS[:5])
+        first = self.start // resolution * resolution
+        pad_front = self.start - first
+        rows = -(-(pad_front + self.n) // resolution)
+        sums = np.zeros((4, rows * resolution), dtype=np.int64)
+        sums[:, pad_front:pad_front + self.n] = self.sums[:, :self.n]
+        registers = np.zeros((rows * resolution, self.registers.shape[1]), dtype=np.uint8)
+        registers[pad_front:pad_front + self.n] = self.registers[:self.n]
+
+        sums = sums.reshape(4, rows, resolution).sum(axis=2)
+        registers = registers.reshape(rows, resolution, -1).max(axis=1)
+        requests, weight_tenths, static, nbytes = sums
+        users = np.rint(hll_estimate(registers)).astype(np.int64)
+
+        index = pd.to_datetime((first + np.arange(rows) * resolution) * 60, unit="s")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            static_ratio = np.where(requests > 0, static / requests, 0.0)
+        return pd.DataFrame({
+            "request_count": requests,
+            "weighted_load": np.round(weight_tenths / 10.0, 1),
+            "unique_users": users,
+            "static_ratio": static_ratio,
+            "total_bytes": nbytes.astype(np.float64),
+        }, index=index)
+
+
+# ──────────────────────────────────────────────
+# Shards
+# ──────────────────────────────────────────────
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def plan_shards(paths: Sequence[str], shard_bytes: int = SHARD_BYTES) -> List[Tuple[str, int, Optional[int]]]:
+    """(path, start, end) byte ranges; gzip files cannot be split and are one shard each."""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if path.endswith(".gz") or size <= shard_bytes:
+            shards.append((path, 0, None))
+            continue
+        edges = list(range(0, size, shard_bytes)) + [size]
+        shards.extend((path, lo, hi) for lo, hi in zip(edges[:-1], edges[1:]))
+    return shards
+
+
+def iter_chunks(path: str, start: int = 0, end: Optional[int] = None,
+                chunk_bytes: int = CHUNK_BYTES) -> Iterator[List[str]]:
+    """
+    Decoded lines in batches of about `chunk_bytes`. With a byte range, a
+    shard owns every line that starts in [start, end).
+    """
+    with _open(path) as f:
+        if start:
+            # A line starting exactly at `start` is kept: the readline only eats the previous newline
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell() if start else 0
+        while end is None or pos < end:
+            lines = f.readlines(chunk_bytes)
+            if not lines:
+                break
+            if end is not None:
+                size = sum(map(len, lines))
+                if pos + size > end:
+                    kept = []
+                    for line in lines:
+                        if pos >= end:
+                            break
+                        kept.append(line)
+                        pos += len(line)
+                    lines = kept
+                else:
+                    pos += size
+            yield b"".join(lines).decode("latin-1").splitlines()
+
+
+def aggregate_shard(path: str, start: int = 0, end: Optional[int] = None,
+                    precision: int = HLL_PRECISION) -> MinuteBuckets:
+    buckets = MinuteBuckets(precision)
+    cache: Dict[str, int] = {}
+    for lines in iter_chunks(path, start, end):
+        *columns, bad = parse_lines(lines, cache)
+        buckets.add(*columns)
+        buckets.malformed += bad
+    return buckets
+
+
+def aggregate_logs(paths: Sequence[str], workers: Optional[int] = None,
+                   precision: int = HLL_PRECISION, shard_bytes: int = SHARD_BYTES) -> MinuteBuckets:
+    """Aggregates every shard of `paths` across a process pool and merges the results."""
+    shards = plan_shards(paths, shard_bytes)
+    merged = MinuteBuckets(precision)
+    workers = min(workers or os.cpu_count() or 1, len(shards)) if shards else 1
+    if workers <= 1:
+        for path, lo, hi in shards:
+            merged.merge(aggregate_shard(path, lo, hi, precision))
+        return merged
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(aggregate_shard, path, lo, hi, precision) for path, lo, hi in shards]
+        for future in futures:
+            merged.merge(future.result())
+    return merged
+
+
+# ──────────────────────────────────────────────
+# Outages and output
+# ──────────────────────────────────────────────
+
+def fill_outages(frame: pd.DataFrame, resolution: int, outage_gap: int = 60,
+                 windows: Sequence[Tuple[pd.Timestamp, pd.Timestamp]] = (),
+                 impute_lag: pd.Timedelta = pd.Timedelta(days=7)) -> pd.DataFrame:
+    """
+    Adds is_outage / is_imputed. Outage buckets are those inside `windows`
+    when given, otherwise inside runs of empty buckets lasting at least
+    `outage_gap` minutes. Each is filled from the bucket `impute_lag`
+    earlier when that bucket exists and is not an outage itself.
+    """
+    frame = frame.copy()
+    empty = frame["request_count"].to_numpy() == 0
+    if windows:
+        outage = np.zeros(len(frame), dtype=bool)
+        for lo, hi in windows:
+            outage |= (frame.index >= lo) & (frame.index < hi)
+    else:
+        # Length of the empty run each bucket belongs to
+        run_id = np.cumsum(~empty)
+        run_len = np.bincount(run_id, weights=empty)[run_id]
+        outage = empty & (run_len * resolution >= outage_gap)
+
+    lag = int(impute_lag / pd.Timedelta(minutes=resolution))
+    src = np.arange(len(frame)) - lag
+    imputed = outage & (src >= 0)
+    imputed[imputed] &= ~outage[src[imputed]]
+    for column in COLUMNS[:5]:
+        values = frame[column].to_numpy().copy()
+        values[imputed] = values[src[imputed]]
+        frame[column] = values
+
+    frame["is_outage"] = outage.astype(np.int64)
+    frame["is_imputed"] = imputed.astype(np.int64)
+    return frame
+
+
+def build_frames(buckets: MinuteBuckets, outage_gap: int = 60,
+                 windows: Sequence[Tuple[pd.Timestamp, pd.Timestamp]] = ()) -> Dict[str, pd.DataFrame]:
+    return {name: fill_outages(buckets.frame(res), res, outage_gap, windows) for name, res in RESOLUTIONS.items()}
+
+
+def write_frames(frames: Dict[str, pd.DataFrame], out_dir: str = INGEST_DIR,
+                 split_at: Optional[str] = "1995-08-23", force: bool = False) -> List[str]:
+    """
+    train_<res>.csv / test_<res>.csv split at `split_at` (or <res>.csv without a split).
+    Raises FileExistsError, before writing anything, if a target exists and not `force`.
+    """
+    outputs = {}
+    for name, frame in frames.items():
+        parts = {name: frame}
+        if split_at:
+            cut = pd.Timestamp(split_at)
+            parts = {f"train_{name}": frame[frame.index < cut], f"test_{name}": frame[frame.index >= cut]}
+        for stem, part in parts.items():
+            outputs[os.path.join(out_dir, f"{stem}.csv")] = part
+
+    existing = [path for path in outputs if os.path.exists(path)]
+    if existing and not force:
+        raise FileExistsError(f"Refusing to overwrite {', '.join(existing)} (use --force)")
+
+    os.makedirs(out_dir, exist_ok=True)
+    for path, part in outputs.items():
+        part.to_csv(path)
+    return list(outputs)
+
+
+def _window(spec: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    lo, hi = spec.split("/")
+    return pd.Timestamp(lo), pd.Timestamp(hi)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="+", help="Access logs (.gz or plain)")
+    parser.add_argument("--out", default=INGEST_DIR, help="Output directory for the CSVs")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing CSVs in --out")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: all cores)")
+    parser.add_argument("--split-at", default="1995-08-23", help="First test timestamp ('' for no split)")
+    parser.add_argument("--outage-gap", type=int, default=60, help="Minutes without requests that count as an outage")
+    parser.add_argument("--outage", action="append", default=[], type=_window,
+                        help="Explicit outage window START/END (repeatable; disables gap detection)")
+    parser.add_argument("--precision", type=int, default=HLL_PRECISION, help="HyperLogLog precision (registers = 2**p)")
+    args = parser.parse_args()
+
+    if not args.force:
+        # Fail before the (long) aggregation rather than after it
+        stems = [f"{p}_{r}" for r in RESOLUTIONS for p in ("train", "test")] if args.split_at else list(RESOLUTIONS)
+        existing = [os.path.join(args.out, f"{s}.csv") for s in stems if os.path.exists(os.path.join(args.out, f"{s}.csv"))]
+        if existing:
+            parser.error(f"refusing to overwrite {', '.join(existing)} (use --force)")
+
+    t0 = time.perf_counter()
+    buckets = aggregate_logs(args.logs, workers=args.workers, precision=args.precision)
+    t_agg = time.perf_counter() - t0
+    frames = build_frames(buckets, args.outage_gap, args.outage)
+    written = write_frames(frames, args.out, args.split_at or None, args.force)
+
+    lines = int(buckets.sums[0, :buckets.n].sum())
+    print(f"{lines:,} requests ({buckets.malformed:,} malformed lines skipped) in {t_agg:.1f}s "
+          f"({lines / max(t_agg, 1e-9):,.0f} lines/s)")
+    for name, frame in frames.items():
+        print(f"  {name:<6} {len(frame):>6} buckets, {int(frame['is_outage'].sum())} outage, "
+              f"{int(frame['is_imputed'].sum())} imputed")
+    for path in written:
+        print(f"  -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,99 @@
+import numpy as np
 import pandas as pd
 import time
-from typing import Optional, Dict
+from operator import methodcaller
+from typing import Optional, Dict, Iterator
 
 class TimeTraveler:
     """
     Simulates real-time data streaming from a CSV file.
+
+    The frame is split once into per-column NumPy arrays (`arrays`), so ticks
+    never go through DataFrame.iloc. Hot loops can call `advance()` and index
+    the arrays directly; `next_tick()` still returns the row as a dict.
     """
     def __init__(self, data: pd.DataFrame):
         self.data = data
         self.current_step = 0
         self.max_steps = len(data)
-        
+
+        # All-numeric rows are upcast to one dtype by iloc, mixed rows keep per-column types.
+        # Extension dtypes (Int64, Float64, string) have no NumPy common type and
+        # are kept as object arrays holding their scalars (pd.NA included).
+        dtypes = [data[c].dtype for c in data.columns]
+        common = None
+        if dtypes and all(isinstance(d, np.dtype) and d.kind in 'iufc' for d in dtypes):
+            common = np.result_type(*dtypes)
+
+        self.arrays: Dict[str, np.ndarray] = {}
+        self._boxers = {}
+        for col in data.columns:
+            if isinstance(data[col].dtype, np.dtype):
+                values = data[col].to_numpy()
+            else:
+                values = data[col].to_numpy(dtype=object)
+            if common is not None:
+                values = values.astype(common, copy=False)
+            self.arrays[col] = values
+            if values.dtype.kind == 'M':
+                self._boxers[col] = pd.Timestamp
+            elif values.dtype.kind in 'biuf':
+                self._boxers[col] = methodcaller('item')
+            else:
+                self._boxers[col] = None
+
+    def advance(self) -> int:
+        """
+        Moves one tick forward and returns that row's index into `arrays`,
+        or -1 at the end of the data. Allocates nothing.
+        """
+        step = self.current_step
+        if step >= self.max_steps:
+            return -1
+        self.current_step = step + 1
+        return step
+
+    def value(self, column: str, step: Optional[int] = None):
+        """Single value of `column` at `step` (default: the last tick returned)."""
+        if step is None:
+            step = self.current_step - 1
+        return self.arrays[column][step]
+
+    def row(self, step: int) -> Dict:
+        """Row `step` as a dict with the same value types as DataFrame.iloc[step].to_dict()."""
+        row = {}
+        for col, values in self.arrays.items():
+            box = self._boxers[col]
+            row[col] = box(values[step]) if box is not None else values[step]
+        return row
+
     def next_tick(self) -> Optional[Dict]:
         """
         Returns the next data point (row) as a dictionary.
         Returns None if end of data.
         """
-        if self.current_step >= self.max_steps:
+        step = self.advance()
+        if step < 0:
             return None
-            
-        row = self.data.iloc[self.current_step].to_dict()
-        # Ensure timestamp is string for JSON serialization if needed, or keep as obj
-        # row['timestamp'] = str(row['timestamp']) 
-        
-        self.current_step += 1
-        return row
+        return self.row(step)
+
+    def iter_chunks(self, n: int) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yields the remaining rows `n` at a time as column -> array-slice views,
+        advancing current_step past each chunk as it is yielded.
+        """
+        while self.current_step < self.max_steps:
+            start = self.current_step
+            stop = min(start + n, self.max_steps)
+            self.current_step = stop
+            yield {col: values[start:stop] for col, values in self.arrays.items()}
+
+    def seek(self, step: int):
+        """Positions the stream so the next tick returns row `step` (clamped to the data)."""
+        self.current_step = min(max(int(step), 0), self.max_steps)
 
     def reset(self):
         self.current_step = 0
-        
+
     def get_progress(self) -> float:
         return self.current_step / self.max_steps